@@ -0,0 +1,17 @@
+## Copyright 2021 Henning Thiesen
+
+## OpInMod is released under the open source MIT License, see
+## https://github.com/hnnngt/OpInMod/blob/main/LICENSE
+
+"""Benchmarks of OpInMod model building, solving and result processing.
+
+Run all benchmarks of the default scaling series and append the
+measurements to the history file::
+
+    python -m benchmarks --history benchmarks/history.jsonl
+
+Measure the import time of the package::
+
+    python -m benchmarks.import_time --check
+
+"""
@@ -0,0 +1,10 @@
+## Copyright 2021 Henning Thiesen
+
+## OpInMod is released under the open source MIT License, see
+## https://github.com/hnnngt/OpInMod/blob/main/LICENSE
+
+from benchmarks.run import main
+
+import sys
+
+sys.exit(main())
@@ -0,0 +1,115 @@
+## Copyright 2021 Henning Thiesen
+
+## OpInMod is released under the open source MIT License, see
+## https://github.com/hnnngt/OpInMod/blob/main/LICENSE
+
+"""Parametric generator of synthetic OpInMod energy systems.
+
+"""
+
+import opinmod as om
+
+import numpy as np
+import pandas as pd
+
+
+def generate(n_generators=10, n_wind=5, n_storages=2, timesteps=168, seed=0,
+             inertia_share=0.3, synchronous_inertia_share=0.2):
+    """Returns a synthetic energy system
+
+    The system has one electricity bus with a demand, shortage and excess
+    and one inertia bus. Generators are fuel fired transformers with a
+    'synchronous_generator' inertia source, wind parks are sources with
+    'synthetic_wind' and storages are :class:`opinmod.GenericStorage`
+    units with 'synthetic_storage' inertia.
+
+    Parameters
+    ----------
+    n_generators : int
+        Number of synchronous generators
+    n_wind : int
+        Number of wind parks
+    n_storages : int
+        Number of storage units
+    timesteps : int
+        Number of hourly timesteps
+    seed : int
+        Seed of the random parameters and profiles
+    inertia_share : float
+        Minimum system inertia as share of the inertia of all generators
+    synchronous_inertia_share : float
+        Minimum system synchronous inertia as share of the inertia of all
+        generators
+
+    Returns
+    -------
+    EnergySystem
+
+    """
+    rng = np.random.RandomState(seed)
+    hours = np.arange(timesteps)
+
+    capacity = rng.uniform(50, 400, n_generators)
+    inertia_constant = rng.uniform(2, 9, n_generators)
+    apparent_power = 1.2 * capacity
+    moment_of_inertia = inertia_constant * apparent_power / (0.5 * 4 * np.pi ** 2 * 50 ** 2)
+
+    es = om.EnergySystem(
+        timeindex=pd.date_range('2020-01-01', periods=timesteps, freq='H'),
+        nominal_grid_frequency=50,
+        minimum_system_inertia=inertia_share * moment_of_inertia.sum(),
+        minimum_system_synchronous_inertia=synchronous_inertia_share * moment_of_inertia.sum(),
+        emulated_inertia_constant=6)
+
+    bel = om.Bus(label='electricity')
+    bfuel = om.Bus(label='fuel')
+    inertia = om.Bus(label='inertia', balanced=False)
+    es.add(bel, bfuel, inertia)
+    es.add(om.Source(label='fuel_supply', outputs={bfuel: om.Flow(variable_costs=20)}))
+    es.add(om.Source(label='shortage', outputs={bel: om.Flow(variable_costs=10000)}))
+    es.add(om.Sink(label='excess', inputs={bel: om.Flow(variable_costs=1000)}))
+
+    daily = 0.75 + 0.2 * np.sin(2 * np.pi * (hours - 6) / 24)
+    demand = 0.6 * capacity.sum() * daily * rng.uniform(0.95, 1.05, timesteps)
+    es.add(om.Sink(label='demand', inputs={bel: om.Flow(fix=demand, nominal_value=1)}))
+
+    for g in range(n_generators):
+        es.add(om.Transformer(
+            label='generator_{0}'.format(g),
+            inputs={bfuel: om.Flow()},
+            outputs={bel: om.Flow(nominal_value=capacity[g],
+                                  variable_costs=rng.uniform(0, 30)),
+                     inertia: om.Inertia(inertia_constant=inertia_constant[g],
+                                         apparent_power=apparent_power[g],
+                                         provision_type='synchronous_generator',
+                                         inertia_costs=rng.uniform(0, 1),
+                                         minimum_stable_operation=rng.uniform(0.2, 0.5))},
+            conversion_factors={bel: rng.uniform(0.35, 0.6)}))
+
+    for w in range(n_wind):
+        # autocorrelated capacity factor between 0 and 1
+        noise = np.convolve(rng.normal(0, 1, timesteps + 23), np.ones(24) / 24, mode='valid')
+        profile = np.clip(0.35 + 1.5 * noise, 0, 1)
+        nominal_value = rng.uniform(20, 200)
+        es.add(om.Source(
+            label='wind_{0}'.format(w),
+            outputs={bel: om.Flow(fix=profile, nominal_value=nominal_value),
+                     inertia: om.Inertia(apparent_power=nominal_value,
+                                         provision_type='synthetic_wind',
+                                         inertia_costs=rng.uniform(0, 0.5))}))
+
+    for s in range(n_storages):
+        power = rng.uniform(10, 100)
+        es.add(om.GenericStorage(
+            label='storage_{0}'.format(s),
+            nominal_storage_capacity=4 * power,
+            inputs={bel: om.Flow(nominal_value=power)},
+            outputs={bel: om.Flow(nominal_value=power),
+                     inertia: om.Inertia(apparent_power=power,
+                                         provision_type='synthetic_storage',
+                                         inertia_power_share=0.2,
+                                         inertia_costs=rng.uniform(0, 0.5))},
+            loss_rate=0.001, initial_storage_level=0.5,
+            inflow_conversion_factor=0.95, outflow_conversion_factor=0.95))
+
+    return es
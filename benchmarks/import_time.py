@@ -0,0 +1,147 @@
+## Copyright 2021 Henning Thiesen
+
+## OpInMod is released under the open source MIT License, see
+## https://github.com/hnnngt/OpInMod/blob/main/LICENSE
+
+"""Import time of the OpInMod package.
+
+Every statement is executed in a fresh interpreter with
+``python -X importtime``. The wall time of the statement, the import
+time of the slowest modules and the heavy dependencies loaded by the
+statement are recorded. `import opinmod` alone must not load any of
+:data:`HEAVY_MODULES`; with ``--check`` the benchmark fails if it does or
+if it exceeds ``--max-time``::
+
+    python -m benchmarks.import_time --check --max-time 0.05
+
+"""
+
+from benchmarks.run import environment
+
+import argparse
+import datetime
+import json
+import subprocess
+import sys
+
+
+STATEMENTS = {
+    'opinmod': 'import opinmod',
+    'energysystem': 'from opinmod import EnergySystem, Inertia',
+    'model': 'from opinmod import Model',
+}
+
+# dependencies which are only loaded on first use
+HEAVY_MODULES = ('oemof.solph', 'pyomo', 'pandas', 'scipy', 'networkx', 'pyarrow', 'tables')
+
+_SCRIPT = '''
+import sys, time, json
+start = time.perf_counter()
+{statement}
+duration = time.perf_counter() - start
+print(json.dumps({{'time': duration,
+                   'loaded': [m for m in {heavy!r} if m in sys.modules]}}))
+'''
+
+
+def measure(statement, repeat=5):
+    """Measures the import time of a statement in fresh interpreters
+
+    Parameters
+    ----------
+    statement : str
+        Python statement, e.g. 'import opinmod'
+    repeat : int
+        Number of interpreters, the fastest run is reported
+
+    Returns
+    -------
+    dict
+        `time` (s, wall time of the statement), `modules` (the ten
+        modules with the highest import time of their own, in s) and
+        `loaded` (heavy dependencies loaded by the statement)
+
+    """
+    best = None
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c',
+             _SCRIPT.format(statement=statement, heavy=HEAVY_MODULES)],
+            capture_output=True, text=True, check=True)
+        record = json.loads(output.stdout.strip().splitlines()[-1])
+        if best is None or record['time'] < best['time']:
+            record['modules'] = _slowest_modules(output.stderr)
+            best = record
+    return best
+
+
+def _slowest_modules(importtime, count=10):
+    """Returns the modules with the highest self time of an importtime log"""
+    modules = []
+    for line in importtime.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, _, name = line[len('import time:'):].split('|')
+        modules.append((name.strip(), int(own) / 1e6))
+    return dict(sorted(modules, key=lambda m: -m[1])[:count])
+
+
+def run(statements=None, repeat=5, history=None):
+    """Measures all statements
+
+    Parameters
+    ----------
+    statements : dict, optional
+        Statements by name. Defaults to :data:`STATEMENTS`.
+    repeat : int
+        Number of interpreters per statement
+    history : str, optional
+        JSON lines file the record is appended to
+
+    Returns
+    -------
+    dict
+        Record with one measurement per statement
+
+    """
+    record = {'date': datetime.datetime.now().isoformat(timespec='seconds'),
+              'environment': environment(),
+              'imports': {name: measure(statement, repeat)
+                          for name, statement in (statements or STATEMENTS).items()}}
+    if history is not None:
+        with open(history, 'a') as f:
+            f.write(json.dumps(record) + '\n')
+    return record
+
+
+def main(argv=None):
+    """Command line entry point of the import time benchmark"""
+    parser = argparse.ArgumentParser(description='Benchmark the import time of OpInMod.')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--history', default=None,
+                        help='JSON lines file the results are appended to')
+    parser.add_argument('--check', action='store_true',
+                        help="fail if 'import opinmod' loads heavy dependencies")
+    parser.add_argument('--max-time', type=float, default=None,
+                        help="fail if 'import opinmod' takes longer (s)")
+    args = parser.parse_args(argv)
+
+    record = run(repeat=args.repeat, history=args.history)
+    for name, result in record['imports'].items():
+        print('{0:<15} {1:>8.3f} s  heavy: {2}'.format(
+            name, result['time'], ', '.join(result['loaded']) or '-'))
+
+    failures = []
+    base = record['imports'].get('opinmod')
+    if args.check and base is not None and base['loaded']:
+        failures.append("'import opinmod' loads {0}".format(', '.join(base['loaded'])))
+    if args.max_time is not None and base is not None and base['time'] > args.max_time:
+        failures.append("'import opinmod' takes {0:.3f} s (limit {1:.3f} s)".format(
+            base['time'], args.max_time))
+    for failure in failures:
+        print('FAILED: ' + failure, file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,210 @@
+## Copyright 2021 Henning Thiesen
+
+## OpInMod is released under the open source MIT License, see
+## https://github.com/hnnngt/OpInMod/blob/main/LICENSE
+
+"""Timing and peak memory of the phases of an OpInMod run.
+
+Every benchmark case measures wall time and peak memory (of Python
+allocations, traced with `tracemalloc`) separately for
+
+* `energysystem`: construction of the energy system
+* `model.*`: the phases of `Model.__init__` as recorded by its build
+  profile (sets, variables, each constraint block, objective, inertia
+  constraints) and the remaining setup
+* `write_lp`: writing the LP file
+* `solve`: solving with a local solver (skipped without solver)
+* `results`: `Model.results()`
+
+The measurements are appended as one JSON line per case to a history
+file, so scaling curves can be compared between releases.
+
+"""
+
+from benchmarks.generator import generate
+
+import opinmod
+from opinmod.models_inertia import Model
+
+import pyomo
+import pyomo.environ as po
+
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+
+DEFAULT_CASES = [
+    # generators, wind parks, storages, timesteps
+    (10, 5, 2, 168),
+    (10, 5, 2, 672),
+    (40, 20, 8, 168),
+    (40, 20, 8, 672),
+]
+
+
+class Recorder(object):
+    """Records wall time and peak memory of named phases"""
+
+    def __init__(self):
+        self.phases = {}
+
+    @contextlib.contextmanager
+    def measure(self, name):
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.stop()
+        tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            if tracing:
+                tracemalloc.start()
+            phase = self.phases.setdefault(name, {'time': 0.0, 'peak_memory': 0})
+            phase['time'] += duration
+            phase['peak_memory'] = max(phase['peak_memory'], peak)
+
+
+def run_case(n_generators, n_wind, n_storages, timesteps, solver=None, seed=0, **model_kwargs):
+    """Runs one benchmark case and returns its record"""
+    recorder = Recorder()
+    with recorder.measure('energysystem'):
+        es = generate(n_generators, n_wind, n_storages, timesteps, seed=seed)
+
+    start = time.perf_counter()
+    model = Model(es, build_profile=True, **model_kwargs)
+    duration = time.perf_counter() - start
+    for phase in model.build_profile.phases:
+        recorder.phases['model.' + phase['phase']] = {
+            'time': phase['time'], 'peak_memory': phase['peak_memory'],
+            'variables': phase['variables'], 'constraints': phase['constraints'],
+            'nonzeros': phase['nonzeros']}
+    recorder.phases['model.other'] = {
+        'time': duration - model.build_profile.totals()['time'], 'peak_memory': None}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with recorder.measure('write_lp'):
+            model.write(os.path.join(tmp, 'model.lp'),
+                        io_options={'symbolic_solver_labels': False})
+        lp_size = os.path.getsize(os.path.join(tmp, 'model.lp'))
+
+    objective = None
+    if solver is not None:
+        with recorder.measure('solve'):
+            model.solve(solver=solver)
+        objective = po.value(model.objective, exception=False)
+    else:
+        # results are processed from zero values without a solve
+        for var in model.component_data_objects(po.Var):
+            if var.value is None:
+                var.value = 0
+
+    with recorder.measure('results'):
+        model.results()
+
+    return {
+        'case': {'generators': n_generators, 'wind': n_wind, 'storages': n_storages,
+                 'timesteps': timesteps, 'seed': seed, 'solver': solver,
+                 'model_kwargs': model_kwargs},
+        'size': {'variables': model.nvariables(), 'constraints': model.nconstraints(),
+                 'lp_bytes': lp_size},
+        'objective': objective,
+        'phases': recorder.phases,
+    }
+
+
+def environment():
+    """Returns the versions of OpInMod, its dependencies and the platform"""
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=os.path.dirname(opinmod.__file__),
+            capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {'opinmod': opinmod.__version__, 'commit': commit,
+            'pyomo': pyomo.version.version, 'python': platform.python_version(),
+            'platform': platform.platform()}
+
+
+def run(cases=None, solver=None, history=None, seed=0):
+    """Runs all benchmark cases
+
+    Parameters
+    ----------
+    cases : list of tuple, optional
+        `(generators, wind parks, storages, timesteps)` of each case.
+        Defaults to :data:`DEFAULT_CASES`.
+    solver : str, optional
+        Local solver, e.g. 'cbc'. The solve phase is skipped if not given.
+    history : str, optional
+        JSON lines file the records are appended to
+    seed : int
+        Seed of the generated energy systems
+
+    Returns
+    -------
+    list of dict
+        One record per case
+
+    """
+    meta = {'date': datetime.datetime.now().isoformat(timespec='seconds'),
+            'environment': environment()}
+    records = []
+    for case in cases or DEFAULT_CASES:
+        record = dict(meta, **run_case(*case, solver=solver, seed=seed))
+        records.append(record)
+        if history is not None:
+            with open(history, 'a') as f:
+                f.write(json.dumps(record) + '\n')
+    return records
+
+
+def format_records(records):
+    """Returns a text table of the times of all phases, one column per case"""
+    phases = []
+    for record in records:
+        phases.extend(p for p in record['phases'] if p not in phases)
+    names = ['{generators}g/{wind}w/{storages}s/{timesteps}t'.format(**r['case']) for r in records]
+    width = max(len(p) for p in phases)
+    lines = [' ' * width + ''.join(n.rjust(max(len(n), 10) + 1) for n in names)]
+    for p in phases:
+        lines.append(p.ljust(width) + ''.join(
+            ('{0:.3f}'.format(r['phases'][p]['time']) if p in r['phases'] else '-').rjust(
+                max(len(n), 10) + 1) for n, r in zip(names, records)))
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    """Command line entry point of the benchmarks"""
+    parser = argparse.ArgumentParser(description='Benchmark OpInMod model building.')
+    parser.add_argument('--case', action='append', default=None,
+                        help="case as 'generators,wind,storages,timesteps', repeatable")
+    parser.add_argument('--solver', default=None,
+                        help='local solver, e.g. cbc; no solve if not given')
+    parser.add_argument('--history', default=None,
+                        help='JSON lines file the results are appended to')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    cases = None
+    if args.case:
+        cases = [tuple(int(v) for v in case.split(',')) for case in args.case]
+    records = run(cases, solver=args.solver, history=args.history, seed=args.seed)
+    print(format_records(records))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -13,24 +13,52 @@ __copyright__ = "Copyright 2021 Henning Thiesen (WETI), MIT License"
 
 """
 
-# opinmod imports
-from opinmod.network.energy_system_inertia import EnergySystem
-from opinmod.network.inertia_inertia import Inertia
-from opinmod.network.transformer_inertia import Transformer
-from opinmod.models_inertia import Model
-from opinmod.components.generic_storage import GenericStorage
-
-# oemof.solph imports
-from oemof.solph import custom
-from oemof.solph import helpers
-from oemof.solph import views
-from oemof.solph.components.extraction_turbine_chp import ExtractionTurbineCHP
-from oemof.solph.components.generic_chp import GenericCHP
-from oemof.solph.components.offset_transformer import OffsetTransformer
-from oemof.solph.network.bus import Bus
-from oemof.solph.network.flow import Flow
-from oemof.solph.network.sink import Sink
-from oemof.solph.network.source import Source
-from oemof.solph.options import Investment
-from oemof.solph.options import NonConvex
-from oemof.solph.plumbing import sequence
+import importlib
+
+# Public names are imported lazily on first access (PEP 562), so
+# `import opinmod` does not load oemof.solph, Pyomo and pandas.
+_LAZY_ATTRIBUTES = {
+    # opinmod
+    'EnergySystem': ('opinmod.network.energy_system_inertia', 'EnergySystem'),
+    'Inertia': ('opinmod.network.inertia_inertia', 'Inertia'),
+    'Transformer': ('opinmod.network.transformer_inertia', 'Transformer'),
+    'Model': ('opinmod.models_inertia', 'Model'),
+    'GenericStorage': ('opinmod.components.generic_storage', 'GenericStorage'),
+    # oemof.solph
+    'custom': ('oemof.solph', 'custom'),
+    'helpers': ('oemof.solph', 'helpers'),
+    'views': ('oemof.solph', 'views'),
+    'ExtractionTurbineCHP': ('oemof.solph.components.extraction_turbine_chp', 'ExtractionTurbineCHP'),
+    'GenericCHP': ('oemof.solph.components.generic_chp', 'GenericCHP'),
+    'OffsetTransformer': ('oemof.solph.components.offset_transformer', 'OffsetTransformer'),
+    'Bus': ('oemof.solph.network.bus', 'Bus'),
+    'Flow': ('oemof.solph.network.flow', 'Flow'),
+    'Sink': ('oemof.solph.network.sink', 'Sink'),
+    'Source': ('oemof.solph.network.source', 'Source'),
+    'Investment': ('oemof.solph.options', 'Investment'),
+    'NonConvex': ('oemof.solph.options', 'NonConvex'),
+    'sequence': ('oemof.solph.plumbing', 'sequence'),
+}
+
+__all__ = list(_LAZY_ATTRIBUTES)
+
+
+def __getattr__(name):
+    """Imports public names and submodules on first access"""
+    if name in _LAZY_ATTRIBUTES:
+        module, attribute = _LAZY_ATTRIBUTES[name]
+        value = getattr(importlib.import_module(module), attribute)
+    else:
+        try:
+            value = importlib.import_module(__name__ + '.' + name)
+        except ModuleNotFoundError as e:
+            if e.name != __name__ + '.' + name:
+                raise
+            raise AttributeError("module '{0}' has no attribute '{1}'".format(
+                __name__, name)) from None
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
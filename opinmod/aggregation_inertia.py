@@ -0,0 +1,307 @@
+## Copyright 2021 Henning Thiesen
+
+## OpInMod is released under the open source MIT License, see
+## https://github.com/hnnngt/OpInMod/blob/main/LICENSE
+
+"""Time series aggregation of OpInMod energy systems into typical periods.
+
+The time horizon is split into periods of equal length, e.g. days. The
+periods are clustered by their time series (demand and wind profiles,
+costs, wind inertia and time dependent inertia limits) and every cluster
+is represented by one of its periods. The representative periods build
+a reduced energy system whose timesteps are weighted with the number of
+periods they represent.
+
+Example::
+
+    aggregation = TimeSeriesAggregation(es, n_periods=12, period_length=24)
+    model = Model(aggregation.aggregate())
+    model.solve()
+    results = aggregation.disaggregate(model.results())
+
+"""
+
+from opinmod.plumbing_inertia import sequence_to_array
+from opinmod.wind_inertia import calc_inertia_wind_profile
+
+from oemof.solph.network import Flow
+
+import numpy as np
+
+
+class TimeSeriesAggregation(object):
+    """Aggregation of an energy system into typical periods
+
+    Parameters
+    ----------
+    energysystem : EnergySystem object
+        Object that holds the nodes of an OpInMod energy system graph
+    n_periods : int
+        Number of typical periods
+    period_length : int
+        Number of timesteps of each period, e.g. 24 for days of an hourly
+        time index. The length of the time index has to be a multiple of
+        the period length.
+    method : str
+        'kmedoids' or 'kmeans'. For k-means the period closest to the
+        centre of each cluster represents the cluster.
+    seed : int, optional
+        Seed of the random initialisation
+    n_init : int
+        Number of random initialisations, the best clustering is kept
+    max_iter : int
+        Maximum number of iterations of each clustering
+
+    Attributes
+    ----------
+    representatives : array
+        Periods representing the clusters
+    weights : array
+        Number of periods each representative stands for
+    assignment : array
+        Cluster of every period of the full time horizon
+
+    Notes
+    -----
+    The representative periods are optimised one after another in a
+    single model, so storage levels are carried over from one typical
+    period to the next.
+
+    """
+
+    def __init__(self, energysystem, n_periods, period_length=24, method='kmedoids',
+                 seed=None, n_init=10, max_iter=100):
+        length = len(energysystem.timeindex)
+        if method not in ('kmedoids', 'kmeans'):
+            raise ValueError("Unknown clustering method '{0}'".format(method))
+        if period_length <= 0 or length % period_length != 0:
+            raise ValueError("The length of the time index has to be a multiple "
+                             "of the period length.")
+        if not 0 < n_periods <= length // period_length:
+            raise ValueError("The number of typical periods has to be between 1 "
+                             "and the number of periods of the time horizon.")
+
+        self.es = energysystem
+        self.n_periods = n_periods
+        self.period_length = period_length
+        self.method = method
+        self.seed = seed
+        self.n_init = n_init
+        self.max_iter = max_iter
+        self.representatives = None
+        self.weights = None
+        self.assignment = None
+
+    def features(self):
+        """Returns the normalised time series of all periods
+
+        Returns
+        -------
+        array
+            One row per period with the time series of all time dependent
+            attributes, each scaled to the range [0, 1]
+
+        """
+        length = len(self.es.timeindex)
+        series = []
+
+        def _add(value):
+            if value is None or np.ndim(value) == 0:
+                return
+            values = sequence_to_array(value, length)
+            if np.ptp(values) > 0:
+                series.append((values - values.min()) / np.ptp(values))
+
+        for n in self.es.nodes:
+            for target, edge in n.outputs.items():
+                if isinstance(edge, Flow):
+                    for attr in ('fix', 'max', 'min', 'variable_costs'):
+                        _add(_time_series(getattr(edge, attr)))
+                    continue
+                _add(_time_series(edge.inertia_costs))
+                if edge.provision_type == 'synthetic_wind':
+                    # the wind inertia depends on the capacity factor
+                    flows = [f for f in n.outputs.values() if isinstance(f, Flow)]
+                    if flows and _time_series(flows[-1].fix) is not None:
+                        _add(calc_inertia_wind_profile(
+                            sequence_to_array(flows[-1].fix, length),
+                            self.es.emulated_inertia_constant, edge.apparent_power)[1])
+
+        _add(self.es.minimum_system_inertia)
+        _add(self.es.minimum_system_synchronous_inertia)
+        for limits in (self.es.minimum_area_inertia, self.es.minimum_area_synchronous_inertia):
+            for area in sorted(limits or {}, key=str):
+                _add(limits[area])
+
+        if not series:
+            return np.zeros((length // self.period_length, self.period_length))
+        return np.concatenate(
+            [s.reshape(-1, self.period_length) for s in series], axis=1)
+
+    def cluster(self):
+        """Clusters the periods
+
+        Sets :attr:`representatives`, :attr:`weights` and
+        :attr:`assignment`.
+
+        """
+        features = self.features()
+        rng = np.random.RandomState(self.seed)
+        best = None
+        for _ in range(self.n_init):
+            if self.method == 'kmeans':
+                medoids, assignment = _kmeans(features, self.n_periods, rng, self.max_iter)
+            else:
+                medoids, assignment = _kmedoids(features, self.n_periods, rng, self.max_iter)
+            cost = ((features - features[medoids][assignment]) ** 2).sum()
+            if best is None or cost < best[0]:
+                best = (cost, medoids, assignment)
+
+        _, medoids, assignment = best
+        order = np.argsort(medoids)
+        self.representatives = medoids[order]
+        self.assignment = np.argsort(order)[assignment]
+        self.weights = np.bincount(self.assignment, minlength=self.n_periods)
+        return self
+
+    def timesteps(self):
+        """Returns the timesteps of all representative periods"""
+        if self.representatives is None:
+            self.cluster()
+        return (self.representatives[:, None] * self.period_length +
+                np.arange(self.period_length)).ravel()
+
+    def aggregate(self):
+        """Returns the energy system reduced to the representative periods
+
+        The `period_weighting` of the returned energy system holds the
+        weight of each timestep.
+
+        """
+        es = self.es.select_timesteps(self.timesteps())
+        es.period_weighting = np.repeat(self.weights, self.period_length).astype(float).tolist()
+        return es
+
+    def disaggregate(self, results):
+        """Maps the results of the aggregated model back to the full time
+        horizon
+
+        Every period of the full time horizon gets the results of its
+        representative period.
+
+        Parameters
+        ----------
+        results : dict
+            Results of a model of :meth:`aggregate`
+
+        Returns
+        -------
+        dict
+            Results with the nodes of the original energy system as keys
+            and sequences indexed by the original time index
+
+        """
+        if self.representatives is None:
+            raise ValueError("The energy system has not been aggregated yet.")
+        nodes = {str(n): n for n in self.es.nodes}
+        rows = (self.assignment[:, None] * self.period_length +
+                np.arange(self.period_length)).ravel()
+
+        def _original(n):
+            return None if n is None else nodes[str(n)]
+
+        disaggregated = {}
+        for (o, i), values in results.items():
+            sequences = values['sequences'].iloc[rows]
+            sequences.index = self.es.timeindex
+            disaggregated[_original(o), _original(i)] = {
+                'scalars': values['scalars'], 'sequences': sequences}
+        return disaggregated
+
+
+def _time_series(value):
+    """Returns the values of a time dependent attribute or None"""
+    default = getattr(value, 'default', value)
+    if default is None or np.ndim(default) == 0:
+        return None
+    return default
+
+
+def _kmeans(features, k, rng, max_iter):
+    """k-means clustering, returns the periods closest to the centres and
+    the cluster of all periods"""
+    centres = features[_kmeans_plus_plus(features, k, rng)]
+    assignment = None
+    for _ in range(max_iter):
+        new_assignment = _squared_distances(features, centres).argmin(axis=1)
+        if assignment is not None and (new_assignment == assignment).all():
+            break
+        assignment = new_assignment
+        for c in range(k):
+            if (assignment == c).any():
+                centres[c] = features[assignment == c].mean(axis=0)
+
+    medoids = _squared_distances(features, centres).argmin(axis=0)
+    # periods closest to the centres may coincide for empty clusters
+    medoids = np.unique(medoids)
+    if len(medoids) < k:
+        others = np.setdiff1d(np.arange(len(features)), medoids)
+        medoids = np.concatenate([medoids, rng.choice(others, k - len(medoids), replace=False)])
+    return medoids, _assign(features, medoids)
+
+
+def _kmedoids(features, k, rng, max_iter):
+    """k-medoids clustering by alternating assignment and medoid update,
+    returns the medoids and the cluster of all periods"""
+    distances = _squared_distances(features, features)
+    medoids = _kmeans_plus_plus(features, k, rng)
+    for _ in range(max_iter):
+        assignment = _nearest(distances[:, medoids], medoids)
+        new_medoids = medoids.copy()
+        for c in range(k):
+            # clusters are never empty, they hold at least their medoid
+            members = np.flatnonzero(assignment == c)
+            new_medoids[c] = members[distances[np.ix_(members, members)].sum(axis=1).argmin()]
+        if (new_medoids == medoids).all():
+            break
+        medoids = new_medoids
+    return medoids, _nearest(distances[:, medoids], medoids)
+
+
+def _kmeans_plus_plus(features, k, rng):
+    """Returns `k` distinct initial periods drawn by k-means++"""
+    chosen = [rng.randint(len(features))]
+    for _ in range(1, k):
+        distances = _squared_distances(features, features[chosen]).min(axis=1)
+        distances[chosen] = 0
+        if distances.sum() > 0:
+            chosen.append(rng.choice(len(features), p=distances / distances.sum()))
+        else:
+            chosen.append(rng.choice(np.setdiff1d(np.arange(len(features)), chosen)))
+    return np.array(chosen)
+
+
+def _assign(features, medoids):
+    """Returns the cluster of all periods for the given medoids"""
+    return _nearest(_squared_distances(features, features[medoids]), medoids)
+
+
+def _nearest(distances, medoids):
+    """Returns the closest medoid of all periods from their distances to
+    the medoids
+
+    Every medoid is assigned to its own cluster, also if it coincides
+    with another medoid, so no cluster is empty.
+    """
+    assignment = distances.argmin(axis=1)
+    assignment[medoids] = np.arange(len(medoids))
+    return assignment
+
+
+def _squared_distances(a, b):
+    """Returns the squared euclidean distances between the rows of `a`
+    and `b` as ||a||^2 + ||b||^2 - 2ab without a three-dimensional
+    intermediate"""
+    distances = ((a ** 2).sum(axis=1)[:, None] + (b ** 2).sum(axis=1)[None, :]
+                 - 2 * a.dot(b.T))
+    return np.maximum(distances, 0)
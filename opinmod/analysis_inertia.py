@@ -0,0 +1,213 @@
+## Copyright 2021 Henning Thiesen
+
+## OpInMod is released under the open source MIT License, see
+## https://github.com/hnnngt/OpInMod/blob/main/LICENSE
+
+"""Vectorised frequency stability evaluation of OpInMod results.
+
+The commitment and the moment of inertia of all inertia sources are
+taken from solved models as dense arrays of shape `(sources, timesteps)`
+and stacked along a leading scenario axis. Inertia, kinetic energy, the
+rate of change of frequency (RoCoF) and the frequency nadir after loss
+of infeed events are then evaluated for all scenarios, contingencies and
+timesteps at once::
+
+    arrays = stack([inertia_arrays(m) for m in models])
+    indicators = evaluate(arrays, contingencies=[500, 1000], rocof_limit=1)
+    indicators['rocof_violation'].any(axis=(1, 2))
+
+With :math:`E_{kin} = \\frac{1}{2} J (2 \\pi f_0)^2` the RoCoF of a loss
+of infeed :math:`\\Delta P` is :math:`\\Delta P f_0 / (2 E_{kin})` and the
+nadir of a primary response :math:`R` delivered linearly within
+:math:`T_d` is :math:`f_0 \\Delta P^2 T_d / (4 E_{kin} R)` below
+:math:`f_0`.
+
+"""
+
+from opinmod.plumbing_inertia import sequence_to_array
+
+import numpy as np
+
+import math
+
+
+SYNCHRONOUS = ('synchronous_generator', 'synchronous_storage')
+
+
+def inertia_arrays(om, results=None):
+    """Returns the inertia of the sources of a solved model as arrays
+
+    Parameters
+    ----------
+    om : opinmod.Model
+        Solved model
+    results : dict, optional
+        Results of `om` as returned by :meth:`opinmod.Model.results`
+
+    Returns
+    -------
+    dict
+        `commitment` and `moment_of_inertia` of shape `(sources,
+        timesteps)`, `synchronous` (whether a source provides
+        synchronous inertia), `sources` (their keys `(source, target)`)
+        and `nominal_grid_frequency`
+
+    """
+    if results is None:
+        results = om.results()
+    n = len(om.TIMESTEPS)
+    sources = list(om.sources_inertia)
+    commitment = np.zeros((len(sources), n))
+    moment_of_inertia = np.zeros((len(sources), n))
+    for k, (o, i) in enumerate(sources):
+        commitment[k] = results[o, i]['sequences']['source_inertia'].values[:n]
+        moment_of_inertia[k] = sequence_to_array(om.sources_inertia[o, i].moment_of_inertia, n)
+    return {'commitment': commitment, 'moment_of_inertia': moment_of_inertia,
+            'synchronous': np.array([om.sources_inertia[e].provision_type in SYNCHRONOUS
+                                     for e in sources], dtype=bool),
+            'sources': sources,
+            'nominal_grid_frequency': om.es.nominal_grid_frequency}
+
+
+def largest_infeed(om, results=None):
+    """Returns the largest feed-in of a synchronous generator in every
+    timestep, e.g. as contingency
+
+    Parameters
+    ----------
+    om : opinmod.Model
+        Solved model
+    results : dict, optional
+        Results of `om` as returned by :meth:`opinmod.Model.results`
+
+    Returns
+    -------
+    array
+        Largest feed-in of shape `(timesteps,)`
+
+    """
+    if results is None:
+        results = om.results()
+    n = len(om.TIMESTEPS)
+    infeed = np.zeros(n)
+    for (o, i) in om.SYNCHRONOUS_GENERATORS:
+        infeed = np.maximum(
+            infeed, results[om.outflows[o][-1]]['sequences']['flow'].values[:n])
+    return infeed
+
+
+def stack(arrays):
+    """Stacks the arrays of several runs along a leading scenario axis
+
+    All runs must have the same inertia sources in the same order, e.g.
+    runs of the same energy system with different parameters.
+
+    Parameters
+    ----------
+    arrays : list of dict
+        Arrays as returned by :func:`inertia_arrays`
+
+    Returns
+    -------
+    dict
+        `commitment` and `moment_of_inertia` of shape `(scenarios,
+        sources, timesteps)`, the other entries of the first run
+
+    """
+    if any(a['sources'] != arrays[0]['sources'] for a in arrays[1:]):
+        raise ValueError("All runs must have the same inertia sources.")
+    stacked = dict(arrays[0])
+    for key in ('commitment', 'moment_of_inertia'):
+        stacked[key] = np.stack([a[key] for a in arrays])
+    return stacked
+
+
+def evaluate(arrays, contingencies=(), rocof_limit=None, reserve=None,
+             delivery_time=None, nadir_limit=None, nominal_grid_frequency=None):
+    """Evaluates inertia and frequency stability indicators
+
+    Parameters
+    ----------
+    arrays : dict
+        `commitment` and `moment_of_inertia` of shape `(sources,
+        timesteps)` or `(scenarios, sources, timesteps)` and the mask
+        `synchronous` of shape `(sources,)`, see :func:`inertia_arrays`
+        and :func:`stack`
+    contingencies : list or array
+        Loss of infeed (MW) of every contingency. A list holds one numeric
+        or sequence of shape `(timesteps,)`, e.g. the largest infeed, per
+        contingency. Arrays are of shape `(contingencies,)` or
+        broadcastable to `(scenarios, contingencies, timesteps)`.
+    rocof_limit : numeric, optional
+        Maximum permissible RoCoF (Hz/s)
+    reserve : numeric or array_like, optional
+        Primary response (MW), broadcastable to `(scenarios,
+        contingencies, timesteps)`. Needed for the nadir.
+    delivery_time : numeric, optional
+        Time (s) within which the primary response is fully delivered.
+        Needed for the nadir.
+    nadir_limit : numeric, optional
+        Maximum permissible frequency deviation (Hz) at the nadir
+    nominal_grid_frequency : numeric, optional
+        Defaults to the frequency of `arrays` or 50 Hz
+
+    Returns
+    -------
+    dict
+        `inertia`, `synchronous_inertia` and `kinetic_energy` (MWs) of
+        shape `(scenarios, timesteps)`, `rocof` (Hz/s) and, if `reserve`
+        and `delivery_time` are given, `nadir` (Hz below the nominal
+        frequency) of shape `(scenarios, contingencies, timesteps)`, and
+        the boolean arrays `rocof_violation` and `nadir_violation` if
+        the limits are given. Without a scenario axis in `arrays`, the
+        scenario axis is dropped.
+
+    """
+    commitment = np.asarray(arrays['commitment'], dtype=float)
+    moment_of_inertia = np.asarray(arrays['moment_of_inertia'], dtype=float)
+    single = commitment.ndim == 2
+    if single:
+        commitment, moment_of_inertia = commitment[None], moment_of_inertia[None]
+    synchronous = np.asarray(arrays['synchronous'], dtype=bool)
+
+    f0 = nominal_grid_frequency or arrays.get('nominal_grid_frequency') or 50
+    if f0 <= 0:
+        raise ValueError("The nominal grid frequency has to be above 0.")
+
+    provided = commitment * moment_of_inertia
+    indicators = {'inertia': provided.sum(axis=1),
+                  'synchronous_inertia': provided[:, synchronous].sum(axis=1)}
+    kinetic_energy = 0.5 * indicators['inertia'] * (2 * math.pi * f0) ** 2
+    indicators['kinetic_energy'] = kinetic_energy
+
+    if isinstance(contingencies, (list, tuple)):
+        n = commitment.shape[2]
+        loss = np.array([sequence_to_array(c, n) for c in contingencies]).reshape(-1, n)
+    else:
+        loss = np.asarray(contingencies, dtype=float)
+    if loss.ndim == 1:
+        loss = loss[:, None]
+    if np.any(loss < 0):
+        raise ValueError("The loss of infeed can not be below zero.")
+    energy = kinetic_energy[:, None, :]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rocof = np.where(loss > 0, loss * f0 / (2 * energy), 0)
+        indicators['rocof'] = rocof
+        if reserve is not None and delivery_time is not None:
+            reserve = np.asarray(reserve, dtype=float)
+            if np.any(reserve <= 0):
+                raise ValueError("The primary response has to be above 0.")
+            # the nadir formula only holds if the response covers the loss
+            nadir = np.where(loss > 0, f0 * loss ** 2 * delivery_time / (4 * energy * reserve), 0)
+            indicators['nadir'] = np.where(loss > reserve, np.inf, nadir)
+
+    if rocof_limit is not None:
+        indicators['rocof_violation'] = indicators['rocof'] > rocof_limit
+    if nadir_limit is not None:
+        if 'nadir' not in indicators:
+            raise ValueError("The nadir limit requires the reserve and the delivery time.")
+        indicators['nadir_violation'] = indicators['nadir'] > nadir_limit
+
+    if single:
+        indicators = {key: value[0] for key, value in indicators.items()}
+    return indicators
@@ -0,0 +1,243 @@
+## Copyright 2021 Henning Thiesen
+
+## OpInMod is released under the open source MIT License, see
+## https://github.com/hnnngt/OpInMod/blob/main/LICENSE
+
+"""Batch execution of many OpInMod scenarios on a process pool.
+
+Each scenario is one row of a scenario table. A builder function turns
+the parameters of a row into an `EnergySystem`, which is built, solved
+and processed in its own worker process. Results and a status file per
+scenario are written to a shared store directory.
+
+Example for the command line::
+
+    python -m opinmod.batch_inertia scenarios.csv --builder mymodule:build \
+        --store results --workers 8 --timeout 3600
+
+"""
+
+from opinmod.models_inertia import Model
+
+from oemof.solph import processing
+
+import pyomo.environ as po
+
+import pandas as pd
+
+import argparse
+import importlib
+import json
+import multiprocessing
+import os
+import pickle
+import signal
+import time
+import traceback
+
+
+def load_builder(builder):
+    """Returns the builder function of a 'module:function' string"""
+    if callable(builder):
+        return builder
+    module, _, function = builder.partition(':')
+    return getattr(importlib.import_module(module), function)
+
+
+def load_scenarios(scenarios):
+    """Returns the scenario table as DataFrame indexed by scenario id
+
+    Parameters
+    ----------
+    scenarios : DataFrame or str
+        Scenario table or path of a csv file. The first column of the
+        csv file holds the scenario ids.
+
+    """
+    if isinstance(scenarios, pd.DataFrame):
+        return scenarios
+    return pd.read_csv(scenarios, index_col=0)
+
+
+def load_result(store, scenario_id):
+    """Returns the results of a scenario from the store
+
+    The keys of the results are the labels of the nodes.
+
+    """
+    with open(os.path.join(store, '{0}.pkl'.format(scenario_id)), 'rb') as f:
+        return pickle.load(f)
+
+
+def _write_atomic(path, write, mode='w'):
+    """Writes a file via a temporary file, so readers never see partial files"""
+    tmp = path + '.tmp'
+    with open(tmp, mode) as f:
+        write(f)
+    os.replace(tmp, path)
+
+
+def _write_status(store, scenario_id, status):
+    _write_atomic(os.path.join(store, '{0}.json'.format(scenario_id)),
+                  lambda f: json.dump(status, f, indent=2, default=str))
+
+
+def _run_job(builder, scenario_id, parameters, store, solver, model_kwargs, solve_kwargs):
+    """Builds, solves and processes one scenario in a worker process"""
+    if hasattr(os, 'setsid'):
+        # own process group, so the solver is terminated together with the worker
+        os.setsid()
+    status = {'scenario': scenario_id, 'status': 'running'}
+    try:
+        start = time.time()
+        es = load_builder(builder)(**parameters)
+        model = Model(es, **model_kwargs)
+        status['build_time'] = time.time() - start
+
+        start = time.time()
+        solver_results = model.solve(solver=solver, **solve_kwargs)
+        status['solve_time'] = time.time() - start
+        status['termination_condition'] = str(
+            solver_results['Solver'][0]['Termination condition'])
+        if status['termination_condition'] in ('infeasible', 'unbounded', 'infeasibleOrUnbounded'):
+            status['status'] = status['termination_condition']
+            _write_status(store, scenario_id, status)
+            return
+        status['objective'] = po.value(model.objective, exception=False)
+
+        start = time.time()
+        results = processing.convert_keys_to_strings(model.results())
+        _write_atomic(os.path.join(store, '{0}.pkl'.format(scenario_id)),
+                      lambda f: pickle.dump(results, f), mode='wb')
+        status['results_time'] = time.time() - start
+        status['status'] = 'finished'
+    except Exception:
+        status['status'] = 'failed'
+        status['error'] = traceback.format_exc()
+    _write_status(store, scenario_id, status)
+
+
+def run_batch(scenarios, builder, store, solver='cbc', max_workers=None,
+              timeout=None, model_kwargs=None, solve_kwargs=None, skip_finished=False):
+    """Runs all scenarios of a scenario table on a pool of processes
+
+    Parameters
+    ----------
+    scenarios : DataFrame or str
+        Scenario table, one row per scenario indexed by a scenario id,
+        or path of a csv file with the table
+    builder : callable or str
+        Function (or 'module:function' string) which is called with the
+        parameters of a scenario as keyword arguments and returns an
+        `EnergySystem`
+    store : str
+        Directory of the result store
+    solver : str
+        Solver passed to :meth:`opinmod.Model.solve`
+    max_workers : int, optional
+        Maximum number of concurrent worker processes. Defaults to the
+        number of cpus.
+    timeout : numeric, optional
+        Time limit of a scenario in seconds. Workers exceeding the time
+        limit are terminated.
+    model_kwargs : dict, optional
+        Keyword arguments passed to :class:`opinmod.Model`
+    solve_kwargs : dict, optional
+        Keyword arguments passed to :meth:`opinmod.Model.solve`
+    skip_finished : bool
+        Do not run scenarios which are already finished in the store
+
+    Returns
+    -------
+    DataFrame
+        Status, timings and objective value of all scenarios
+
+    """
+    scenarios = load_scenarios(scenarios)
+    max_workers = max_workers or os.cpu_count()
+    os.makedirs(store, exist_ok=True)
+
+    pending = []
+    for scenario_id, row in zip(scenarios.index, scenarios.to_dict('records')):
+        if skip_finished and _read_status(store, scenario_id).get('status') == 'finished':
+            continue
+        parameters = {k: v for k, v in row.items() if not pd.isna(v)}
+        pending.append((str(scenario_id), parameters))
+    pending.reverse()
+
+    running = {}
+    while pending or running:
+        while pending and len(running) < max_workers:
+            scenario_id, parameters = pending.pop()
+            process = multiprocessing.Process(
+                target=_run_job,
+                args=(builder, scenario_id, parameters, store, solver,
+                      model_kwargs or {}, solve_kwargs or {}))
+            process.start()
+            running[scenario_id] = (process, time.time())
+
+        time.sleep(0.05)
+        for scenario_id, (process, start) in list(running.items()):
+            if not process.is_alive():
+                process.join()
+                if process.exitcode != 0 and _read_status(store, scenario_id).get('status') != 'failed':
+                    _write_status(store, scenario_id, {
+                        'scenario': scenario_id, 'status': 'failed',
+                        'error': 'Worker exited with code {0}'.format(process.exitcode)})
+                del running[scenario_id]
+            elif timeout is not None and time.time() - start > timeout:
+                _terminate(process)
+                _write_status(store, scenario_id, {
+                    'scenario': scenario_id, 'status': 'timeout', 'timeout': timeout})
+                del running[scenario_id]
+
+    return summary(store, scenarios.index)
+
+
+def _terminate(process):
+    """Terminates a worker process and its solver"""
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+    except (AttributeError, OSError):
+        process.terminate()
+    process.join()
+
+
+def _read_status(store, scenario_id):
+    try:
+        with open(os.path.join(store, '{0}.json'.format(scenario_id))) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def summary(store, scenario_ids):
+    """Returns the status of all scenarios in the store as DataFrame"""
+    return pd.DataFrame([dict({'scenario': str(s)}, **_read_status(store, s))
+                         for s in scenario_ids]).set_index('scenario')
+
+
+def main(argv=None):
+    """Command line entry point of the batch runner"""
+    parser = argparse.ArgumentParser(
+        description='Run OpInMod scenarios of a scenario table in parallel.')
+    parser.add_argument('scenarios', help='csv file with one scenario per row')
+    parser.add_argument('--builder', required=True,
+                        help="builder function as 'module:function'")
+    parser.add_argument('--store', required=True, help='directory of the result store')
+    parser.add_argument('--solver', default='cbc')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--timeout', type=float, default=None,
+                        help='time limit of each scenario in seconds')
+    parser.add_argument('--skip-finished', action='store_true')
+    args = parser.parse_args(argv)
+
+    status = run_batch(args.scenarios, args.builder, args.store, solver=args.solver,
+                       max_workers=args.workers, timeout=args.timeout,
+                       skip_finished=args.skip_finished)
+    print(status[['status']].to_string())
+    return 0 if (status['status'] == 'finished').all() else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
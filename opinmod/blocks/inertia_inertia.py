@@ -8,8 +8,13 @@ the objective function for Inertia objects.
 
 """
 
+from opinmod.expressions_inertia import coefficient_matrix, linear_sum
+from opinmod.plumbing_inertia import sequence_to_array
+
 from pyomo.core.base.block import SimpleBlock
 
+import numpy as np
+
 
 class Inertia(SimpleBlock):
     """Inertia block with definitions for standard inertia sources.
@@ -22,6 +27,13 @@ class Inertia(SimpleBlock):
           sources\_inertia(i, o).moment_of_inertia(t) \cdot
           sources\_inertia(i,o).inertia_costs(t)
 
+    The costs are weighted with :attr:`period_weighting` of the model if
+    it is set.
+
+    Clustered units contribute with the number of online units
+    `cluster_commitment` instead of `source_inertia`. The costs of
+    presolved sources are a constant.
+
     """
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -43,15 +55,35 @@ class Inertia(SimpleBlock):
     def _objective_expression(self):
         """ Objective expression for all standard inertia sources with
         costs for inertia.
+
+        The cost coefficients of all sources and timesteps are calculated
+        at once, sources and timesteps without costs are skipped.
         """
         m = self.parent_block()
-
-        inertia_costs = 0
-
-        for i, o in m.SOURCES_INERTIA:
-            for t in m.TIMESTEPS:
-                inertia_costs += (m.source_inertia[i,o,t] *
-                                  m.sources_inertia[i,o].moment_of_inertia[t] *
-                                  m.sources_inertia[i,o].inertia_costs[t])
+        n = len(m.TIMESTEPS)
+        timesteps = list(m.TIMESTEPS)
+
+        weighting = np.ones(n)
+        if m.period_weighting is not None:
+            weighting = sequence_to_array(m.period_weighting, n)
+
+        def _costs(keys):
+            return (coefficient_matrix(keys, lambda e: m.sources_inertia[e].moment_of_inertia, n) *
+                    coefficient_matrix(keys, lambda e: m.sources_inertia[e].inertia_costs, n) *
+                    weighting)
+
+        sources = [e for e in m.COMMITMENT_SOURCES if e not in m.CLUSTERED_SOURCES]
+        clusters = list(m.CLUSTERS)
+
+        # costs of presolved sources with fixed commitment are constant
+        presolved = list(m.PRESOLVED_SOURCES)
+        constant = (_costs(presolved) *
+                    coefficient_matrix(presolved, m.presolved_commitment.get, n)).sum()
+
+        inertia_costs = linear_sum(m.source_inertia, sources, _costs(sources), timesteps,
+                                   constant=constant)
+        if clusters:
+            inertia_costs += linear_sum(
+                m.cluster_commitment, clusters, _costs(clusters), timesteps)
 
         return inertia_costs
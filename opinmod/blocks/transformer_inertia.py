@@ -13,14 +13,73 @@ https://github.com/oemof/oemof-solph
 
 """
 
+from opinmod.plumbing_inertia import sequence_to_array
+
+from oemof.solph.network import Flow
+
 from pyomo.core import BuildAction
 from pyomo.core import Constraint
 from pyomo.core.base.block import SimpleBlock
+from pyomo.core.expr.numeric_expr import LinearExpression
+
+import numpy as np
+
+
+def conversion_relations(n, length):
+    """Returns a non-redundant set of linear relations of the flows of a
+    transformer
+
+    All flows of a transformer are proportional to each other. Instead of
+    relating every input to every output, every input and every further
+    output is related to one reference flow, the first balanced output:
+
+    .. math::
+        flow(k, t) - \\frac{conversion\\_factor(k, t)}
+        {conversion\\_factor(ref, t)} \\cdot flow(ref, t) = 0
+
+    Parameters
+    ----------
+    n : Transformer
+        Transformer node
+    length : int
+        Number of timesteps
+
+    Returns
+    -------
+    list of tuple
+        `(flow, reference, ratio)` with the keys `(source, target)` of the
+        related flow and the reference flow and the ratio of their
+        conversion factors as array. Empty if the transformer has no
+        input or no balanced output.
+
+    """
+    inputs = [(i, n) for i in n.inputs]
+    outputs = [(n, o) for o in n.outputs
+               if isinstance(n.outputs[o], Flow) and o.balanced is True]
+    if not inputs or not outputs:
+        return []
+
+    reference = outputs[0]
+    reference_factor = sequence_to_array(n.conversion_factors[reference[1]], length)
+    if np.any(reference_factor == 0):
+        raise ValueError("The conversion factor of {0} to {1} can not be zero.".format(
+            n.label, reference[1].label))
+
+    relations = []
+    for key in inputs + outputs[1:]:
+        other = key[0] if key[1] is n else key[1]
+        ratio = sequence_to_array(n.conversion_factors[other], length) / reference_factor
+        relations.append((key, reference, ratio))
+    return relations
 
 
 class Transformer(SimpleBlock):
     """Block for the linear relation of nodes with type
 
+    The flows of each transformer are related to one reference flow, see
+    :func:`conversion_relations`. The constraint `relation` is indexed by
+    the related flow and the timestep.
+
     """
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -36,31 +95,22 @@ class Transformer(SimpleBlock):
 
         m = self.parent_block()
 
-        in_flows = {n: [i for i in n.inputs.keys()] for n in group}
-        out_flows = {n: [o for o in n.outputs.keys() if o.balanced is True] for n in group}
+        relations = [r for n in group
+                     for r in conversion_relations(n, len(m.TIMESTEPS))]
 
         self.relation = Constraint(
-            [(n, i, o, t)
-             for t in m.TIMESTEPS
-             for n in group
-             for o in out_flows[n]
-             for i in in_flows[n]], noruleinit=True)
+            [key + (t,) for t in m.TIMESTEPS for key, _, _ in relations],
+            noruleinit=True)
 
         def _input_output_relation(block):
-            for t in m.TIMESTEPS:
-                for n in group:
-                    for o in out_flows[n]:
-                        for i in in_flows[n]:
-                            try:
-                                lhs = (m.flow[i, n, t] /
-                                       n.conversion_factors[i][t])
-                                rhs = (m.flow[n, o, t] /
-                                       n.conversion_factors[o][t])
-                            except ValueError:
-                                raise ValueError(
-                                    "Error in constraint creation",
-                                    "source: {0}, target: {1}".format(
-                                        n.label, o.label))
-                            block.relation.add((n, i, o, t), (lhs == rhs))
+            for key, reference, ratio in relations:
+                for t, ratio_t in zip(m.TIMESTEPS, ratio.tolist()):
+                    coefs, variables = [1], [m.flow[key + (t,)]]
+                    if ratio_t != 0:
+                        coefs.append(-ratio_t)
+                        variables.append(m.flow[reference + (t,)])
+                    lhs = LinearExpression(
+                        constant=0, linear_coefs=coefs, linear_vars=variables)
+                    block.relation.add(key + (t,), (lhs == 0))
 
         self.relation_build = BuildAction(rule=_input_output_relation)
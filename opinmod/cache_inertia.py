@@ -0,0 +1,424 @@
+## Copyright 2021 Henning Thiesen
+
+## OpInMod is released under the open source MIT License, see
+## https://github.com/hnnngt/OpInMod/blob/main/LICENSE
+
+"""Content-addressed on-disk cache of built OpInMod models.
+
+The key of a cache entry is a hash of the energy system definition (all
+nodes and edges with their attributes and time series, the time index
+and the inertia limits), the model keyword arguments, the OpInMod
+version and the cache format version :data:`FORMAT_VERSION`. An entry
+holds the LP file of the built model and a symbol map, which relates
+the LP columns and the fixed variables to the result structure of
+:meth:`opinmod.Model.results`.
+
+On a hit, the model is not built again. :class:`CachedModel` solves the
+cached LP file with the CBC command line solver and rebuilds the results
+from the solution.
+
+Example::
+
+    cache = ModelCache('model_cache', max_bytes=2e9)
+    model = cache.model(es)
+    model.solve(solver='cbc')
+    results = model.results()
+
+"""
+
+import opinmod
+from opinmod.matrix_inertia import run_cbc
+from opinmod.models_inertia import Model
+from opinmod.processing_inertia import add_inertia_sequences
+from opinmod.plumbing_inertia import ArraySequence, sequence_to_array
+
+import oemof.network.network as onn
+from oemof.solph.plumbing import _Sequence
+
+import pyomo.environ as po
+
+import numpy as np
+import pandas as pd
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+
+# version of the LP formulation and the symbol map of cache entries, to be
+# increased with every change of the model formulation
+FORMAT_VERSION = 1
+
+
+def energysystem_hash(es, **model_kwargs):
+    """Returns a hash of the definition of an energy system
+
+    Parameters
+    ----------
+    es : EnergySystem
+        Energy system to be hashed
+    **model_kwargs
+        Keyword arguments of :class:`opinmod.Model`, which are part of
+        the hash
+
+    Returns
+    -------
+    str
+        Hexadecimal SHA-256 digest
+
+    """
+    h = hashlib.sha256()
+    _feed(h, opinmod.__version__)
+    _feed(h, FORMAT_VERSION)
+    _feed(h, {'timeindex': es.timeindex, 'timeincrement': es.timeincrement,
+              'nominal_grid_frequency': es.nominal_grid_frequency,
+              'minimum_system_inertia': es.minimum_system_inertia,
+              'minimum_system_synchronous_inertia': es.minimum_system_synchronous_inertia,
+              'minimum_area_inertia': es.minimum_area_inertia,
+              'minimum_area_synchronous_inertia': es.minimum_area_synchronous_inertia,
+              'emulated_inertia_constant': es.emulated_inertia_constant,
+              'period_weighting': es.period_weighting})
+    for node in sorted(es.nodes, key=str):
+        _feed(h, node, nodes=False)
+        for target in sorted(node.outputs, key=str):
+            _feed(h, str(target))
+            _feed(h, node.outputs[target], nodes=False)
+    _feed(h, model_kwargs)
+    return h.hexdigest()
+
+
+def _feed(h, value, nodes=True, seen=None):
+    """Feeds a canonical representation of `value` into the hash `h`
+
+    Nodes are represented by their label if `nodes` is True.
+    """
+    seen = set() if seen is None else seen
+
+    def _update(tag, data=b''):
+        h.update(tag.encode())
+        h.update(len(data).to_bytes(8, 'little'))
+        h.update(data)
+
+    if value is None or isinstance(value, (bool, int, float, str, np.generic)):
+        _update(type(value).__name__, repr(value).encode())
+    elif nodes and isinstance(value, onn.Node):
+        _update('node', str(value).encode())
+    elif isinstance(value, pd.DatetimeIndex):
+        _update('timeindex', value.asi8.tobytes() + str(value.freqstr).encode())
+    elif isinstance(value, (_Sequence, ArraySequence)):
+        _update('sequence')
+        _feed(h, value.default, seen=seen)
+    elif isinstance(value, (np.ndarray, pd.Series, list, tuple)):
+        try:
+            array = np.asarray(value, dtype=float)
+        except (TypeError, ValueError):
+            _update(type(value).__name__, str(len(value)).encode())
+            for v in value:
+                _feed(h, v, seen=seen)
+        else:
+            _update('array', array.tobytes() + str(array.shape).encode())
+    elif isinstance(value, dict):
+        _update('dict', str(len(value)).encode())
+        for k in sorted(value, key=str):
+            _feed(h, str(k), seen=seen)
+            _feed(h, value[k], seen=seen)
+    else:
+        if id(value) in seen:
+            _update('cycle')
+            return
+        seen.add(id(value))
+        _update('object', '{0}.{1}'.format(
+            type(value).__module__, type(value).__name__).encode())
+        if isinstance(value, onn.Node):
+            _update('label', str(value).encode())
+        attributes = dict(getattr(value, '__dict__', {}))
+        for cls in type(value).__mro__:
+            for attr in getattr(cls, '__slots__', ()):
+                if hasattr(value, attr):
+                    attributes[attr] = getattr(value, attr)
+        _feed(h, {k: v for k, v in attributes.items() if not k.startswith('_')}, seen=seen)
+
+
+class ModelCache(object):
+    """Size-bounded, least recently used cache of built models
+
+    Parameters
+    ----------
+    directory : str
+        Directory of the cache
+    max_bytes : numeric, optional
+        Maximum size of all cache entries. The least recently used entries
+        are evicted if the size is exceeded.
+
+    """
+
+    def __init__(self, directory, max_bytes=None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def model(self, es, **model_kwargs):
+        """Returns a cached model of `es` or builds and caches it
+
+        Parameters
+        ----------
+        es : EnergySystem
+            Energy system of the model
+        **model_kwargs
+            Keyword arguments of :class:`opinmod.Model`
+
+        Returns
+        -------
+        Model or CachedModel
+            The built model on a miss, the cached model on a hit
+
+        """
+        if model_kwargs.get('cluster_units'):
+            raise ValueError("Models with clustered units can not be cached, "
+                             "their results are disaggregated from the Pyomo model.")
+        key = energysystem_hash(es, **model_kwargs)
+        cached = self.get(key, es)
+        if cached is not None:
+            return cached
+        model = Model(es, **model_kwargs)
+        self.put(key, model)
+        return model
+
+    def _path(self, key):
+        return os.path.join(self.directory, key)
+
+    def get(self, key, es):
+        """Returns the cached model of `key` or None"""
+        path = self._path(key)
+        try:
+            with open(os.path.join(path, 'meta.json')) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not _is_current(meta):
+            self.remove(key)
+            return None
+        meta['last_access'] = time.time()
+        _write_json(os.path.join(path, 'meta.json'), meta)
+        return CachedModel(es, path)
+
+    def put(self, key, model):
+        """Writes the LP file and the symbol map of a built model"""
+        tmp = tempfile.mkdtemp(dir=self.directory, prefix='.tmp-')
+        try:
+            filename, symbol_map_id = model.write(
+                os.path.join(tmp, 'model.lp'), io_options={'symbolic_solver_labels': False})
+            symbols = symbol_map(model, model.solutions.symbol_map[symbol_map_id])
+            _write_json(os.path.join(tmp, 'symbols.json'), symbols)
+            size = sum(os.path.getsize(os.path.join(tmp, f)) for f in os.listdir(tmp))
+            _write_json(os.path.join(tmp, 'meta.json'), {
+                'version': opinmod.__version__, 'format': FORMAT_VERSION,
+                'created': time.time(),
+                'last_access': time.time(), 'size': size})
+            if os.path.exists(self._path(key)):
+                shutil.rmtree(self._path(key))
+            os.replace(tmp, self._path(key))
+        finally:
+            if os.path.exists(tmp):
+                shutil.rmtree(tmp)
+        self.evict()
+
+    def remove(self, key):
+        """Removes an entry of the cache"""
+        shutil.rmtree(self._path(key), ignore_errors=True)
+
+    def entries(self):
+        """Returns the metadata of all entries, least recently used first"""
+        entries = []
+        for key in os.listdir(self.directory):
+            try:
+                with open(os.path.join(self._path(key), 'meta.json')) as f:
+                    entries.append(dict(json.load(f), key=key))
+            except (OSError, ValueError):
+                continue
+        return sorted(entries, key=lambda e: e['last_access'])
+
+    def evict(self):
+        """Removes entries of other OpInMod or format versions and the least
+        recently used entries until the cache fits into `max_bytes`"""
+        entries = []
+        for entry in self.entries():
+            if not _is_current(entry):
+                self.remove(entry['key'])
+            else:
+                entries.append(entry)
+        if self.max_bytes is None:
+            return
+        size = sum(e['size'] for e in entries)
+        for entry in entries:
+            if size <= self.max_bytes:
+                break
+            self.remove(entry['key'])
+            size -= entry['size']
+
+    def clear(self):
+        """Removes all entries"""
+        for entry in self.entries():
+            self.remove(entry['key'])
+
+
+def symbol_map(model, symbols):
+    """Returns the relation of LP columns and fixed variables to results
+
+    Parameters
+    ----------
+    model : Model
+        Built model
+    symbols : pyomo.core.expr.symbol_map.SymbolMap
+        Symbol map of the LP file of `model`
+
+    Returns
+    -------
+    dict
+        `columns`: LP column name -> variable, `fixed`: values of fixed
+        variables, `inertia`: inertia constant and apparent power of all
+        inertia sources. Variables are stored as block name, variable
+        name and index with node labels.
+
+    """
+    columns = {}
+    for symbol, var in symbols.bySymbol.items():
+        var = var()
+        if var is not None and isinstance(var.parent_component(), po.Var):
+            entry = _variable(var)
+            if entry is not None:
+                columns[symbol] = entry
+    fixed = []
+    for var in model.component_data_objects(po.Var):
+        if var.fixed and var.value is not None:
+            entry = _variable(var)
+            if entry is not None:
+                fixed.append(entry + [var.value])
+    for (o, i), commitment in model.presolved_commitment.items():
+        fixed.extend(['source_inertia', 'source_inertia', [str(o), str(i), t], float(value)]
+                     for t, value in zip(model.TIMESTEPS, commitment.tolist()))
+    n = len(model.TIMESTEPS)
+    inertia = [[str(o), str(i),
+                sequence_to_array(edge.inertia_constant, n).tolist(),
+                edge.apparent_power]
+               for (o, i), edge in model.sources_inertia.items()]
+    return {'columns': columns, 'fixed': fixed, 'inertia': inertia}
+
+
+def _variable(var):
+    """Returns block name, variable name and index with node labels of a
+    variable or None for variables which are not indexed by nodes"""
+    name = str(var.parent_component())
+    index = var.index()
+    if not isinstance(index, tuple):
+        index = (index,)
+    if not any(isinstance(k, onn.Node) for k in index):
+        return None
+    return [name.split('.')[0], name.split('.')[-1],
+            [str(k) if isinstance(k, onn.Node) else k for k in index]]
+
+
+class CachedModel(object):
+    """Model loaded from a :class:`ModelCache`
+
+    Parameters
+    ----------
+    es : EnergySystem
+        Energy system of the cached model
+    path : str
+        Directory of the cache entry
+
+    Attributes
+    ----------
+    objective_value : float
+        Objective value of the last solve
+
+    """
+
+    def __init__(self, es, path):
+        self.es = es
+        self.path = path
+        self.lp_file = os.path.join(path, 'model.lp')
+        with open(os.path.join(path, 'symbols.json')) as f:
+            self.symbols = json.load(f)
+        self.solution = None
+        self.objective_value = None
+        self.status = None
+
+    def solve(self, solver='cbc', cmdline_options=None, tee=False):
+        """Solves the cached LP file with the CBC command line solver
+
+        Parameters
+        ----------
+        solver : str
+            Only 'cbc' is supported
+        cmdline_options : dict, optional
+            Options passed to cbc as `-key value`
+        tee : bool
+            Print the solver output
+
+        Returns
+        -------
+        str
+            Solver status, e.g. 'Optimal'
+
+        """
+        if solver != 'cbc':
+            raise ValueError("Cached models can only be solved with cbc.")
+        self.status, self.objective_value, solution = run_cbc(
+            self.lp_file, cmdline_options, tee=tee)
+        self.solution = {name: value for name, (value, _) in solution.items()}
+        return self.status
+
+    def results(self):
+        """Returns the results in the structure of :meth:`opinmod.Model.results`"""
+        if self.solution is None:
+            raise ValueError("The cached model has not been solved yet.")
+        nodes = {str(n): n for n in self.es.nodes}
+
+        records = []
+        for symbol, (block, name, index) in self.symbols['columns'].items():
+            if symbol in self.solution:
+                records.append((block, name, index, self.solution[symbol]))
+        records.extend(tuple(entry) for entry in self.symbols['fixed'])
+
+        frames = {}
+        for block, name, index, value in records:
+            index = tuple(nodes[k] if isinstance(k, str) else k for k in index)
+            if all(isinstance(k, onn.Node) for k in index):
+                key, timestep = index, 0
+            else:
+                key, timestep = index[:-1], index[-1]
+            key = key if len(key) > 1 else (key[0], None)
+            frames.setdefault(key, []).append((timestep, name, value))
+
+        results = {}
+        for key in sorted(frames, key=lambda k: tuple(str(n) for n in k)):
+            df = pd.DataFrame(frames[key], columns=['timestep', 'variable_name', 'value'])
+            df = df.pivot(index='timestep', columns='variable_name', values='value')
+            df = df.reindex(range(len(self.es.timeindex)))
+            df.index = self.es.timeindex
+            condition = df.isnull().any()
+            results[key] = {'scalars': df.loc[:, condition].dropna().iloc[0]
+                            if condition.any() else pd.Series(dtype=float),
+                            'sequences': df.loc[:, ~condition]}
+
+        inertia = {(nodes[o], nodes[i]): (inertia_constant, apparent_power)
+                   for o, i, inertia_constant, apparent_power in self.symbols['inertia']}
+        return add_inertia_sequences(results, inertia)
+
+
+def _is_current(meta):
+    """Whether an entry was written by this OpInMod and format version"""
+    return (meta.get('version') == opinmod.__version__
+            and meta.get('format') == FORMAT_VERSION)
+
+
+def _write_json(path, data):
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
@@ -0,0 +1,528 @@
+## Copyright 2021 Henning Thiesen
+
+## OpInMod is released under the open source MIT License, see
+## https://github.com/hnnngt/OpInMod/blob/main/LICENSE
+
+"""Lagrangian decomposition of OpInMod matrix models.
+
+The minimum inertia rows couple the commitment of all inertia sources in
+a timestep and the bus balances couple their dispatch. Both are relaxed
+with one multiplier per row, so the remaining rows (conversion relations
+of transformers, storage balances and the links between flows and the
+provision of inertia) fall apart into independent subproblems, one per
+unit and timestep and one per storage over the whole horizon. The
+subproblems are grouped into chunks which are solved in parallel on a
+process pool with the CBC command line solver. The multipliers are
+updated with a bundle method (boxstep), so the lower bound never
+decreases. A feasible schedule is recovered by a repair heuristic, which
+commits additional inertia sources until the minimum inertia rows hold.
+The dispatch of the repaired commitment falls apart into chunks as well
+and is solved as LP per chunk.
+
+The lower bound is the bound of the convex hulls of the subproblems. The
+commitment of a single unit is almost integral in the LP relaxation
+already, so the bound hardly exceeds the bound of the LP relaxation of
+the full problem; most of the integrality gap stems from the relaxed
+minimum inertia rows. Only the initial multipliers 'lp' solve the LP
+relaxation of the full problem.
+
+The decomposition works on the coefficient matrices of a
+:class:`~opinmod.matrix_inertia.MatrixModel`::
+
+    mm = MatrixModel(es)
+    result = LagrangianDecomposition(mm, max_workers=8).solve(iterations=100)
+    result['x'], result['gap']
+
+It is therefore limited to the energy systems the matrix backend covers:
+buses, sources, sinks, OpInMod transformers and storages without
+investment, connected by flows without investment, nonconvex, integer,
+summed or gradient options. Other systems are rejected by
+:class:`~opinmod.matrix_inertia.MatrixModel` with a NotImplementedError.
+Unit clustering and the presolve of :class:`opinmod.Model` are not
+available.
+
+"""
+
+from opinmod.matrix_inertia import run_cbc, write_mps_file
+
+import numpy as np
+import scipy.sparse as sp
+import scipy.sparse.csgraph as csgraph
+
+from scipy.optimize import linprog
+
+import concurrent.futures
+import os
+import tempfile
+import time
+
+
+# row blocks which are relaxed
+COUPLING_BLOCKS = ('balance', 'min_synchronous_inertia', 'min_inertia',
+                   'min_area_synchronous_inertia', 'min_area_inertia')
+
+# row blocks which are restored by the repair heuristic
+INERTIA_BLOCKS = COUPLING_BLOCKS[1:]
+
+# chunks of the worker processes, set by the initializer of the pool
+_chunks = None
+
+
+class LagrangianDecomposition(object):
+    """Lagrangian decomposition of a matrix model
+
+    Only problems which can be assembled as
+    :class:`~opinmod.matrix_inertia.MatrixModel` can be decomposed, see
+    the module documentation for the covered components.
+
+    Parameters
+    ----------
+    mm : opinmod.matrix_inertia.MatrixModel
+        Model to be decomposed
+    max_workers : int, optional
+        Number of worker processes. Defaults to the number of cpus. With
+        one worker the subproblems are solved in the calling process.
+    chunks : int, optional
+        Number of chunks the subproblems are grouped into, each solved
+        by one call of the solver. Defaults to `max_workers`.
+    bound : numeric, optional
+        Bound of columns without finite bounds in the subproblems, which
+        would be unbounded for some multipliers otherwise. Defaults to
+        ten times the largest finite bound or right hand side.
+    cmdline_options : dict, optional
+        Options passed to cbc as `-key value`
+
+    Attributes
+    ----------
+    coupling : array
+        Relaxed rows of `mm.A`
+    subproblems : int
+        Number of independent subproblems
+
+    """
+
+    def __init__(self, mm, max_workers=None, chunks=None, bound=None, cmdline_options=None):
+        self.mm = mm
+        self.max_workers = max_workers or os.cpu_count()
+        self.cmdline_options = cmdline_options or {}
+
+        coupling = np.zeros(mm.A.shape[0], dtype=bool)
+        for name, (start, stop) in mm.row_blocks.items():
+            if name in COUPLING_BLOCKS:
+                coupling[start:stop] = True
+        self.coupling = np.flatnonzero(coupling)
+        self.local = np.flatnonzero(~coupling)
+        self.A_coupling = mm.A[self.coupling]
+        self.sense = mm.sense[self.coupling]
+        self.rhs = mm.rhs[self.coupling]
+
+        inertia = np.zeros(mm.A.shape[0], dtype=bool)
+        for name, (start, stop) in mm.row_blocks.items():
+            if name in INERTIA_BLOCKS:
+                inertia[start:stop] = True
+        self.A_inertia = mm.A[inertia]
+        self.rhs_inertia = mm.rhs[inertia]
+        self.dispatch = np.flatnonzero(~inertia)
+
+        if bound is None:
+            values = np.concatenate([np.abs(mm.lb), np.abs(mm.ub), np.abs(mm.rhs)])
+            values = values[np.isfinite(values)]
+            bound = 10 * max(values.max() if len(values) else 0, 1)
+        self.lb = np.maximum(mm.lb, -bound)
+        self.ub = np.minimum(mm.ub, bound)
+
+        chunks = chunks or self.max_workers
+        self._split(chunks)
+        # the dispatch of a commitment falls apart into the timesteps of
+        # all units (and the storages over the whole horizon)
+        in_rows, _, self.dispatch_groups = _group_components(mm.A[self.dispatch], chunks)
+        self.dispatch_free = np.flatnonzero(~in_rows)
+
+        # order of magnitude of the multipliers, the largest cost of a
+        # column per unit of its coefficient in the relaxed row
+        A = abs(self.A_coupling).tocsr()
+        A.eliminate_zeros()
+        ratios = sp.csr_matrix((np.abs(mm.c)[A.indices] / A.data, A.indices, A.indptr),
+                               shape=A.shape)
+        self.scale = np.maximum(ratios.max(axis=1).toarray().ravel(), 1)
+
+    def _split(self, chunks):
+        """Finds the independent subproblems and groups them into chunks"""
+        A = self.mm.A[self.local]
+        in_rows, self.subproblems, groups = _group_components(A, chunks)
+        # columns without local rows are solved in closed form
+        self.free = np.flatnonzero(~in_rows)
+        self.chunks = [{
+            'cols': cols, 'A': A[rows][:, cols], 'sense': self.mm.sense[self.local[rows]],
+            'rhs': self.mm.rhs[self.local[rows]], 'lb': self.lb[cols], 'ub': self.ub[cols],
+            'integer': self.mm.integer[cols], 'options': self.cmdline_options}
+            for rows, cols in groups]
+
+    def lagrangian(self, multipliers, executor=None):
+        """Solves the subproblems for the given multipliers
+
+        Parameters
+        ----------
+        multipliers : array
+            One multiplier per relaxed row
+        executor : concurrent.futures.Executor, optional
+            Pool the chunks are solved on, which must have been created
+            with :meth:`executor`. Solved in the calling process if None.
+
+        Returns
+        -------
+        tuple
+            Value of the Lagrangian dual function (a lower bound of the
+            objective), column values and subgradient
+
+        """
+        reduced_costs = self.mm.c - self.A_coupling.T.dot(multipliers)
+        x = np.where(reduced_costs[self.free] < 0, self.ub[self.free], self.lb[self.free])
+        values = np.zeros(self.mm.A.shape[1])
+        values[self.free] = x
+
+        costs = [reduced_costs[chunk['cols']] for chunk in self.chunks]
+        if executor is None:
+            solutions = [_solve_chunk(chunk, c) for chunk, c in zip(self.chunks, costs)]
+        else:
+            solutions = executor.map(_solve_chunk_in_worker, range(len(self.chunks)), costs)
+        for chunk, solution in zip(self.chunks, solutions):
+            values[chunk['cols']] = solution
+
+        dual = float(reduced_costs.dot(values) + multipliers.dot(self.rhs))
+        subgradient = self.rhs - self.A_coupling.dot(values)
+        return dual, values, subgradient
+
+    def executor(self):
+        """Returns a process pool whose workers hold the chunks"""
+        return concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.max_workers, initializer=_init_worker, initargs=(self.chunks,))
+
+    def _project(self, multipliers):
+        """Projects the multipliers onto their domain, >= 0 for 'G' and
+        <= 0 for 'L' rows"""
+        multipliers[self.sense == 'G'] = np.maximum(multipliers[self.sense == 'G'], 0)
+        multipliers[self.sense == 'L'] = np.minimum(multipliers[self.sense == 'L'], 0)
+        return multipliers
+
+    def initial_multipliers(self):
+        """Returns the duals of the relaxed rows in the LP relaxation of
+        the full problem
+
+        Unlike the subproblems this solves one LP of the full problem.
+        """
+        status, _, _, duals = self._solve_lp(self.mm.lb, self.mm.ub)
+        if status != 'Optimal':
+            raise RuntimeError("The LP relaxation could not be solved: {0}".format(status))
+        return self._project(duals[self.coupling])
+
+    def repair(self, x, executor=None):
+        """Returns a feasible solution close to the subproblem solution `x`
+
+        The integer columns are rounded and further inertia sources are
+        committed, the cheapest per moment of inertia first, until all
+        minimum inertia rows hold. The dispatch of this commitment does
+        not depend on the inertia rows anymore, so it falls apart like
+        the subproblems and is solved as LP per chunk. Sources which the
+        dispatch of a chunk partially commits, e.g. to cover the demand,
+        are committed as well and the chunk is solved once more with the
+        final commitment.
+
+        Parameters
+        ----------
+        x : array
+            Column values, e.g. of :meth:`lagrangian`
+        executor : concurrent.futures.Executor, optional
+            Pool the chunks are solved on. Solved in the calling process
+            if None.
+
+        Returns
+        -------
+        tuple
+            Objective value and column values, (None, None) if the
+            dispatch of a chunk is infeasible
+
+        """
+        mm = self.mm
+        integer = np.flatnonzero(mm.integer)
+        commitment = np.clip(np.round(x[integer]), mm.lb[integer], mm.ub[integer])
+        values = np.zeros(mm.A.shape[1])
+        values[integer] = commitment
+
+        A = self.A_inertia.tocsc()
+        activity = self.A_inertia.dot(values)
+        for k in np.flatnonzero(activity < self.rhs_inertia - 1e-9):
+            row = self.A_inertia.getrow(k)
+            candidates = [(mm.c[j] / a, j) for j, a in zip(row.indices, row.data)
+                          if a > 0 and mm.integer[j]]
+            for _, j in sorted(candidates):
+                while values[j] < mm.ub[j] and activity[k] < self.rhs_inertia[k] - 1e-9:
+                    values[j] += 1
+                    column = A.getcol(j)
+                    activity[column.indices] += column.data
+
+        # the commitment is a lower bound of the dispatch
+        lb = mm.lb.copy()
+        lb[integer] = values[integer]
+        free = self.dispatch_free
+        values[free] = np.where(mm.c[free] < 0, self.ub[free], np.maximum(lb[free], self.lb[free]))
+
+        chunks = []
+        for rows, cols in self.dispatch_groups:
+            rows = self.dispatch[rows]
+            chunks.append({
+                'A': mm.A[rows][:, cols], 'c': mm.c[cols], 'sense': mm.sense[rows],
+                'rhs': mm.rhs[rows], 'lb': lb[cols], 'ub': mm.ub[cols],
+                'integer': mm.integer[cols], 'options': self.cmdline_options})
+        if executor is None:
+            solutions = [_solve_dispatch(chunk) for chunk in chunks]
+        else:
+            solutions = executor.map(_solve_dispatch, chunks)
+        for (_, cols), solution in zip(self.dispatch_groups, solutions):
+            if solution is None:
+                return None, None
+            values[cols] = solution
+        return float(mm.c.dot(values)), values
+
+    def _solve_lp(self, lb, ub):
+        """Solves the full problem as LP with the given column bounds and
+        returns the status, the objective value, the column values and
+        the row duals"""
+        mm = self.mm
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = os.path.join(tmp, 'lp.mps')
+            write_mps_file(filename, mm.A, mm.c, mm.sense, mm.rhs, lb, ub,
+                           np.zeros(mm.A.shape[1], dtype=bool), *_names(*mm.A.shape[::-1]))
+            return _run_cbc(filename, mm.A.shape, self.cmdline_options)
+
+    def _master(self, cuts, values, center, box):
+        """Maximises the cutting plane model of the dual function in a box
+        around `center`
+
+        Every evaluated point gives the cut dual <= value + g (m - point),
+        with the subgradient `g`, which holds for all multipliers `m` as
+        the dual function is concave.
+
+        Returns
+        -------
+        tuple
+            Multipliers maximising the model and the value of the model
+        """
+        cuts = np.array(cuts)
+        lb, ub = center - box * self.scale, center + box * self.scale
+        lb[self.sense == 'G'] = np.maximum(lb[self.sense == 'G'], 0)
+        ub[self.sense == 'L'] = np.minimum(ub[self.sense == 'L'], 0)
+        # variables are the multipliers and the value of the model
+        n = len(center)
+        result = linprog(
+            np.append(np.zeros(n), -1), A_ub=np.hstack([-cuts, np.ones((len(cuts), 1))]),
+            b_ub=np.array(values), bounds=list(zip(lb, ub)) + [(None, None)], method='highs')
+        if result.status != 0:
+            raise RuntimeError("The cutting plane model could not be solved: {0}".format(
+                result.message))
+        return self._project(result.x[:n]), -result.fun
+
+    def _at_border(self, multipliers, center, box):
+        """Whether the multipliers reach the border of the box"""
+        return bool(np.any(np.abs(multipliers - center) >= (1 - 1e-6) * box * self.scale))
+
+    def solve(self, iterations=50, box=0.1, tolerance=1e-3, repair_interval=5,
+              multipliers='zero', time_limit=None):
+        """Maximises the dual function with a bundle method and repairs
+        feasible solutions on the way
+
+        The next multipliers maximise the cutting plane model of the dual
+        function, built from the values and subgradients of all
+        iterations, in a box around the best multipliers so far (boxstep
+        method). They replace the centre of the box if the dual function
+        improved by at least a tenth of the predicted improvement,
+        otherwise their cut refines the model. The box is doubled if an
+        improving step reached its border. The solve stops at the
+        maximum of the dual function, i.e. if the model predicts no
+        improvement, which the model bounds from above, unless the box
+        limits the model.
+
+        Parameters
+        ----------
+        iterations : int
+            Maximum number of iterations
+        box : float
+            Initial half width of the box, relative to the largest cost
+            of a column per unit of its coefficient in the relaxed row
+        tolerance : float
+            Relative gap between the bounds, or between the model and the
+            dual function, at which the solve stops
+        repair_interval : int
+            Every how many iterations a feasible solution is repaired
+        multipliers : array or str
+            Initial multipliers, one per relaxed row, 'zero' or 'lp' for
+            the duals of the LP relaxation of the full problem
+        time_limit : numeric, optional
+            Time limit in seconds
+
+        Returns
+        -------
+        dict
+            `lower_bound`, `upper_bound`, `gap`, `iterations`, `x` (column
+            values of the best feasible solution), `multipliers` and
+            `history` (bounds and box size of each iteration)
+
+        """
+        start = time.time()
+        if isinstance(multipliers, str):
+            if multipliers == 'lp':
+                multipliers = self.initial_multipliers()
+            elif multipliers == 'zero':
+                multipliers = np.zeros(len(self.coupling))
+            else:
+                raise ValueError("Unknown initial multipliers '{0}'".format(multipliers))
+        multipliers = self._project(np.array(multipliers, dtype=float))
+
+        lower, upper = -np.inf, np.inf
+        best_multipliers, best_x, history = multipliers, None, []
+        center, center_value, predicted = None, -np.inf, np.inf
+        cuts, values = [], []
+        executor = self.executor() if self.max_workers > 1 and len(self.chunks) > 1 else None
+        try:
+            for iteration in range(iterations):
+                dual, x, subgradient = self.lagrangian(multipliers, executor)
+                cuts.append(subgradient)
+                values.append(dual - subgradient.dot(multipliers))
+                if dual > lower:
+                    lower, best_multipliers = dual, multipliers.copy()
+                if center is None or dual >= center_value + 0.1 * (predicted - center_value):
+                    if center is not None and self._at_border(multipliers, center, box):
+                        box *= 2
+                    center, center_value = multipliers, dual
+
+                if iteration % repair_interval == 0 or iteration == iterations - 1:
+                    objective, solution = self.repair(x, executor)
+                    if objective is not None and objective < upper:
+                        upper, best_x = objective, solution
+
+                gap = (upper - lower) / max(abs(upper), 1e-10)
+                history.append({'iteration': iteration, 'lower_bound': dual,
+                                'upper_bound': upper, 'box': box})
+                if gap <= tolerance or (time_limit is not None and time.time() - start > time_limit):
+                    break
+
+                multipliers, predicted = self._master(cuts, values, center, box)
+                if predicted - center_value <= tolerance * max(abs(center_value), 1):
+                    if not self._at_border(multipliers, center, box):
+                        # the model bounds the dual function from above
+                        break
+                    box *= 2
+                    multipliers, predicted = self._master(cuts, values, center, box)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        return {'lower_bound': lower, 'upper_bound': upper,
+                'gap': (upper - lower) / max(abs(upper), 1e-10),
+                'iterations': len(history), 'x': best_x,
+                'multipliers': best_multipliers, 'history': history}
+
+
+def _group_components(A, chunks):
+    """Groups the connected components of the rows and columns of `A`
+    into at most `chunks` chunks with a similar number of columns
+
+    Returns
+    -------
+    tuple
+        Mask of the columns with nonzeros in `A`, the number of
+        components and the rows and columns of each chunk
+    """
+    n_rows, n_cols = A.shape
+    # bipartite graph of the rows and the columns
+    pattern = sp.csr_matrix((np.ones(A.nnz), A.indices, A.indptr), shape=A.shape)
+    graph = sp.bmat([[None, pattern], [pattern.T, None]], format='csr')
+    count, component = csgraph.connected_components(graph, directed=False)
+    row_component, col_component = component[:n_rows], component[n_rows:]
+
+    in_rows = np.zeros(n_cols, dtype=bool)
+    in_rows[A.indices] = True
+    components = np.unique(col_component[in_rows])
+
+    # balance the number of columns of the chunks
+    sizes = np.bincount(col_component[in_rows], minlength=count)
+    assignment = np.full(count, -1)
+    load = np.zeros(max(min(chunks, len(components)), 1))
+    for k in components[np.argsort(-sizes[components], kind='stable')]:
+        assignment[k] = np.argmin(load)
+        load[assignment[k]] += sizes[k]
+
+    groups = []
+    for k in range(len(load)):
+        cols = np.flatnonzero(in_rows & (assignment[col_component] == k))
+        rows = np.flatnonzero(assignment[row_component] == k)
+        if len(cols):
+            groups.append((rows, cols))
+    return in_rows, len(components), groups
+
+
+def _names(n_cols, n_rows):
+    """Returns enumerated column and row names"""
+    return (['x{0}'.format(j) for j in range(n_cols)],
+            ['c{0}'.format(k) for k in range(n_rows)])
+
+
+def _run_cbc(filename, shape, options):
+    """Solves an MPS file with enumerated names with the CBC command line
+
+    Returns the status, the objective value, the column values and the
+    row duals.
+    """
+    status, objective, solution = run_cbc(filename, options)
+    values, duals = np.zeros(shape[1]), np.zeros(shape[0])
+    for name, (value, dual) in solution.items():
+        if name[0] == 'x':
+            values[int(name[1:])] = value
+        else:
+            duals[int(name[1:])] = dual
+    return status, objective, values, duals
+
+
+def _solve_chunk(chunk, costs):
+    """Solves the subproblems of a chunk for the given objective"""
+    n_rows, n_cols = chunk['A'].shape
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = os.path.join(tmp, 'chunk.mps')
+        write_mps_file(filename, chunk['A'], costs, chunk['sense'], chunk['rhs'],
+                       chunk['lb'], chunk['ub'], chunk['integer'], *_names(n_cols, n_rows))
+        status, _, values, _ = _run_cbc(filename, (n_rows, n_cols), chunk['options'])
+    if status != 'Optimal':
+        raise RuntimeError("A subproblem could not be solved: {0}".format(status))
+    return values
+
+
+def _solve_dispatch(chunk):
+    """Solves the dispatch of a chunk as LP with the commitment as lower
+    bound and once more if sources are partially committed, returns the
+    column values or None if infeasible"""
+    n_rows, n_cols = chunk['A'].shape
+    integer = chunk['integer']
+    lb, ub = chunk['lb'].copy(), chunk['ub'].copy()
+    for _ in range(2):
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = os.path.join(tmp, 'dispatch.mps')
+            write_mps_file(filename, chunk['A'], chunk['c'], chunk['sense'], chunk['rhs'],
+                           lb, ub, np.zeros(n_cols, dtype=bool), *_names(n_cols, n_rows))
+            status, _, values, _ = _run_cbc(filename, (n_rows, n_cols), chunk['options'])
+        if status != 'Optimal':
+            return None
+        commitment = np.maximum(np.ceil(values[integer] - 1e-6), lb[integer])
+        if (commitment <= lb[integer]).all():
+            values[integer] = lb[integer]
+            return values
+        lb[integer] = ub[integer] = commitment
+    return None
+
+
+def _init_worker(chunks):
+    global _chunks
+    _chunks = chunks
+
+
+def _solve_chunk_in_worker(k, costs):
+    return _solve_chunk(_chunks[k], costs)
@@ -0,0 +1,281 @@
+## Copyright 2021 Henning Thiesen
+
+## OpInMod is released under the open source MIT License, see
+## https://github.com/hnnngt/OpInMod/blob/main/LICENSE
+
+"""Columnar export and lazy import of OpInMod results.
+
+The results of a solved model are written as one long table per result
+class:
+
+* `flows`: flow values of all flows
+* `inertia`: area, commitment, inertia constant, apparent power and moment
+  of inertia of all inertia sources
+* `nodes`: sequences of nodes, e.g. storage contents
+* `system`: total (synchronous) inertia of the system and its limits
+
+Node labels are stored as categorical columns. Parquet and Arrow IPC
+files are written with `pyarrow`, HDF5 files with `pandas` (`tables`).
+Both are optional dependencies which are only imported when needed.
+
+"""
+
+from opinmod.plumbing_inertia import sequence_to_array
+
+import numpy as np
+import pandas as pd
+
+import os
+
+
+TABLES = ('flows', 'inertia', 'nodes', 'system')
+
+FORMATS = {'parquet': '.parquet', 'arrow': '.arrow', 'hdf5': '.h5'}
+
+SYNCHRONOUS = ('synchronous_generator', 'synchronous_storage')
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.dataset
+        import pyarrow.fs
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("The parquet and arrow formats require pyarrow, "
+                          "install it with 'pip install pyarrow'.")
+    return pyarrow
+
+
+def result_tables(om, results=None):
+    """Returns the results of a solved model as long tables
+
+    Parameters
+    ----------
+    om : opinmod.Model
+        Solved model
+    results : dict, optional
+        Results of `om` as returned by :meth:`opinmod.Model.results`.
+        Calculated if not given.
+
+    Returns
+    -------
+    dict of DataFrames
+        One table per result class, see :data:`TABLES`
+
+    """
+    if results is None:
+        results = om.results()
+    n = len(om.TIMESTEPS)
+    timestep = np.arange(n, dtype=np.int32)
+    time = om.es.timeindex[:n] if om.es.timeindex is not None else None
+    labels = pd.CategoricalDtype(sorted({str(node) for node in om.es.nodes}))
+
+    def _frame(columns, blocks):
+        count = len(blocks)
+        frame = pd.DataFrame({
+            name: pd.Categorical(np.repeat([b[k] for b in blocks], n), dtype=labels)
+            for k, name in enumerate(columns)})
+        frame['timestep'] = np.tile(timestep, count)
+        if time is not None:
+            frame['time'] = np.tile(time.values, count)
+        return frame
+
+    flows, inertia, nodes = [], [], []
+    for (o, i), values in results.items():
+        sequences = values['sequences']
+        if i is None:
+            nodes.extend((str(o), column, sequences[column].values)
+                         for column in sequences.columns)
+        elif (o, i) in om.sources_inertia:
+            inertia.append((str(o), str(i), om.sources_inertia[o, i], sequences))
+        elif 'flow' in sequences:
+            flows.append((str(o), str(i), sequences['flow'].values))
+
+    tables = {}
+
+    tables['flows'] = _frame(('source', 'target'), flows)
+    tables['flows']['flow'] = np.concatenate([f[2] for f in flows]) if flows else []
+
+    tables['inertia'] = _frame(('source', 'target'), inertia)
+    tables['inertia']['provision_type'] = pd.Categorical(
+        np.repeat([edge.provision_type for _, _, edge, _ in inertia], n))
+    tables['inertia']['area'] = pd.Categorical(
+        np.repeat([None if edge.area is None else str(edge.area)
+                   for _, _, edge, _ in inertia], n))
+    for column in ('source_inertia', 'inertia_constant', 'apparent_power'):
+        tables['inertia'][column] = np.concatenate(
+            [s[column].values for _, _, _, s in inertia]) if inertia else []
+    moment_of_inertia = [sequence_to_array(edge.moment_of_inertia, n) for _, _, edge, _ in inertia]
+    tables['inertia']['moment_of_inertia'] = np.concatenate(moment_of_inertia) if inertia else []
+
+    tables['nodes'] = _frame(('node',), nodes)
+    tables['nodes']['variable'] = pd.Categorical(np.repeat([v[1] for v in nodes], n))
+    tables['nodes']['value'] = np.concatenate([v[2] for v in nodes]) if nodes else []
+
+    contribution = np.array([s['source_inertia'].values * mi for (_, _, _, s), mi
+                             in zip(inertia, moment_of_inertia)]).reshape(-1, n)
+    synchronous = np.array([edge.provision_type in SYNCHRONOUS for _, _, edge, _ in inertia],
+                           dtype=bool)
+    system = pd.DataFrame({'timestep': timestep})
+    if time is not None:
+        system['time'] = time.values
+    system['inertia'] = contribution.sum(axis=0)
+    system['synchronous_inertia'] = contribution[synchronous].sum(axis=0)
+    system['minimum_inertia'] = sequence_to_array(om.es.minimum_system_inertia, n)
+    system['minimum_synchronous_inertia'] = sequence_to_array(
+        om.es.minimum_system_synchronous_inertia, n)
+    tables['system'] = system
+
+    return tables
+
+
+def export_results(om, path, file_format='parquet', results=None):
+    """Writes the results of a solved model as columnar dataset
+
+    Parameters
+    ----------
+    om : opinmod.Model
+        Solved model
+    path : str
+        Directory of the dataset ('parquet', 'arrow') or name of the file
+        ('hdf5')
+    file_format : str
+        'parquet', 'arrow' (Arrow IPC, memory-mappable) or 'hdf5'
+    results : dict, optional
+        Results of `om` as returned by :meth:`opinmod.Model.results`
+
+    Returns
+    -------
+    ResultStore
+        Lazy reader of the written dataset
+
+    """
+    if file_format not in FORMATS:
+        raise ValueError("Unknown file format '{0}', use one of {1}.".format(
+            file_format, ', '.join(FORMATS)))
+    tables = result_tables(om, results)
+
+    if file_format == 'hdf5':
+        with pd.HDFStore(path, mode='w') as store:
+            for name, table in tables.items():
+                store.put(name, table, format='table',
+                          data_columns=[c for c in table.columns if c not in
+                                        ('flow', 'value')])
+        return ResultStore(path, file_format)
+
+    pa = _pyarrow()
+    os.makedirs(path, exist_ok=True)
+    for name, table in tables.items():
+        table = pa.Table.from_pandas(table, preserve_index=False)
+        filename = os.path.join(path, name + FORMATS[file_format])
+        if file_format == 'parquet':
+            pa.parquet.write_table(table, filename)
+        else:
+            with pa.OSFile(filename, 'wb') as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+    return ResultStore(path, file_format)
+
+
+class ResultStore(object):
+    """Lazy reader of results written by :func:`export_results`
+
+    Nothing is read on construction. :meth:`read` only loads the
+    requested columns and rows. Arrow IPC files are memory-mapped.
+
+    Parameters
+    ----------
+    path : str
+        Directory of the dataset or name of the HDF5 file
+    file_format : str, optional
+        'parquet', 'arrow' or 'hdf5'. Derived from `path` if not given.
+
+    Examples
+    --------
+    >>> store = ResultStore('results')  # doctest: +SKIP
+    >>> store.read('inertia', source='gen0', timesteps=range(24))  # doctest: +SKIP
+
+    """
+
+    def __init__(self, path, file_format=None):
+        if file_format is None:
+            if os.path.isfile(path):
+                file_format = 'hdf5'
+            else:
+                file_format = next(
+                    (f for f, ext in FORMATS.items()
+                     if os.path.exists(os.path.join(path, 'flows' + ext))), None)
+        if file_format not in FORMATS:
+            raise ValueError("No OpInMod result dataset found at '{0}'.".format(path))
+        self.path = path
+        self.file_format = file_format
+        self._datasets = {}
+
+    @property
+    def tables(self):
+        """Names of the result tables"""
+        return TABLES
+
+    def _dataset(self, table):
+        if table not in self._datasets:
+            pa = _pyarrow()
+            self._datasets[table] = pa.dataset.dataset(
+                os.path.join(self.path, table + FORMATS[self.file_format]),
+                format='ipc' if self.file_format == 'arrow' else 'parquet',
+                filesystem=pa.fs.LocalFileSystem(use_mmap=True))
+        return self._datasets[table]
+
+    def columns(self, table):
+        """Returns the column names of a table"""
+        if table not in TABLES:
+            raise ValueError("Unknown result table '{0}'".format(table))
+        if self.file_format == 'hdf5':
+            with pd.HDFStore(self.path, mode='r') as store:
+                return list(store.select(table, stop=0).columns)
+        return self._dataset(table).schema.names
+
+    def read(self, table, columns=None, timesteps=None, **labels):
+        """Reads (parts of) a result table
+
+        Parameters
+        ----------
+        table : str
+            Name of the table, see :attr:`tables`
+        columns : list, optional
+            Columns to read, all columns if not given
+        timesteps : iterable, optional
+            Timesteps (positions) to read, all timesteps if not given
+        **labels
+            Filters on label columns, e.g. `source='gen0'` or
+            `node=['storage']`
+
+        Returns
+        -------
+        DataFrame
+
+        """
+        if table not in TABLES:
+            raise ValueError("Unknown result table '{0}'".format(table))
+        filters = [(column, _as_list(value)) for column, value in labels.items()]
+        if timesteps is not None:
+            filters.append(('timestep', [int(t) for t in timesteps]))
+
+        if self.file_format == 'hdf5':
+            where = ['{0} in {1!r}'.format(column, values) for column, values in filters]
+            with pd.HDFStore(self.path, mode='r') as store:
+                return store.select(table, where=where or None, columns=columns)
+
+        pa = _pyarrow()
+        expression = None
+        for column, values in filters:
+            condition = pa.dataset.field(column).isin(values)
+            expression = condition if expression is None else expression & condition
+        return self._dataset(table).to_table(
+            columns=columns, filter=expression).to_pandas()
+
+
+def _as_list(value):
+    if isinstance(value, (str, bytes)) or np.ndim(value) == 0:
+        return [value]
+    return list(value)
@@ -0,0 +1,106 @@
+## Copyright 2021 Henning Thiesen
+
+## OpInMod is released under the open source MIT License, see
+## https://github.com/hnnngt/OpInMod/blob/main/LICENSE
+
+"""Bulk generation of linear expressions from coefficient arrays.
+
+The coefficients of a sum over inertia sources and timesteps are
+collected once as a `(sources, timesteps)` array. Only the nonzero
+entries are turned into terms of Pyomo `LinearExpression` objects, so
+building the expressions is linear in the number of nonzeros and no
+nested sum expressions are created.
+
+"""
+
+from opinmod.plumbing_inertia import sequence_to_array
+
+from pyomo.core.expr.numeric_expr import LinearExpression
+
+import numpy as np
+
+
+def coefficient_matrix(keys, values, length):
+    """Returns the time dependent values of several sources as array
+
+    Parameters
+    ----------
+    keys : list
+        Keys of the sources, e.g. `(source, target)` of inertia sources
+    values : callable
+        Returns the time dependent value (sequence, iterable or numeric)
+        of a key
+    length : int
+        Number of timesteps
+
+    Returns
+    -------
+    array
+        One row per key and one column per timestep
+
+    """
+    matrix = np.zeros((len(keys), length))
+    for row, key in enumerate(keys):
+        matrix[row] = sequence_to_array(values(key), length)
+    return matrix
+
+
+def linear_sum(var, keys, coefficients, timesteps, constant=0):
+    """Returns the sum of `coefficients * var` over all keys and timesteps
+
+    Parameters
+    ----------
+    var : pyomo.Var
+        Variable indexed by `key + (t,)`
+    keys : list of tuple
+        Keys of the rows of `coefficients`
+    coefficients : array
+        One row per key and one column per timestep. Zero entries are
+        skipped.
+    timesteps : list
+        Timesteps of the columns of `coefficients`
+    constant : numeric
+        Constant of the expression
+
+    Returns
+    -------
+    LinearExpression
+
+    """
+    rows, columns = np.nonzero(coefficients)
+    return LinearExpression(
+        constant=float(constant), linear_coefs=coefficients[rows, columns].tolist(),
+        linear_vars=[var[keys[r] + (timesteps[c],)]
+                     for r, c in zip(rows.tolist(), columns.tolist())])
+
+
+def linear_sums_by_timestep(var, keys, coefficients, timesteps, constants=None):
+    """Returns the sum of `coefficients * var` over all keys for every
+    timestep
+
+    Parameters are the same as for :func:`linear_sum`, `constants` holds
+    the constant of every timestep. The LP writer moves the constants to
+    the right hand side.
+
+    Returns
+    -------
+    dict
+        One `LinearExpression` per timestep. Timesteps without nonzero
+        coefficient get an empty expression.
+
+    """
+    # column-major order groups the nonzeros by timestep
+    columns, rows = np.nonzero(coefficients.T)
+    starts = np.searchsorted(columns, np.arange(len(timesteps) + 1))
+    values = coefficients[rows, columns].tolist()
+    rows = rows.tolist()
+    if constants is None:
+        constants = np.zeros(len(timesteps))
+    constants = constants.tolist()
+    sums = {}
+    for c, t in enumerate(timesteps):
+        terms = range(starts[c], starts[c + 1])
+        sums[t] = LinearExpression(
+            constant=constants[c], linear_coefs=[values[k] for k in terms],
+            linear_vars=[var[keys[rows[k]] + (t,)] for k in terms])
+    return sums
@@ -9,16 +9,18 @@ Groupings needed on an energy system for it to work with OpInMod.
 
 """
 from opinmod.blocks import inertia_inertia
+from opinmod.network.inertia_inertia import Inertia
 
 import oemof.network.groupings as ong
 import oemof.solph.blocks as osb
+import oemof.solph.network as osn
 from oemof.solph.groupings import investment_flow_grouping, nonconvex_flow_grouping, constraint_grouping
 
 def _inertia_grouping(stf):
     """Grouping function for class inertia.
 
     """
-    if hasattr(stf[2], 'inertia_constant'):
+    if isinstance(stf[2], Inertia):
         return True
     else:
         return False
@@ -31,7 +33,7 @@ def _flow_grouping(stf):
     """Grouping function for class flow.
 
     """
-    if hasattr(stf[2], 'nominal_value'):
+    if isinstance(stf[2], osn.Flow):
         return True
     else:
         return False
@@ -0,0 +1,591 @@
+## Copyright 2021 Henning Thiesen
+
+## OpInMod is released under the open source MIT License, see
+## https://github.com/hnnngt/OpInMod/blob/main/LICENSE
+
+"""Matrix based assembly of OpInMod optimisation problems.
+
+The rows of the problem are emitted as scipy.sparse coefficient blocks
+instead of Pyomo expressions and can be written directly to MPS or LP
+files. The matrix backend covers buses, sources, sinks, OpInMod
+transformers, storages without investment and standard flows together
+with all inertia constraints.
+
+"""
+
+from collections import OrderedDict
+import math
+import os
+import re
+import subprocess
+import tempfile
+
+from opinmod.blocks.transformer_inertia import conversion_relations
+from opinmod.network.transformer_inertia import Transformer
+from opinmod.plumbing_inertia import flow_bounds, sequence_to_array
+from opinmod.wind_inertia import calc_inertia_wind_profile
+
+import oemof.solph.network as osn
+from oemof.solph.components.generic_storage import GenericStorage
+
+import numpy as np
+import scipy.sparse as sp
+
+
+class MatrixModel(object):
+    """An energy system model assembled as sparse coefficient matrices.
+
+    The column and row layout corresponds to :class:`opinmod.Model`: one
+    column per flow and timestep, one binary column per inertia source
+    and timestep, one column per storage and timestep for its content
+    and one row per constraint and timestep.
+
+    Parameters
+    ----------
+    energysystem : EnergySystem object
+        Object that holds the nodes of an OpInMod energy system graph
+    timeincrement : numeric or sequence, optional
+        Time increment of the timesteps. Defaults to the frequency of the
+        time index of the energy system.
+    period_weighting : sequence, optional
+        Number of periods each timestep represents, e.g. the weights of
+        typical periods. Defaults to `energysystem.period_weighting`. If
+        set, the costs of flows and inertia are weighted with it.
+    objective_weighting : numeric or sequence, optional
+        Weighting of the variable costs. Defaults to the time increment
+        times the period weighting.
+
+    Attributes
+    ----------
+    flow : dict
+        Index of the first column of each flow. Index: `(source, target)`
+    source_inertia : dict
+        Index of the first column of each inertia source.
+        Index: `(source, target)`
+    storage_content : dict
+        Index of the first column of the content of each storage.
+        Index: `storage`
+    moment_of_inertia : dict
+        Moment of inertia of each inertia source as array
+    blocks : dict
+        Coefficient matrix of each row block as scipy.sparse matrix with
+        all columns of the problem
+    row_blocks : dict
+        First and last row of each row block in :attr:`A`
+    A : scipy.sparse.csr_matrix
+        Coefficient matrix of all rows
+    sense : array
+        Sense of each row, 'E', 'L' or 'G'
+    rhs : array
+        Right hand side of each row
+    c : array
+        Objective coefficients of all columns
+    lb, ub : array
+        Bounds of all columns
+    integer : array
+        Integrality of all columns
+
+    """
+
+    def __init__(self, energysystem, **kwargs):
+        self.es = energysystem
+        self.flows = self.es.flows()
+        self.sources_inertia = self.es.sources_inertia()
+        self.n = len(self.es.timeindex)
+
+        timeincrement = kwargs.get('timeincrement', self.es.timeincrement)
+        if timeincrement is None:
+            timeincrement = self.es.timeindex.freq.nanos / 3.6e12
+        self.timeincrement = sequence_to_array(timeincrement, self.n)
+        period_weighting = kwargs.get('period_weighting', self.es.period_weighting)
+        self.period_weighting = (np.ones(self.n) if period_weighting is None
+                                 else sequence_to_array(period_weighting, self.n))
+        self.objective_weighting = sequence_to_array(
+            kwargs.get('objective_weighting', self.timeincrement * self.period_weighting), self.n)
+
+        self._check_support()
+
+        self.outflows = self.es.outflows()
+
+        self._columns = []
+        self._lb = []
+        self._ub = []
+        self._integer = []
+        self._n_cols = 0
+
+        self._row_keys = OrderedDict()
+        self._coefficients = []
+        self._sense = []
+        self._rhs = []
+        self._n_rows = 0
+        self.row_blocks = OrderedDict()
+
+        self._add_columns()
+        self._add_rows()
+        self._assemble()
+
+    def _check_support(self):
+        """Raises if the energy system holds components the matrix backend
+        does not cover.
+
+        """
+        for n in self.es.nodes:
+            if isinstance(n, GenericStorage):
+                if (n.investment is not None or n.nominal_storage_capacity is None
+                        or n.invest_relation_input_capacity is not None
+                        or n.invest_relation_output_capacity is not None
+                        or n.invest_relation_input_output is not None):
+                    raise NotImplementedError(
+                        "Storage {0} uses options which are not supported by "
+                        "the matrix backend.".format(n.label))
+            elif not (isinstance(n, (osn.Bus, osn.Source, osn.Sink)) or type(n) is Transformer):
+                raise NotImplementedError(
+                    "Node {0} of type {1} is not supported by the matrix "
+                    "backend.".format(n.label, type(n).__name__))
+
+        for (o, i), flow in self.flows.items():
+            if (flow.investment or flow.nonconvex or flow.integer
+                    or flow.summed_max is not None or flow.summed_min is not None
+                    or flow.positive_gradient['ub'][0] is not None
+                    or flow.negative_gradient['ub'][0] is not None):
+                raise NotImplementedError(
+                    "Flow from {0} to {1} uses options which are not "
+                    "supported by the matrix backend.".format(o.label, i.label))
+
+    def _add_column_block(self, name, key, lb, ub, integer=False):
+        """Adds one column per timestep and returns the first column"""
+        start = self._n_cols
+        self._columns.append((name, key, start))
+        self._lb.append(lb)
+        self._ub.append(ub)
+        self._integer.append(np.full(self.n, integer))
+        self._n_cols += self.n
+        return start
+
+    def _add_columns(self):
+        """Creates the flow, the source inertia and the storage content
+        columns"""
+        inertia_power_share = {}
+        for (o, i), edge in self.sources_inertia.items():
+            if edge.provision_type == 'synthetic_storage':
+                inertia_power_share[o] = edge.inertia_power_share
+
+        self.flow = OrderedDict()
+        for (o, i), flow in self.flows.items():
+            lb, ub, fix = flow_bounds(flow, self.n,
+                                      unidirectional=not hasattr(flow, 'bidirectional'),
+                                      inertia_power_share=inertia_power_share.get(o))
+            fixed = ~np.isnan(fix)
+            lb = np.where(fixed, fix, np.where(np.isnan(lb), -np.inf, lb))
+            ub = np.where(fixed, fix, np.where(np.isnan(ub), np.inf, ub))
+            self.flow[o, i] = self._add_column_block('flow', (o, i), lb, ub)
+
+        self.source_inertia = OrderedDict()
+        self.moment_of_inertia = {}
+        self.inertia_costs = {}
+        for (o, i), edge in self.sources_inertia.items():
+            lb = np.zeros(self.n)
+            ub = np.ones(self.n)
+            moment_of_inertia = sequence_to_array(edge.moment_of_inertia, self.n)
+
+            if edge.provision_type in ('synthetic_wind', 'none'):
+                moment_of_inertia = np.zeros(self.n)
+                if o in self.outflows:
+                    (ofl, ifl) = self.outflows[o][-1]
+                    cap = sequence_to_array(self.flows[ofl, ifl].fix, self.n)
+                    if edge.provision_type == 'synthetic_wind':
+                        _, moment_of_inertia, commitment = calc_inertia_wind_profile(
+                            cap, self.es.emulated_inertia_constant, edge.apparent_power)
+                    else:
+                        commitment = (cap > 0).astype(int)
+                    lb = ub = commitment.astype(float)
+
+            self.moment_of_inertia[o, i] = moment_of_inertia
+            self.inertia_costs[o, i] = sequence_to_array(edge.inertia_costs, self.n)
+            self.source_inertia[o, i] = self._add_column_block(
+                'source_inertia', (o, i), lb, ub, integer=True)
+
+        self.storages = [n for n in self.es.nodes if isinstance(n, GenericStorage)]
+        self.storage_content = OrderedDict()
+        for n in self.storages:
+            lb = n.nominal_storage_capacity * sequence_to_array(n.min_storage_level, self.n)
+            ub = n.nominal_storage_capacity * sequence_to_array(n.max_storage_level, self.n)
+            if n.balanced and n.initial_storage_level is not None:
+                # the content at the end equals the initial content
+                lb[-1] = ub[-1] = n.initial_storage_level * n.nominal_storage_capacity
+            self.storage_content[n] = self._add_column_block('storage_content', (n,), lb, ub)
+
+    def _add_row_block(self, name, keys, sense, rhs=0):
+        """Adds one row per key and timestep and returns the first row"""
+        start = self._n_rows
+        count = len(keys) * self.n
+        self._row_keys[name] = (start, keys)
+        self._sense.append(np.broadcast_to(np.asarray(sense), (count,)))
+        self._rhs.append(np.broadcast_to(np.asarray(rhs, dtype=float), (count,)))
+        self._n_rows += count
+        self.row_blocks[name] = (start, self._n_rows)
+        return start
+
+    def _add_coefficients(self, row, col, values):
+        """Adds the coefficients of `self.n` consecutive rows and columns"""
+        t = np.arange(self.n)
+        self._coefficients.append((row + t, col + t,
+                                   np.broadcast_to(np.asarray(values, dtype=float), (self.n,))))
+
+    def _add_previous_coefficients(self, row, col, values):
+        """Adds the coefficients of the columns of the previous timestep,
+        the first row refers to the last column"""
+        t = np.arange(self.n)
+        self._coefficients.append((row + t, col + (t - 1) % self.n,
+                                   np.broadcast_to(np.asarray(values, dtype=float), (self.n,))))
+
+    def _add_rows(self):
+        """Creates all row blocks of the problem"""
+        # bus balances
+        buses = [n for n in self.es.nodes
+                 if isinstance(n, osn.Bus) and n.balanced]
+        start = self._add_row_block('balance', buses, 'E')
+        row = {b: start + k * self.n for k, b in enumerate(buses)}
+        for (o, i), col in self.flow.items():
+            if i in row:
+                self._add_coefficients(row[i], col, 1)
+            if o in row:
+                self._add_coefficients(row[o], col, -1)
+
+        # linear relation of transformers, a spanning set per transformer
+        relations = [r for n in self.es.nodes if type(n) is Transformer
+                     for r in conversion_relations(n, self.n)]
+        start = self._add_row_block('relation', [key for key, _, _ in relations], 'E')
+        for k, (key, reference, ratio) in enumerate(relations):
+            row = start + k * self.n
+            self._add_coefficients(row, self.flow[key], 1)
+            self._add_coefficients(row, self.flow[reference], -ratio)
+
+        # storage balances, the content of the first timestep follows from
+        # the initial content, from the content at the end for balanced
+        # storages, or from any non-negative initial content
+        ti = self.timeincrement
+        sense, rhs = [], []
+        for n in self.storages:
+            losses = ((sequence_to_array(n.fixed_losses_relative, self.n) * n.nominal_storage_capacity
+                       + sequence_to_array(n.fixed_losses_absolute, self.n)) * ti)
+            sense_n = np.full(self.n, 'E')
+            if n.initial_storage_level is None and not n.balanced:
+                sense_n[0] = 'G'
+            elif n.initial_storage_level is not None:
+                losses[0] -= (n.initial_storage_level * n.nominal_storage_capacity
+                              * (1 - sequence_to_array(n.loss_rate, self.n)[0]) ** ti[0])
+            sense.append(sense_n)
+            rhs.append(-losses)
+        start = self._add_row_block('storage_balance', self.storages,
+                                    np.concatenate(sense) if sense else 'E',
+                                    np.concatenate(rhs) if rhs else 0)
+        for k, n in enumerate(self.storages):
+            row = start + k * self.n
+            retention = (1 - sequence_to_array(n.loss_rate, self.n)) ** ti
+            if n.initial_storage_level is not None or not n.balanced:
+                retention[0] = 0
+            self._add_coefficients(row, self.storage_content[n], 1)
+            self._add_previous_coefficients(row, self.storage_content[n], -retention)
+            (inflow,) = [e for e in self.flow if e[1] is n]
+            self._add_coefficients(row, self.flow[inflow],
+                                   -sequence_to_array(n.inflow_conversion_factor, self.n) * ti)
+            self._add_coefficients(row, self.flow[self.outflows[n][-1]],
+                                   ti / sequence_to_array(n.outflow_conversion_factor, self.n))
+
+        # linking of flows and the provision of inertia
+        generators = [(o, i) for (o, i), edge in self.sources_inertia.items()
+                      if edge.provision_type == 'synchronous_generator']
+        start = self._add_row_block('flow_inertia', [o for (o, i) in generators], 'L')
+        for k, (o, i) in enumerate(generators):
+            edge = self.sources_inertia[o, i]
+            row = start + k * self.n
+            self._add_coefficients(row, self.source_inertia[o, i],
+                                   edge.apparent_power * edge.minimum_stable_operation)
+            self._add_coefficients(row, self.flow[self.outflows[o][-1]], -1)
+
+        start = self._add_row_block('inertia_flow', [o for (o, i) in generators], 'G')
+        for k, (o, i) in enumerate(generators):
+            edge = self.sources_inertia[o, i]
+            row = start + k * self.n
+            self._add_coefficients(row, self.source_inertia[o, i], 1)
+            self._add_coefficients(row, self.flow[self.outflows[o][-1]],
+                                   -1 / edge.apparent_power)
+
+        # minimum synchronous and total inertia
+        if self.es.minimum_system_synchronous_inertia is not None:
+            start = self._add_row_block('min_synchronous_inertia', [None], 'G',
+                                        sequence_to_array(self.es.minimum_system_synchronous_inertia, self.n))
+            for (o, i), col in self.source_inertia.items():
+                if self.sources_inertia[o, i].provision_type in ('synchronous_generator', 'synchronous_storage'):
+                    self._add_coefficients(start, col, self.moment_of_inertia[o, i])
+
+        if self.es.minimum_system_inertia is not None:
+            start = self._add_row_block('min_inertia', [None], 'G',
+                                        sequence_to_array(self.es.minimum_system_inertia, self.n))
+            for (o, i), col in self.source_inertia.items():
+                self._add_coefficients(start, col, self.moment_of_inertia[o, i])
+
+        # minimum synchronous and total inertia of areas, one row per area
+        # over the inertia sources of the area
+        for name, limits, provision_types in (
+                ('min_area_synchronous_inertia', self.es.minimum_area_synchronous_inertia,
+                 ('synchronous_generator', 'synchronous_storage')),
+                ('min_area_inertia', self.es.minimum_area_inertia, None)):
+            if not limits:
+                continue
+            areas = sorted(limits, key=str)
+            start = self._add_row_block(name, areas, 'G', np.concatenate(
+                [sequence_to_array(limits[a], self.n) for a in areas]))
+            row = {a: start + k * self.n for k, a in enumerate(areas)}
+            for (o, i), col in self.source_inertia.items():
+                edge = self.sources_inertia[o, i]
+                if edge.area in row and (provision_types is None or
+                                         edge.provision_type in provision_types):
+                    self._add_coefficients(row[edge.area], col, self.moment_of_inertia[o, i])
+
+    def _assemble(self):
+        """Assembles the coefficient matrix, the bounds and the objective"""
+        self.lb = np.concatenate(self._lb) if self._lb else np.zeros(0)
+        self.ub = np.concatenate(self._ub) if self._ub else np.zeros(0)
+        self.integer = np.concatenate(self._integer) if self._integer else np.zeros(0, dtype=bool)
+        self.sense = np.concatenate(self._sense) if self._sense else np.zeros(0, dtype='<U1')
+        self.rhs = np.concatenate(self._rhs) if self._rhs else np.zeros(0)
+
+        if self._coefficients:
+            rows, cols, values = (np.concatenate(a) for a in zip(*self._coefficients))
+        else:
+            rows = cols = np.zeros(0, dtype=int)
+            values = np.zeros(0)
+        nonzero = values != 0
+        self.A = sp.csr_matrix((values[nonzero], (rows[nonzero], cols[nonzero])),
+                               shape=(self._n_rows, self._n_cols))
+        self.blocks = OrderedDict(
+            (name, self.A[start:stop]) for name, (start, stop) in self.row_blocks.items())
+
+        # objective: variable costs of flows and costs of inertia
+        self.c = np.zeros(self._n_cols)
+        t = np.arange(self.n)
+        for (o, i), col in self.flow.items():
+            variable_costs = self.flows[o, i].variable_costs
+            if variable_costs[0] is not None:
+                self.c[col + t] += (self.objective_weighting *
+                                    sequence_to_array(variable_costs, self.n))
+        for (o, i), col in self.source_inertia.items():
+            self.c[col + t] += (self.moment_of_inertia[o, i] * self.inertia_costs[o, i] *
+                                self.period_weighting)
+
+    def objective_value(self, x):
+        """Returns the objective value of the column values `x`"""
+        return float(np.dot(self.c, x))
+
+    def column_labels(self):
+        """Returns the labels of all columns, e.g. `flow(gen_bel_0)`"""
+        labels = []
+        for name, key, start in self._columns:
+            prefix = '{0}({1}_'.format(name, '_'.join(str(k) for k in key))
+            labels.extend('{0}{1})'.format(prefix, t) for t in range(self.n))
+        return labels
+
+    def row_labels(self):
+        """Returns the labels of all rows, e.g. `balance(bel_0)`"""
+        labels = []
+        for name, (start, keys) in self._row_keys.items():
+            for key in keys:
+                if key is None:
+                    prefix = '{0}('.format(name)
+                elif isinstance(key, tuple):
+                    prefix = '{0}({1}_'.format(name, '_'.join(str(k) for k in key))
+                else:
+                    prefix = '{0}({1}_'.format(name, key)
+                labels.extend('{0}{1})'.format(prefix, t) for t in range(self.n))
+        return labels
+
+    def _names(self, symbolic_labels):
+        """Returns unique and file safe column and row names"""
+        if not symbolic_labels:
+            return (['x{0}'.format(j) for j in range(self._n_cols)],
+                    ['c{0}'.format(k) for k in range(self._n_rows)])
+
+        names = []
+        for labels, prefix in ((self.column_labels(), 'x'), (self.row_labels(), 'c')):
+            safe = [re.sub(r'[^A-Za-z0-9_()\[\].]', '_', label) for label in labels]
+            if len(set(safe)) < len(safe):
+                safe = ['{0}{1}_{2}'.format(prefix, j, label) for j, label in enumerate(safe)]
+            names.append(safe)
+        return names[0], names[1]
+
+    def write(self, filename, file_format=None, symbolic_labels=False):
+        """Writes the problem to an MPS or LP file
+
+        Parameters
+        ----------
+        filename : str
+            Path of the file
+        file_format : str, optional
+            'mps' or 'lp'. Defaults to the extension of `filename`.
+        symbolic_labels : bool
+            Use the labels of nodes in column and row names instead of
+            enumerated names
+
+        """
+        if file_format is None:
+            file_format = filename.rsplit('.', 1)[-1].lower()
+
+        if file_format == 'mps':
+            self.write_mps(filename, symbolic_labels)
+        elif file_format == 'lp':
+            self.write_lp(filename, symbolic_labels)
+        else:
+            raise ValueError("Unknown file format '{0}'".format(file_format))
+
+    def write_mps(self, filename, symbolic_labels=False):
+        """Writes the problem to a free MPS file"""
+        cols, rows = self._names(symbolic_labels)
+        write_mps_file(filename, self.A, self.c, self.sense, self.rhs,
+                       self.lb, self.ub, self.integer, cols, rows)
+
+    def write_lp(self, filename, symbolic_labels=False):
+        """Writes the problem to a CPLEX LP file"""
+        cols, rows = self._names(symbolic_labels)
+        operators = {'E': '=', 'L': '<=', 'G': '>='}
+
+        with open(filename, 'w') as f:
+            f.write('\\* opinmod *\\\n\nmin\nobj:\n')
+            for j in np.flatnonzero(self.c):
+                f.write('{0:+} {1}\n'.format(float(self.c[j]), cols[j]))
+            f.write('+0 ONE_VAR_CONSTANT\n\ns.t.\n\n')
+
+            for k, name in enumerate(rows):
+                f.write('{0}:\n'.format(name))
+                if self.A.indptr[k] == self.A.indptr[k + 1]:
+                    f.write('+0 ONE_VAR_CONSTANT\n')
+                for p in range(self.A.indptr[k], self.A.indptr[k + 1]):
+                    f.write('{0:+} {1}\n'.format(float(self.A.data[p]), cols[self.A.indices[p]]))
+                f.write('{0} {1!r}\n\n'.format(operators[self.sense[k]], float(self.rhs[k])))
+
+            f.write('c_e_ONE_VAR_CONSTANT:\nONE_VAR_CONSTANT = 1.0\n\nbounds\n')
+            for j, name in enumerate(cols):
+                lb, ub = self.lb[j], self.ub[j]
+                if lb == ub:
+                    f.write('   {0} = {1!r}\n'.format(name, float(lb)))
+                else:
+                    f.write('   {0} <= {1} <= {2}\n'.format(
+                        '-inf' if math.isinf(lb) else repr(float(lb)), name,
+                        '+inf' if math.isinf(ub) else repr(float(ub))))
+
+            integers = np.flatnonzero(self.integer)
+            if len(integers):
+                f.write('general\n')
+                for j in integers:
+                    f.write('  {0}\n'.format(cols[j]))
+            f.write('end\n')
+
+
+def write_mps_file(filename, A, c, sense, rhs, lb, ub, integer_columns, cols, rows):
+    """Writes a problem given as coefficient matrix to a free MPS file
+
+    Parameters
+    ----------
+    filename : str
+        Path of the file
+    A : scipy.sparse matrix
+        Coefficient matrix
+    c : array
+        Objective coefficients of the columns
+    sense, rhs : array
+        Sense ('E', 'L' or 'G') and right hand side of the rows
+    lb, ub, integer_columns : array
+        Bounds and integrality of the columns
+    cols, rows : list of str
+        Names of the columns and rows
+
+    """
+    A = A.tocsc()
+
+    with open(filename, 'w') as f:
+        f.write('NAME opinmod\nROWS\n N obj\n')
+        for name, row_sense in zip(rows, sense):
+            f.write(' {0} {1}\n'.format(row_sense, name))
+
+        f.write('COLUMNS\n')
+        integer = False
+        for j, name in enumerate(cols):
+            if integer_columns[j] != integer:
+                integer = integer_columns[j]
+                f.write(" MARKER 'MARKER' '{0}'\n".format('INTORG' if integer else 'INTEND'))
+            if c[j] != 0:
+                f.write(' {0} obj {1!r}\n'.format(name, float(c[j])))
+            for k in range(A.indptr[j], A.indptr[j + 1]):
+                f.write(' {0} {1} {2!r}\n'.format(name, rows[A.indices[k]], float(A.data[k])))
+            if c[j] == 0 and A.indptr[j] == A.indptr[j + 1]:
+                f.write(' {0} obj 0\n'.format(name))
+        if integer:
+            f.write(" MARKER 'MARKER' 'INTEND'\n")
+
+        f.write('RHS\n')
+        for k in np.flatnonzero(rhs):
+            f.write(' RHS {0} {1!r}\n'.format(rows[k], float(rhs[k])))
+
+        f.write('BOUNDS\n')
+        for j, name in enumerate(cols):
+            lower, upper = lb[j], ub[j]
+            if lower == upper:
+                f.write(' FX BND {0} {1!r}\n'.format(name, float(lower)))
+                continue
+            if math.isinf(lower) and math.isinf(upper):
+                f.write(' FR BND {0}\n'.format(name))
+                continue
+            if math.isinf(lower):
+                f.write(' MI BND {0}\n'.format(name))
+            else:
+                f.write(' LO BND {0} {1!r}\n'.format(name, float(lower)))
+            if not math.isinf(upper):
+                f.write(' UP BND {0} {1!r}\n'.format(name, float(upper)))
+            elif integer_columns[j]:
+                f.write(' PL BND {0}\n'.format(name))
+        f.write('ENDATA\n')
+
+
+def run_cbc(filename, cmdline_options=None, tee=False):
+    """Solves an LP or MPS file with the CBC command line solver
+
+    Parameters
+    ----------
+    filename : str
+        Path of the LP or MPS file
+    cmdline_options : dict, optional
+        Options passed to cbc as `-key value`
+    tee : bool
+        Print the solver output
+
+    Returns
+    -------
+    tuple
+        Solver status, e.g. 'Optimal', the objective value (None if
+        there is none) and the value and the dual of all rows and columns
+        as tuple keyed by their name
+
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        solution = os.path.join(tmp, 'model.sol')
+        command = ['cbc', '-printingOptions', 'all', '-import', filename]
+        for key, value in (cmdline_options or {}).items():
+            command += ['-' + key, str(value)]
+        command += ['-solve', '-solu', solution]
+        output = subprocess.run(command, capture_output=True, text=True, check=True)
+        if tee:
+            print(output.stdout)
+
+        values = {}
+        with open(solution) as f:
+            status, _, objective = f.readline().partition(' - objective value ')
+            for line in f:
+                fields = line.split()
+                # infeasible rows and columns are marked with '**'
+                if fields[0] == '**':
+                    fields = fields[1:]
+                values[fields[1]] = (float(fields[2]), float(fields[3]))
+
+    objective = float(objective) if objective.strip() else None
+    return status.strip(), objective, values
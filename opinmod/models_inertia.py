@@ -13,14 +13,23 @@ https://github.com/oemof/oemof-solph
 """
 
 from opinmod import processing_inertia
-from opinmod.wind_inertia import calc_inertia_wind
+from opinmod.expressions_inertia import coefficient_matrix, linear_sums_by_timestep
+from opinmod.profiling_inertia import BuildProfile
+from opinmod.wind_inertia import calc_inertia_wind_profile
+from opinmod.plumbing_inertia import ArraySequence, flow_bounds, sequence_to_array
 from .blocks import transformer_inertia
 from .blocks import inertia_inertia
+from .network.transformer_inertia import Transformer
 
 import oemof.solph.models as osm
 import oemof.solph.blocks as osb
+import oemof.solph.network as osn
 
 import pyomo.environ as po
+from pyomo.opt import SolverFactory
+
+import numpy as np
+import pandas as pd
 
 import math
 
@@ -32,16 +41,70 @@ class Model(osm.Model):
     ----------
     energysystem : EnergySystem object
         Object that holds the nodes of an OpInMod energy system graph
+    period_weighting : sequence, optional
+        Number of periods each timestep represents, e.g. the weights of
+        typical periods. Defaults to `energysystem.period_weighting`. If
+        set, the costs of flows and inertia are weighted with it.
+    cluster_units : bool
+        Group identical synchronous units into clusters with an integer
+        number of online units instead of one binary commitment per unit.
+        Units are identical if their inertia sources and all their flows
+        have the same attributes and connect the same buses.
+    build_profile : bool
+        Record wall time, allocations and created components of every
+        build phase in :attr:`build_profile`, see
+        :class:`opinmod.profiling_inertia.BuildProfile`
+    build_profile_hook : callable, optional
+        Called with the build profile after the model is built. Enables
+        `build_profile`.
+    presolve : bool
+        Do not create commitment variables for inertia sources of
+        provision type 'synthetic_wind' and 'none', whose commitment
+        follows from their fixed feed-in. Their inertia and inertia
+        costs become constants of the minimum inertia constraints and
+        of the objective. Their commitment is reconstructed in
+        :meth:`results`.
 
     **The following basic sets are created**:
 
     SOURCES_INERTIA:
         A 2 dimensional set with all inertia sources. Index: `(source, target)`
 
+    SYNCHRONOUS_GENERATORS:
+        A 2 dimensional set with all inertia sources of provision type
+        'synchronous_generator'. Index: `(source, target)`
+
+    CLUSTERS:
+        A 2 dimensional set with the first inertia source of each cluster
+        of identical units. Index: `(source, target)`
+
+    CLUSTERED_SOURCES:
+        A 2 dimensional set with all inertia sources which are part of a
+        cluster. Index: `(source, target)`
+
+    PRESOLVED_SOURCES:
+        A 2 dimensional set with all inertia sources whose commitment is
+        fixed by the presolve (empty without `presolve`).
+        Index: `(source, target)`
+
+    COMMITMENT_SOURCES:
+        A 2 dimensional set with all inertia sources with a commitment
+        variable, i.e. all sources but the PRESOLVED_SOURCES.
+        Index: `(source, target)`
+
+    AREAS:
+        A set with all synchronous areas of the inertia sources and the
+        area limits of the energy system
+
     **The following basic variables are created**:
 
     source_inertia
-        inertia source from source to target indexed by SOURCES_INERTIA and
+        inertia source from source to target indexed by COMMITMENT_SOURCES
+        and TIMESTEPS. Fixed for clustered sources and disaggregated from
+        `cluster_commitment` after solving.
+
+    cluster_commitment
+        number of online units of a cluster indexed by CLUSTERS and
         TIMESTEPS
 
     """
@@ -52,27 +115,122 @@ class Model(osm.Model):
 
     def __init__(self, energysystem, *args, **kwargs):
         self.es = energysystem
+        self.cluster_units = kwargs.pop('cluster_units', False)
+        self.presolve = kwargs.pop('presolve', False)
+        period_weighting = kwargs.pop('period_weighting', self.es.period_weighting)
+        if period_weighting is not None:
+            length = len(self.es.timeindex)
+            period_weighting = sequence_to_array(period_weighting, length).tolist()
+            if 'objective_weighting' not in kwargs:
+                timeincrement = kwargs.get('timeincrement', self.es.timeincrement)
+                if timeincrement is None:
+                    timeincrement = self.es.timeindex.freq.nanos / 3.6e12
+                kwargs['objective_weighting'] = (
+                    sequence_to_array(timeincrement, length) *
+                    period_weighting).tolist()
+        self.period_weighting = period_weighting
+        hook = kwargs.pop('build_profile_hook', None)
+        if kwargs.pop('build_profile', False) or hook is not None:
+            self.build_profile = BuildProfile(self, hook=hook)
+        else:
+            self.build_profile = None
+        self.warm_started = False
         self.sources_inertia = self.es.sources_inertia()
+        # inertia edges indexed by their source node
+        self.inertia_edges = {}
+        for (o, i) in self.sources_inertia:
+            self.inertia_edges.setdefault(o, []).append((o, i))
         super().__init__(energysystem, *args, **kwargs)
-        self._flow_inertia_constraint()
-        self._inertia_flow_constraint()
+
+    def _construct(self):
+        self._profiled('sets', self._add_parent_block_sets)
+        self._profiled('variables', self._add_parent_block_variables)
+        self._add_child_blocks()
+        self._add_objective()
+        self._profiled('flow_inertia_constraint', self._flow_inertia_constraint)
+        self._profiled('inertia_flow_constraint', self._inertia_flow_constraint)
+        if self.unit_clusters:
+            self._profiled('cluster_constraints', self._cluster_constraints)
 
         if self.es.minimum_system_synchronous_inertia is not None:
-            self._min_synchronous_inertia()
+            self._profiled('min_synchronous_inertia', self._min_synchronous_inertia)
         else:
             None
 
         if self.es.minimum_system_inertia is not None:
-            self._min_inertia()
+            self._profiled('min_inertia', self._min_inertia)
+        else:
+            None
+
+        if self.es.minimum_area_synchronous_inertia:
+            self._profiled('min_area_synchronous_inertia', self._min_area_synchronous_inertia)
+        else:
+            None
+
+        if self.es.minimum_area_inertia:
+            self._profiled('min_area_inertia', self._min_area_inertia)
         else:
             None
 
+        if self.build_profile is not None:
+            self.build_profile.finish()
+
+    def _profiled(self, phase, method, *args, **kwargs):
+        """Calls `method` and records it as `phase` of the build profile"""
+        if self.build_profile is None:
+            return method(*args, **kwargs)
+        with self.build_profile.measure(phase):
+            return method(*args, **kwargs)
+
+    def _add_child_blocks(self):
+        if self.build_profile is None:
+            return super()._add_child_blocks()
+
+        for group in self._constraint_groups:
+            with self.build_profile.measure('block.' + group.__name__):
+                block = group()
+                self.add_component(str(block), block)
+                block._create(group=self.es.groups.get(group))
+
+    def _add_objective(self, sense=po.minimize, update=False):
+        if self.build_profile is None:
+            return super()._add_objective(sense=sense, update=update)
+
+        if update:
+            self.del_component('objective')
+
+        expr = 0
+        for block in self.component_data_objects():
+            if hasattr(block, '_objective_expression'):
+                with self.build_profile.measure('objective.' + type(block).__name__):
+                    expr += block._objective_expression()
+
+        with self.build_profile.measure('objective'):
+            self.objective = po.Objective(sense=sense, expr=expr)
+
     def results(self):
         """Returns a nested dictionary of the results of this optimization
 
         """
         return processing_inertia.results(self)
 
+    def solve(self, solver='cbc', solver_io='lp', **kwargs):
+        """Solves the model, see :meth:`oemof.solph.models.BaseModel.solve`
+
+        Start values set with :meth:`warm_start` or
+        :meth:`set_start_values` are passed to the solver as MIP start if
+        the solver interface is warm start capable. Clustered units are
+        disaggregated after solving.
+
+        """
+        solve_kwargs = kwargs.get('solve_kwargs', {})
+        if (self.warm_started and 'warmstart' not in solve_kwargs and
+                SolverFactory(solver, solver_io=solver_io).warm_start_capable()):
+            kwargs['solve_kwargs'] = dict(solve_kwargs, warmstart=True)
+        solver_results = super().solve(solver=solver, solver_io=solver_io, **kwargs)
+        self._disaggregate_clusters()
+        return solver_results
+
     def _add_parent_block_sets(self):
 
         super()._add_parent_block_sets()
@@ -80,76 +238,135 @@ class Model(osm.Model):
         self.SOURCES_INERTIA = po.Set(initialize=self.sources_inertia.keys(),
                             ordered=True, dimen=2)
 
+        # pyomo set for all inertia sources of synchronous generators
+        self.SYNCHRONOUS_GENERATORS = po.Set(
+            initialize=list(self.es.sources_inertia('synchronous_generator')),
+            ordered=True, dimen=2, within=self.SOURCES_INERTIA)
+
+        # outgoing flows indexed by their source node
+        self.outflows = self.es.outflows()
+
+        # clusters of identical synchronous units
+        self.unit_clusters = self._cluster_units() if self.cluster_units else {}
+        self.CLUSTERS = po.Set(initialize=list(self.unit_clusters),
+                               ordered=True, dimen=2, within=self.SOURCES_INERTIA)
+        self.CLUSTERED_SOURCES = po.Set(
+            initialize=[e for members in self.unit_clusters.values() for e in members],
+            ordered=True, dimen=2, within=self.SOURCES_INERTIA)
+
+        # sources with a commitment fixed by their feed-in
+        presolved = []
+        if self.presolve:
+            presolved = [e for e, edge in self.sources_inertia.items()
+                         if edge.provision_type in ('synthetic_wind', 'none')]
+        self.PRESOLVED_SOURCES = po.Set(initialize=presolved, ordered=True, dimen=2,
+                                        within=self.SOURCES_INERTIA)
+        self.COMMITMENT_SOURCES = po.Set(
+            initialize=[e for e in self.sources_inertia if e not in set(presolved)],
+            ordered=True, dimen=2, within=self.SOURCES_INERTIA)
+
+        # synchronous areas
+        self.AREAS = po.Set(initialize=self.es.areas(), ordered=True)
+
+    def _cluster_units(self):
+        """Groups identical synchronous units
+
+        Returns
+        -------
+        dict
+            Inertia sources of each cluster with at least two units,
+            indexed by the first inertia source of the cluster
+        """
+        n = len(self.TIMESTEPS)
+        groups = {}
+        for (o, i), edge in self.sources_inertia.items():
+            if edge.provision_type not in ('synchronous_generator', 'synchronous_storage'):
+                continue
+            signature = _inertia_signature(edge, n)
+            if edge.provision_type == 'synchronous_generator':
+                flows = _unit_signature(o, self.flows, n)
+                if flows is None or o not in self.outflows:
+                    continue
+                signature += (i, flows)
+            else:
+                signature += (i,)
+            groups.setdefault(signature, []).append((o, i))
+        return {members[0]: members for members in groups.values() if len(members) > 1}
+
     def _add_parent_block_variables(self):
 
         self.flow = po.Var(self.FLOWS, self.TIMESTEPS,
                            within=po.Reals)
 
         for (o, i) in self.FLOWS:
-            for (oin, iin) in self.SOURCES_INERTIA:
-                if o==oin and self.sources_inertia[oin, iin].provision_type=='synthetic_storage':
-                    for t in self.TIMESTEPS:
-                        self.flow[o, i, t].setub(
-                            self.flows[o, i].nominal_value *
-                            (1-self.sources_inertia[oin, iin].inertia_power_share))
-                elif self.flows[o, i].nominal_value is not None:
-                    if self.flows[o, i].fix[self.TIMESTEPS[1]] is not None:
-                        for t in self.TIMESTEPS:
-                            self.flow[o, i, t].value = (
-                                self.flows[o, i].fix[t] *
-                                self.flows[o, i].nominal_value)
-                            self.flow[o, i, t].fix()
-                    else:
-                        for t in self.TIMESTEPS:
-                            self.flow[o, i, t].setub(
-                                self.flows[o, i].max[t] *
-                                self.flows[o, i].nominal_value)
-
-                        if not self.flows[o, i].nonconvex:
-                            for t in self.TIMESTEPS:
-                                self.flow[o, i, t].setlb(
-                                    self.flows[o, i].min[t] *
-                                    self.flows[o, i].nominal_value)
-                        elif (o, i) in self.UNIDIRECTIONAL_FLOWS:
-                            for t in self.TIMESTEPS:
-                                self.flow[o, i, t].setlb(0)
-                else:
-                    if (o, i) in self.UNIDIRECTIONAL_FLOWS:
-                        for t in self.TIMESTEPS:
-                            self.flow[o, i, t].setlb(0)
+            inertia_power_share = None
+            for (oin, iin) in self.inertia_edges.get(o, []):
+                if self.sources_inertia[oin, iin].provision_type == 'synthetic_storage':
+                    inertia_power_share = self.sources_inertia[oin, iin].inertia_power_share
 
+            lb, ub, fix = flow_bounds(self.flows[o, i], len(self.TIMESTEPS),
+                                      unidirectional=(o, i) in self.UNIDIRECTIONAL_FLOWS,
+                                      inertia_power_share=inertia_power_share)
 
-        self.source_inertia = po.Var(self.SOURCES_INERTIA, self.TIMESTEPS,
-                           within=po.Binary)
+            for t, lb_t, ub_t, fix_t in zip(self.TIMESTEPS, lb.tolist(), ub.tolist(), fix.tolist()):
+                if not math.isnan(fix_t):
+                    self.flow[o, i, t].value = fix_t
+                    self.flow[o, i, t].fix()
+                else:
+                    if not math.isnan(ub_t):
+                        self.flow[o, i, t].setub(ub_t)
+                    if not math.isnan(lb_t):
+                        self.flow[o, i, t].setlb(lb_t)
 
+        # inertia and commitment of wind and 'none' sources follow from
+        # their fixed feed-in
+        n = len(self.TIMESTEPS)
+        fixed_commitment = {}
         for (o,i) in self.SOURCES_INERTIA:
+            if self.sources_inertia[o,i].provision_type not in ('synthetic_wind', 'none'):
+                continue
+
+            self.sources_inertia[o,i].inertia_constant = ArraySequence(0)
+            self.sources_inertia[o,i].moment_of_inertia = ArraySequence(0)
+            if o not in self.outflows:
+                if (o, i) in self.PRESOLVED_SOURCES:
+                    fixed_commitment[o, i] = np.zeros(n, dtype=int)
+                continue
+
+            (ofl, ifl) = self.outflows[o][-1]
+            cap = sequence_to_array(self.flows[ofl, ifl].fix, n)
             if self.sources_inertia[o,i].provision_type == 'synthetic_wind':
-                self.sources_inertia[o,i].inertia_constant = [0] * len(self.es.timeindex)
-                self.sources_inertia[o,i].moment_of_inertia = [0] * len(self.es.timeindex)
-                for (ofl,ifl) in self.FLOWS:
-                    if ofl == o:
-                        for t in self.TIMESTEPS:
-                            self.sources_inertia[o,i].inertia_constant[t] = calc_inertia_wind(self.flows[o, ifl].fix[t]) * self.es.emulated_inertia_constant
-                            self.sources_inertia[o,i].moment_of_inertia[t] = (self.sources_inertia[o, i].inertia_constant[t]*self.sources_inertia[o, i].apparent_power)/(0.5*4*math.pi**2*50**2)
-                            if self.flows[o, ifl].fix[t] > 0:
-                                self.source_inertia[o,i,t].value=1
-                                self.source_inertia[o,i,t].fix()
-                            else:
-                                self.source_inertia[o,i,t].value=0
-                                self.source_inertia[o,i,t].fix()
-            elif self.sources_inertia[o,i].provision_type == 'none':
-                self.sources_inertia[o,i].inertia_constant = [0] * len(self.es.timeindex)
-                self.sources_inertia[o,i].moment_of_inertia = [0] * len(self.es.timeindex)
-                for (ofl,ifl) in self.FLOWS:
-                    if ofl == o:
-                        for t in self.TIMESTEPS:
-                            if self.flows[o,ifl].fix[t] > 0:
-                                self.source_inertia[o,i,t].value=1
-                                self.source_inertia[o,i,t].fix()
-                            else:
-                                self.source_inertia[o,i,t].value=0
-                                self.source_inertia[o,i,t].fix()
+                inertia_constant, moment_of_inertia, commitment = calc_inertia_wind_profile(
+                    cap, self.es.emulated_inertia_constant, self.sources_inertia[o,i].apparent_power)
+                self.sources_inertia[o,i].inertia_constant = ArraySequence(inertia_constant)
+                self.sources_inertia[o,i].moment_of_inertia = ArraySequence(moment_of_inertia)
+            else:
+                commitment = (cap > 0).astype(int)
+            fixed_commitment[o, i] = commitment
+
+        # commitment of the presolved sources, no variables are created
+        self.presolved_commitment = {
+            e: fixed_commitment[e] for e in self.PRESOLVED_SOURCES}
+
+        self.source_inertia = po.Var(self.COMMITMENT_SOURCES, self.TIMESTEPS,
+                           within=po.Binary)
 
+        for (o, i), commitment in fixed_commitment.items():
+            if (o, i) in self.PRESOLVED_SOURCES:
+                continue
+            for t, commitment_t in zip(self.TIMESTEPS, commitment.tolist()):
+                self.source_inertia[o,i,t].value = commitment_t
+                self.source_inertia[o,i,t].fix()
+
+        # clustered units are committed through the number of online units
+        for (o, i) in self.CLUSTERED_SOURCES:
+            for t in self.TIMESTEPS:
+                self.source_inertia[o, i, t].value = 0
+                self.source_inertia[o, i, t].fix()
+
+        self.cluster_commitment = po.Var(
+            self.CLUSTERS, self.TIMESTEPS, within=po.NonNegativeIntegers,
+            bounds=lambda m, o, i, t: (0, len(self.unit_clusters[o, i])))
 
     def _flow_inertia_constraint(self):
         """
@@ -162,22 +379,18 @@ class Model(osm.Model):
         """
         def _flow_inertia_rule(self):
             for t in self.TIMESTEPS:
-                for (o, iin) in self.SOURCES_INERTIA:
-                    if self.sources_inertia[o, iin].provision_type == 'synchronous_generator':
-                        lhs = self.source_inertia[o, iin, t]*(self.sources_inertia[o, iin].apparent_power * self.sources_inertia[o, iin].minimum_stable_operation)
-                        for (ofl, ifl) in self.FLOWS:
-                            try:
-                                rhs = self.flow[o, ifl, t]
-                            except:
-                                None
-                        expr = (lhs <= rhs)
-                        self.flow_inetia_constraint.add((o, t), expr)
-                    #if expr is not True:
-                    #    self.flow_inetia_constraint.add((o, t), expr)
+                for (o, iin) in self.SYNCHRONOUS_GENERATORS:
+                    if (o, iin) in self.CLUSTERED_SOURCES:
+                        continue
+                    (ofl, ifl) = self.outflows[o][-1]
+                    lhs = self.source_inertia[o, iin, t]*(self.sources_inertia[o, iin].apparent_power * self.sources_inertia[o, iin].minimum_stable_operation)
+                    rhs = self.flow[ofl, ifl, t]
+                    self.flow_inetia_constraint.add((o, t), (lhs <= rhs))
 
         self.flow_inetia_constraint = po.Constraint([(o, t)
                                                      for t in self.TIMESTEPS
-                                                     for (o, iin) in self.SOURCES_INERTIA], noruleinit=True)
+                                                     for (o, iin) in self.SYNCHRONOUS_GENERATORS
+                                                     if (o, iin) not in self.CLUSTERED_SOURCES], noruleinit=True)
 
         self.flow_inetia_constraint_build = po.BuildAction(rule=_flow_inertia_rule)
 
@@ -189,26 +402,96 @@ class Model(osm.Model):
         """
         def _inertia_flow_rule(self):
             for t in self.TIMESTEPS:
-                for (o, iin) in self.SOURCES_INERTIA:
-                    if self.sources_inertia[o, iin].provision_type == 'synchronous_generator':
-                        lhs = self.source_inertia[o, iin, t]
-                        for (ofl, ifl) in self.FLOWS:
-                            try:
-                                rhs = self.flow[o, ifl, t]/self.sources_inertia[o, iin].apparent_power
-                            except:
-                                None
-                        expr = (lhs >= rhs)
-                        self.inertia_flow_constraint.add((o, t), expr)
-                    #if expr is not True:
-                    #    self.flow_inetia_constraint.add((o, t), expr)
-
+                for (o, iin) in self.SYNCHRONOUS_GENERATORS:
+                    if (o, iin) in self.CLUSTERED_SOURCES:
+                        continue
+                    (ofl, ifl) = self.outflows[o][-1]
+                    lhs = self.source_inertia[o, iin, t]
+                    rhs = self.flow[ofl, ifl, t]/self.sources_inertia[o, iin].apparent_power
+                    self.inertia_flow_constraint.add((o, t), (lhs >= rhs))
 
         self.inertia_flow_constraint = po.Constraint([(o, t)
                                                      for t in self.TIMESTEPS
-                                                     for (o, iin) in self.SOURCES_INERTIA], noruleinit=True)
+                                                     for (o, iin) in self.SYNCHRONOUS_GENERATORS
+                                                     if (o, iin) not in self.CLUSTERED_SOURCES], noruleinit=True)
 
         self.inertia_flow_constraint_build = po.BuildAction(rule=_inertia_flow_rule)
 
+    def _cluster_constraints(self):
+        """
+        Constraints which regulate the relationship between the flows and
+        the number of online units of clusters of synchronous generators.
+        The summed flow of all units of a cluster has to be larger than
+        the number of online units times their minimum stable operation
+        point, and every online unit can at most provide its apparent
+        power and the upper bound of its flows.
+        """
+        n = len(self.TIMESTEPS)
+        generators = [c for c in self.CLUSTERS
+                      if self.sources_inertia[c].provision_type == 'synchronous_generator']
+
+        # flows of the units of each cluster ordered by connected bus
+        self.cluster_flows = {c: _unit_flows(self.unit_clusters[c], self.flows) for c in generators}
+
+        capacities = {}
+        for c in generators:
+            for k, keys in enumerate(self.cluster_flows[c]):
+                ub = flow_bounds(self.flows[keys[0]], n)[1]
+                if keys[0] == self.outflows[c[0]][-1]:
+                    ub = np.fmin(ub, self.sources_inertia[c].apparent_power)
+                if not np.isnan(ub).all():
+                    capacities[c, k] = ub
+
+        def _cluster_rule(m):
+            for t in self.TIMESTEPS:
+                for c in generators:
+                    (o, iin) = c
+                    edge = self.sources_inertia[c]
+                    flow = sum(self.flow[self.outflows[u][-1], t] for (u, _) in self.unit_clusters[c])
+                    self.cluster_flow_inertia_constraint.add((o, t), (
+                        self.cluster_commitment[o, iin, t]*(edge.apparent_power*edge.minimum_stable_operation)
+                        <= flow))
+                    self.cluster_inertia_flow_constraint.add((o, t), (
+                        self.cluster_commitment[o, iin, t] >= flow/edge.apparent_power))
+                for (c, k), ub in capacities.items():
+                    if np.isnan(ub[t]):
+                        continue
+                    flow = sum(self.flow[key, t] for key in self.cluster_flows[c][k])
+                    self.cluster_capacity_constraint.add((c[0], k, t), (
+                        flow <= self.cluster_commitment[c[0], c[1], t]*float(ub[t])))
+
+        self.cluster_flow_inertia_constraint = po.Constraint(
+            [(o, t) for t in self.TIMESTEPS for (o, iin) in generators], noruleinit=True)
+        self.cluster_inertia_flow_constraint = po.Constraint(
+            [(o, t) for t in self.TIMESTEPS for (o, iin) in generators], noruleinit=True)
+        self.cluster_capacity_constraint = po.Constraint(
+            [(c[0], k, t) for t in self.TIMESTEPS for (c, k) in capacities], noruleinit=True)
+        self.cluster_constraints_build = po.BuildAction(rule=_cluster_rule)
+
+    def _disaggregate_clusters(self):
+        """Sets the commitment and the flows of the units of all clusters
+
+        The first units of a cluster are committed according to the number
+        of online units. The summed flows of the cluster are split evenly
+        between the committed units.
+        """
+        for c in self.CLUSTERS:
+            members = self.unit_clusters[c]
+            for t in self.TIMESTEPS:
+                online = self.cluster_commitment[c[0], c[1], t].value
+                if online is None:
+                    continue
+                if abs(online - round(online)) > 1e-6:
+                    # relaxed commitment, nothing to disaggregate
+                    continue
+                online = int(round(online))
+                for k, (o, i) in enumerate(members):
+                    self.source_inertia[o, i, t].value = int(k < online)
+                for keys in getattr(self, 'cluster_flows', {}).get(c, []):
+                    total = sum(self.flow[key, t].value or 0 for key in keys)
+                    for k, key in enumerate(keys):
+                        self.flow[key, t].value = total / online if k < online else 0
+
     def _min_synchronous_inertia(self):
         """Sets an minimum limit of synchronous power system inertia
 
@@ -216,21 +499,27 @@ class Model(osm.Model):
 
         Parameters
         ----------
-        minimum_system_synchronous_inertia: numeric
+        minimum_system_synchronous_inertia: numeric or sequence
             Value used to create minimum system synchronous
-            inertia constraint
+            inertia constraint. The limit is stored in the mutable
+            parameter `min_synchronous_inertia_limit`.
 
         """
 
-        minSyncInertia = self.es.minimum_system_synchronous_inertia
+        self.min_synchronous_inertia_limit = po.Param(
+            self.TIMESTEPS, mutable=True, within=po.Reals,
+            initialize=dict(zip(self.TIMESTEPS, sequence_to_array(
+                self.es.minimum_system_synchronous_inertia, len(self.TIMESTEPS)).tolist())))
 
         # defin min synchronous inertia rule
         def _min_sync_inertia_rule(m):
+            synchronous = (set(self.es.sources_inertia('synchronous_generator')) |
+                           set(self.es.sources_inertia('synchronous_storage')))
+            actSyncInertia = self._inertia_sums(
+                [e for e in self.SOURCES_INERTIA if e in synchronous])
             for t in self.TIMESTEPS:
-                actSyncInertia = sum(self.source_inertia[o, i, t]* self.sources_inertia[o, i].moment_of_inertia[t] for (o, i) in self.SOURCES_INERTIA if self.sources_inertia[o,i].provision_type == 'synchronous_generator' or self.sources_inertia[o,i].provision_type == 'synchronous_storage')
-                expr = (actSyncInertia >= minSyncInertia)
-                if expr is not True:
-                    self.min_synchronous_inertia_constraint.add(t, expr)
+                expr = (actSyncInertia[t] >= self.min_synchronous_inertia_limit[t])
+                self.min_synchronous_inertia_constraint.add(t, expr)
 
         self.min_synchronous_inertia_constraint = po.Constraint(self.TIMESTEPS, noruleinit=True)
         self.min_synchronous_inertia_constraint_build = po.BuildAction(rule=_min_sync_inertia_rule)
@@ -242,21 +531,652 @@ class Model(osm.Model):
 
         Parameters
         ----------
-        minimum_system_inertia: numeric
+        minimum_system_inertia: numeric or sequence
             Value used to create minimum system synchronous
-            inertia constraint
+            inertia constraint. The limit is stored in the mutable
+            parameter `min_inertia_limit`.
 
         """
 
-        minInertia = self.es.minimum_system_inertia
+        self.min_inertia_limit = po.Param(
+            self.TIMESTEPS, mutable=True, within=po.Reals,
+            initialize=dict(zip(self.TIMESTEPS, sequence_to_array(
+                self.es.minimum_system_inertia, len(self.TIMESTEPS)).tolist())))
 
         # defin min synchronous inertia rule
         def _min_inertia_rule(m):
+            actInertia = self._inertia_sums(list(self.SOURCES_INERTIA))
             for t in self.TIMESTEPS:
-                actInertia = sum(self.source_inertia[o, i, t]* self.sources_inertia[o, i].moment_of_inertia[t] for (o, i) in self.SOURCES_INERTIA)
-                expr = (actInertia >= minInertia)
-                if expr is not True:
-                    self.min_inertia_constraint.add(t, expr)
+                expr = (actInertia[t] >= self.min_inertia_limit[t])
+                self.min_inertia_constraint.add(t, expr)
 
         self.min_inertia_constraint = po.Constraint(self.TIMESTEPS, noruleinit=True)
         self.min_inertia_constraint_build = po.BuildAction(rule=_min_inertia_rule)
+
+    def _min_area_synchronous_inertia(self):
+        r"""Sets minimum limits of the synchronous inertia of synchronous
+        areas
+
+        .. math:: \sum_{J\_sync, area} >= limit_{area}
+
+        Parameters
+        ----------
+        minimum_area_synchronous_inertia: dict
+            Values used to create one minimum synchronous inertia
+            constraint per area and timestep. The limits are stored in
+            the mutable parameter `min_area_synchronous_inertia_limit`
+            indexed by area and timestep.
+
+        """
+        self._area_inertia_constraint(
+            'min_area_synchronous_inertia', self.es.minimum_area_synchronous_inertia,
+            ('synchronous_generator', 'synchronous_storage'))
+
+    def _min_area_inertia(self):
+        r"""Sets minimum limits of the inertia of synchronous areas
+
+        .. math:: \sum_{J, area} >= limit_{area}
+
+        Parameters
+        ----------
+        minimum_area_inertia: dict
+            Values used to create one minimum inertia constraint per area
+            and timestep. The limits are stored in the mutable parameter
+            `min_area_inertia_limit` indexed by area and timestep.
+
+        """
+        self._area_inertia_constraint('min_area_inertia', self.es.minimum_area_inertia)
+
+    def _area_inertia_constraint(self, name, limits, provision_types=None):
+        """Adds the limit parameter `<name>_limit` and the constraint
+        `<name>_constraint` of area limits
+
+        The inertia sum of an area only contains the sources of the area,
+        so the constraints of all areas have as many terms as the minimum
+        inertia constraints of separate models of the areas.
+        """
+        n = len(self.TIMESTEPS)
+        areas = [a for a in self.AREAS if a in limits]
+        values = {a: sequence_to_array(limits[a], n).tolist() for a in areas}
+        index = [(a, t) for a in areas for t in self.TIMESTEPS]
+
+        members = {}
+        for a in areas:
+            members[a] = [e for e, edge in self.es.sources_inertia(area=a).items()
+                          if provision_types is None or edge.provision_type in provision_types]
+            if not members[a] and any(v > 0 for v in values[a]):
+                raise ValueError(
+                    "The {0} of area '{1}' can not be met, the area has no inertia "
+                    "sources.".format(name.replace('_', ' '), a))
+
+        limit = po.Param(index, mutable=True, within=po.Reals,
+                         initialize={(a, t): values[a][t] for (a, t) in index})
+        setattr(self, name + '_limit', limit)
+
+        def _area_inertia_rule(m):
+            for a in areas:
+                sums = self._inertia_sums(members[a])
+                for t in self.TIMESTEPS:
+                    constraint.add((a, t), sums[t] >= limit[a, t])
+
+        constraint = po.Constraint(index, noruleinit=True)
+        setattr(self, name + '_constraint', constraint)
+        setattr(self, name + '_constraint_build', po.BuildAction(rule=_area_inertia_rule))
+
+    def _inertia_sums(self, sources):
+        """Returns the moment of inertia provided by `sources` for every
+        timestep as linear expression
+
+        Clustered units contribute through the number of online units of
+        their cluster, presolved sources as constant. Sources and
+        timesteps without moment of inertia are skipped.
+        """
+        n = len(self.TIMESTEPS)
+        timesteps = list(self.TIMESTEPS)
+
+        def _moment_of_inertia(e):
+            return self.sources_inertia[e].moment_of_inertia
+
+        units = [e for e in sources if e not in self.CLUSTERED_SOURCES
+                 and e not in self.PRESOLVED_SOURCES]
+        sums = linear_sums_by_timestep(
+            self.source_inertia, units,
+            coefficient_matrix(units, _moment_of_inertia, n), timesteps,
+            constants=self._presolved_inertia(sources))
+
+        selected = set(sources)
+        clusters = [c for c in self.CLUSTERS if c in selected]
+        if clusters:
+            cluster_sums = linear_sums_by_timestep(
+                self.cluster_commitment, clusters,
+                coefficient_matrix(clusters, _moment_of_inertia, n), timesteps)
+            for t in timesteps:
+                sums[t] += cluster_sums[t]
+        return sums
+
+    def _presolved_inertia(self, sources):
+        """Returns the moment of inertia of the presolved sources among
+        `sources` for every timestep"""
+        n = len(self.TIMESTEPS)
+        presolved = [e for e in sources if e in self.PRESOLVED_SOURCES]
+        moment_of_inertia = coefficient_matrix(
+            presolved, lambda e: self.sources_inertia[e].moment_of_inertia, n)
+        commitment = coefficient_matrix(presolved, self.presolved_commitment.get, n)
+        return (moment_of_inertia * commitment).sum(axis=0)
+
+    def solve_relaxed(self, solver='cbc', threshold=0.5, **kwargs):
+        """Solves the model with a relax-and-round heuristic
+
+        1. All integer variables are relaxed and the LP is solved, which
+           gives a lower bound of the objective.
+        2. The commitment of the inertia sources is rounded with
+           `threshold`. Where the rounded commitment can not cover the
+           relaxed dispatch of the synchronous generators or violates a
+           minimum inertia limit, the sources with the highest relaxed
+           commitment are committed until it does.
+        3. The commitment is fixed and the dispatch is solved again.
+
+        The commitment is released again afterwards, the variables keep
+        the values of the last solve.
+
+        Parameters
+        ----------
+        solver : str
+            Solver to be used
+        threshold : float
+            Relaxed commitments from `threshold` on are rounded up
+        **kwargs
+            Keyword arguments passed to :meth:`solve`
+
+        Returns
+        -------
+        dict
+            Termination condition, objective value, lower bound of the
+            relaxation, relative gap and number of commitments added in
+            the repair of the rounded commitment
+
+        """
+        if not 0 <= threshold <= 1:
+            raise ValueError("The rounding threshold has to be between 0 and 1.")
+
+        relaxed = po.ComponentMap()
+        for var in self.component_data_objects(po.Var):
+            if not var.fixed and not var.is_continuous():
+                relaxed[var] = var.domain
+                var.domain = _relaxed_domain(var.domain)
+
+        commitment = [v for v in self.source_inertia.values() if v in relaxed]
+        commitment += [v for v in self.cluster_commitment.values() if v in relaxed]
+        try:
+            results = self.solve(solver=solver, **kwargs)
+            if str(results.solver.termination_condition) != 'optimal':
+                return {'termination_condition': str(results.solver.termination_condition),
+                        'objective': None, 'lower_bound': None, 'gap': None, 'repaired': 0}
+            lower_bound = po.value(self.objective)
+
+            lp_values = po.ComponentMap((v, v.value) for v in commitment)
+            for v in commitment:
+                v.value = math.floor(lp_values[v]) + (lp_values[v] - math.floor(lp_values[v]) >= threshold)
+            repaired = self._repair_commitment(lp_values)
+
+            for v in relaxed:
+                if v not in lp_values:
+                    v.domain = relaxed[v]
+            for v in commitment:
+                v.fix()
+
+            results = self.solve(solver=solver, **kwargs)
+        finally:
+            for v in commitment:
+                v.unfix()
+            for v, domain in relaxed.items():
+                v.domain = domain
+
+        objective = po.value(self.objective, exception=False)
+        termination_condition = str(results.solver.termination_condition)
+        gap = None
+        if objective is not None and termination_condition == 'optimal':
+            gap = (objective - lower_bound) / max(abs(objective), 1e-10)
+        return {'termination_condition': termination_condition, 'objective': objective,
+                'lower_bound': lower_bound, 'gap': gap, 'repaired': repaired}
+
+    def _repair_commitment(self, lp_values):
+        """Commits inertia sources until the rounded commitment covers the
+        relaxed dispatch of the synchronous generators and the minimum
+        inertia limits hold
+
+        Sources are committed in order of their relaxed commitment,
+        `lp_values` holds the relaxed values of the unfixed commitment
+        variables. Returns the number of added commitments.
+        """
+        synchronous = ('synchronous_generator', 'synchronous_storage')
+
+        sources = []
+        for (o, i) in self.COMMITMENT_SOURCES:
+            if (o, i) in self.CLUSTERED_SOURCES:
+                continue
+            sources.append(((o, i), self.source_inertia, 1))
+        for (o, i) in self.CLUSTERS:
+            sources.append(((o, i), self.cluster_commitment, len(self.unit_clusters[o, i])))
+
+        # dispatchable power of an online unit and relaxed dispatch
+        n = len(self.TIMESTEPS)
+        capacity, dispatch = {}, np.zeros(n)
+        generators = [c for c in sources
+                      if self.sources_inertia[c[0]].provision_type == 'synchronous_generator']
+        for e, var, size in generators:
+            units = self.unit_clusters.get(e, [e])
+            ub = flow_bounds(self.flows[self.outflows[e[0]][-1]], n)[1]
+            capacity[e] = np.fmin(ub, self.sources_inertia[e].apparent_power)
+            for (o, _) in units:
+                dispatch += [self.flow[self.outflows[o][-1], t].value or 0 for t in self.TIMESTEPS]
+
+        def _capacity(e, t):
+            return capacity[e][t]
+
+        def _moment_of_inertia(e, t):
+            return self.sources_inertia[e].moment_of_inertia[t]
+
+        # candidates, their contribution, the target and the presolved
+        # contribution of every requirement
+        requirements = [(generators, _capacity, dispatch.__getitem__, np.zeros(n))]
+        if hasattr(self, 'min_synchronous_inertia_limit'):
+            requirements.append((
+                [c for c in sources if self.sources_inertia[c[0]].provision_type in synchronous],
+                _moment_of_inertia, lambda t: self.min_synchronous_inertia_limit[t].value,
+                np.zeros(n)))
+        if hasattr(self, 'min_inertia_limit'):
+            requirements.append((sources, _moment_of_inertia,
+                                 lambda t: self.min_inertia_limit[t].value,
+                                 self._presolved_inertia(self.PRESOLVED_SOURCES)))
+        for name, provision_types in (('min_area_synchronous_inertia', synchronous),
+                                      ('min_area_inertia', None)):
+            limit = getattr(self, name + '_limit', None)
+            if limit is None:
+                continue
+            for a in sorted({a for a, _ in limit}, key=str):
+                candidates = [c for c in sources if self.sources_inertia[c[0]].area == a
+                              and (provision_types is None or
+                                   self.sources_inertia[c[0]].provision_type in provision_types)]
+                presolved = [e for e in self.PRESOLVED_SOURCES if self.sources_inertia[e].area == a]
+                requirements.append((candidates, _moment_of_inertia,
+                                     lambda t, a=a, limit=limit: limit[a, t].value,
+                                     self._presolved_inertia(presolved)))
+
+        repaired = 0
+        for t in self.TIMESTEPS:
+            for candidates, coefficient, target, presolved in requirements:
+                target = target(t)
+                total = presolved[t] + sum(var[e[0], e[1], t].value * coefficient(e, t)
+                                           for e, var, _ in candidates)
+                # most committed in the relaxation first, then largest contribution
+                ordered = sorted(candidates, key=lambda c: (
+                    -lp_values.get(c[1][c[0][0], c[0][1], t], 0), -coefficient(c[0], t)))
+                for e, var, size in ordered:
+                    v = var[e[0], e[1], t]
+                    while v in lp_values and v.value < size and total < target - 1e-9:
+                        v.value += 1
+                        total += coefficient(e, t)
+                        repaired += 1
+        return repaired
+
+    def set_inertia_limits(self, minimum_system_inertia=None,
+                           minimum_system_synchronous_inertia=None,
+                           minimum_area_inertia=None, minimum_area_synchronous_inertia=None):
+        """Updates the inertia limits of the built model in place
+
+        Only the right hand sides of the minimum inertia constraints are
+        changed, the model is not rebuilt.
+
+        Parameters
+        ----------
+        minimum_system_inertia : numeric or sequence, optional
+            New minimum system inertia
+        minimum_system_synchronous_inertia : numeric or sequence, optional
+            New minimum system synchronous inertia
+        minimum_area_inertia : dict, optional
+            New minimum inertia of areas, numeric or sequence indexed by
+            the area. Areas which are not given keep their limits.
+        minimum_area_synchronous_inertia : dict, optional
+            New minimum synchronous inertia of areas
+
+        Returns
+        -------
+        list
+            Constraints whose right hand side changed
+
+        """
+        changed = []
+        n = len(self.TIMESTEPS)
+        for value, name in ((minimum_system_inertia, 'min_inertia'),
+                            (minimum_system_synchronous_inertia, 'min_synchronous_inertia'),
+                            (minimum_area_inertia, 'min_area_inertia'),
+                            (minimum_area_synchronous_inertia, 'min_area_synchronous_inertia')):
+            if value is None:
+                continue
+            if not hasattr(self, name + '_limit'):
+                raise ValueError("The model was built without a {0} constraint.".format(
+                    name.replace('_', ' ')))
+            limit = getattr(self, name + '_limit')
+            constraint = getattr(self, name + '_constraint')
+            if name.startswith('min_area'):
+                updates = []
+                for a, value_a in value.items():
+                    if (a, self.TIMESTEPS.first()) not in limit:
+                        raise ValueError("The model was built without a {0} constraint "
+                                         "for area '{1}'.".format(name.replace('_', ' '), a))
+                    updates.extend(((a, t), v) for t, v in zip(
+                        self.TIMESTEPS, sequence_to_array(value_a, n).tolist()))
+            else:
+                updates = zip(self.TIMESTEPS, sequence_to_array(value, n).tolist())
+            for index, value_t in updates:
+                if value_t < 0:
+                    raise ValueError("The minimum system inertia can not be below zero.")
+                if limit[index].value != value_t:
+                    limit[index] = value_t
+                    if index in constraint:
+                        changed.append(constraint[index])
+        return changed
+
+    def sweep_inertia_limits(self, values, limit='minimum_system_inertia',
+                             solver='cbc', persistent=True, keep_results=False, **kwargs):
+        """Solves the model for a series of inertia limits
+
+        The limit is updated in place for each value and the model is
+        re-solved. A persistent solver interface is used if one is
+        available for `solver`, otherwise the model is handed over to
+        the solver again with :meth:`solve`.
+
+        Parameters
+        ----------
+        values : iterable
+            Values of the limit, each numeric or a sequence (a dict indexed
+            by the area for area limits)
+        limit : str
+            'minimum_system_inertia', 'minimum_system_synchronous_inertia',
+            'minimum_area_inertia' or 'minimum_area_synchronous_inertia'
+        solver : str
+            Solver to be used
+        persistent : bool
+            Use a persistent solver interface if available
+        keep_results : bool
+            Keep the results of each solve
+        **kwargs
+            Keyword arguments passed to :meth:`solve` if no persistent
+            interface is used
+
+        Returns
+        -------
+        list of dict
+            Limit, termination condition and objective value (and results)
+            of each solve. The objective value is None and the results
+            are left out if the termination condition is not optimal.
+
+        """
+        if limit not in ('minimum_system_inertia', 'minimum_system_synchronous_inertia',
+                         'minimum_area_inertia', 'minimum_area_synchronous_inertia'):
+            raise ValueError("Unknown inertia limit '{0}'".format(limit))
+
+        interface, opt = _persistent_solver(solver) if persistent else (None, None)
+        sweep = []
+        for value in values:
+            changed = self.set_inertia_limits(**{limit: value})
+            if interface == 'appsi':
+                results = opt.solve(self)
+                termination_condition = str(results.termination_condition)
+            elif interface == 'persistent':
+                if not opt._pyomo_model is self:
+                    opt.set_instance(self)
+                else:
+                    for constraint in changed:
+                        opt.remove_constraint(constraint)
+                        opt.add_constraint(constraint)
+                results = opt.solve()
+                termination_condition = str(results.solver.termination_condition)
+            else:
+                results = self.solve(solver=solver, **kwargs)
+                termination_condition = str(results.solver.termination_condition)
+            self._disaggregate_clusters()
+
+            # the variables keep the values of the previous point if the
+            # solver did not find an optimal solution
+            optimal = termination_condition == 'optimal'
+            point = {'limit': value, 'termination_condition': termination_condition,
+                     'objective': po.value(self.objective, exception=False) if optimal else None}
+            if keep_results and optimal:
+                point['results'] = self.results()
+            sweep.append(point)
+        return sweep
+
+
+    def start_values(self, offset=0, first=None, last=None):
+        """Returns the values of all time indexed variables keyed by
+        node labels
+
+        Parameters
+        ----------
+        offset : int
+            Absolute timestep of the first timestep of the model, e.g. of
+            a window of a rolling horizon
+        first, last : int, optional
+            Only values of the absolute timesteps `first` to `last`
+            (exclusive)
+
+        Returns
+        -------
+        dict
+            Values keyed by `(variable name, labels, absolute timestep)`,
+            e.g. `('flow', ('gen', 'bel'), 3)`, see :meth:`set_start_values`
+
+        """
+        values = {}
+        for var in self.component_objects(po.Var):
+            name = var.getname(fully_qualified=True)
+            for index, data in var.items():
+                if not isinstance(index, tuple) or not isinstance(index[-1], int):
+                    continue
+                t = index[-1] + offset
+                if ((first is None or first <= t) and (last is None or t < last)
+                        and data.value is not None):
+                    values[name, tuple(str(k) for k in index[:-1]), t] = data.value
+        return values
+
+    def set_start_values(self, values, offset=0):
+        """Sets the start values of all unfixed time indexed variables
+
+        The number of online units of a cluster is set to the sum of the
+        start values of its units if it is not given itself.
+
+        Parameters
+        ----------
+        values : dict
+            Values keyed by `(variable name, labels, absolute timestep)`
+            as returned by :meth:`start_values`
+        offset : int
+            Absolute timestep of the first timestep of the model
+
+        Returns
+        -------
+        dict
+            Number of matched values by variable name
+
+        """
+        matched = {}
+        if not values:
+            return matched
+        for var in self.component_objects(po.Var):
+            name = var.getname(fully_qualified=True)
+            for index, data in var.items():
+                if data.fixed or not isinstance(index, tuple) or not isinstance(index[-1], int):
+                    continue
+                key = (name, tuple(str(k) for k in index[:-1]), index[-1] + offset)
+                if key in values:
+                    data.value = values[key]
+                    matched[name] = matched.get(name, 0) + 1
+
+        for c, members in self.unit_clusters.items():
+            for t in self.TIMESTEPS:
+                if ('cluster_commitment', (str(c[0]), str(c[1])), t + offset) in values:
+                    continue
+                keys = [('source_inertia', (str(o), str(i)), t + offset) for (o, i) in members]
+                if all(key in values for key in keys):
+                    self.cluster_commitment[c, t].value = int(round(sum(values[key] for key in keys)))
+                    matched['cluster_commitment'] = matched.get('cluster_commitment', 0) + 1
+
+        if matched:
+            self.warm_started = True
+        return matched
+
+    def warm_start(self, source, offset=0):
+        """Sets the start values of the commitment and the flows from a
+        previous solution
+
+        Values are mapped onto `source_inertia` and `flow` by the labels
+        of the nodes and by the position of the timesteps, so the
+        previous solution may stem from another model of an energy system
+        with the same labels. The values are passed to the solver as MIP
+        start by :meth:`solve`.
+
+        Parameters
+        ----------
+        source : Model, dict or DataFrame
+            Solved model (all of its time indexed variables are used),
+            results as returned by :meth:`results`, or columnar result
+            tables with the columns `source`, `target`, `timestep` and
+            `source_inertia` or `flow`, see
+            :func:`opinmod.export_inertia.result_tables`. A dict of
+            tables is accepted as well.
+        offset : int
+            Timestep of the previous solution which corresponds to the
+            first timestep of this model
+
+        Returns
+        -------
+        dict
+            Number of matched (unfixed) variables by variable name and the
+            number of `values` taken from `source`
+
+        """
+        if isinstance(source, Model):
+            values = source.start_values()
+        elif isinstance(source, pd.DataFrame):
+            values = _table_values([source])
+        elif all(isinstance(v, pd.DataFrame) for v in source.values()):
+            values = _table_values(source.values())
+        else:
+            values = _result_values(source)
+        report = self.set_start_values(values, offset=offset)
+        report['values'] = len(values)
+        return report
+
+
+def _result_values(results):
+    """Returns the flows and commitments of results keyed like
+    :meth:`Model.start_values`"""
+    values = {}
+    for (o, i), result in results.items():
+        if i is None:
+            continue
+        sequences = result['sequences']
+        for name in ('flow', 'source_inertia'):
+            if name in sequences:
+                labels = (str(o), str(i))
+                for t, value in enumerate(sequences[name].values.tolist()):
+                    if value == value:
+                        values[name, labels, t] = value
+    return values
+
+
+def _table_values(tables):
+    """Returns the flows and commitments of columnar result tables keyed
+    like :meth:`Model.start_values`"""
+    values = {}
+    for table in tables:
+        for name in ('flow', 'source_inertia'):
+            if not {'source', 'target', 'timestep', name} <= set(table.columns):
+                continue
+            values.update(zip(zip([name] * len(table),
+                                  zip(table['source'].astype(str), table['target'].astype(str)),
+                                  table['timestep'].astype(int).tolist()),
+                              table[name].tolist()))
+    return values
+
+
+def _relaxed_domain(domain):
+    """Returns the continuous domain of a relaxed integer variable"""
+    if domain is po.Binary:
+        return po.UnitInterval
+    elif domain is po.NonNegativeIntegers:
+        return po.NonNegativeReals
+    return po.Reals
+
+
+def _inertia_signature(edge, length):
+    """Returns the attributes of an inertia source which identical units share"""
+    return (edge.provision_type, edge.area, edge.apparent_power,
+            sequence_to_array(edge.inertia_constant, length).tobytes(),
+            edge.minimum_stable_operation,
+            sequence_to_array(edge.inertia_costs, length).tobytes(),
+            sequence_to_array(edge.moment_of_inertia, length).tobytes())
+
+
+def _unit_flows(members, flows):
+    """Returns the flow keys of all units ordered by direction and bus"""
+    positions = {}
+    for (u, _) in members:
+        for (o, i) in flows:
+            if u is o:
+                positions.setdefault(('out', i), []).append((o, i))
+            elif u is i:
+                positions.setdefault(('in', o), []).append((o, i))
+    return [positions[p] for p in sorted(positions, key=lambda p: (p[0], str(p[1])))]
+
+
+def _unit_signature(node, flows, length):
+    """Returns the attributes of the flows of a unit which identical units
+    share or None if the unit can not be clustered"""
+    if not (isinstance(node, osn.Source) or type(node) is Transformer):
+        return None
+    signature = []
+    for (o, i), flow in flows.items():
+        if node is o:
+            position = ('out', i)
+        elif node is i:
+            position = ('in', o)
+        else:
+            continue
+        if (flow.investment or flow.nonconvex or flow.integer or flow.fix[0] is not None
+                or flow.summed_max is not None or flow.summed_min is not None
+                or flow.positive_gradient['ub'][0] is not None
+                or flow.negative_gradient['ub'][0] is not None):
+            return None
+        lb, ub, _ = flow_bounds(flow, length)
+        if np.any(lb > 0):
+            return None
+        signature.append((position, flow.nominal_value, ub.tobytes(),
+                          sequence_to_array(flow.variable_costs, length).tobytes()))
+    if type(node) is Transformer:
+        signature.append(tuple(sorted(
+            (str(bus), sequence_to_array(cf, length).tobytes())
+            for bus, cf in node.conversion_factors.items())))
+    return tuple(sorted(signature, key=str))
+
+
+def _persistent_solver(solver):
+    """Returns the type and an instance of a persistent interface of
+    `solver` or (None, None) if none is available"""
+    try:
+        from pyomo.contrib import appsi
+        for name in dir(appsi.solvers):
+            if name.lower() == solver.lower():
+                opt = getattr(appsi.solvers, name)()
+                if opt.available():
+                    return 'appsi', opt
+    except ImportError:
+        pass
+
+    if solver + '_persistent' in list(po.SolverFactory):
+        opt = po.SolverFactory(solver + '_persistent')
+        if opt.available(exception_flag=False):
+            return 'persistent', opt
+    return None, None
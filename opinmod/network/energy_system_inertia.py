@@ -11,15 +11,33 @@ https://github.com/oemof/oemof-solph
 """
 
 from opinmod.network import inertia_inertia
+from opinmod.plumbing_inertia import ArraySequence, sequence_to_array
 from opinmod.groupings_inertia import GROUPINGS
 
 import oemof.network.energy_system as one
+import oemof.network.network as onn
 import oemof.solph.network as osn
 
+import numpy as np
+import pandas as pd
+
+import copy
+
 class EnergySystem(one.EnergySystem):
     """
         A variant of :class:`EnergySystem
         <oemof.solph.network.EnergySystem>` specially tailored to OpInMod.
+
+    Parameters
+    ----------
+    minimum_area_inertia : dict, optional
+        Minimum inertia of synchronous areas, numeric or sequence indexed
+        by the area. Only the inertia sources of an area
+        (:attr:`Inertia.area <opinmod.network.inertia_inertia.Inertia>`)
+        contribute to its limit.
+    minimum_area_synchronous_inertia : dict, optional
+        Minimum synchronous inertia of synchronous areas, numeric or
+        sequence indexed by the area
     """
     def __init__(self, *args, **kwargs):
         """
@@ -30,12 +48,23 @@ class EnergySystem(one.EnergySystem):
 
         self.minimum_system_inertia = kwargs.get("minimum_system_inertia")
 
+        self.minimum_area_synchronous_inertia = kwargs.get("minimum_area_synchronous_inertia")
+
+        self.minimum_area_inertia = kwargs.get("minimum_area_inertia")
+
         self.emulated_inertia_constant = kwargs.get("emulated_inertia_constant")
 
+        # number of periods each timestep represents, e.g. after aggregation
+        self.period_weighting = kwargs.get("period_weighting")
+
         self._check_input()
 
+        self._user_groupings = kwargs.get('groupings', [])
         kwargs['groupings'] = (GROUPINGS + kwargs.get('groupings', []))
 
+        # edge indexes, updated for the nodes added since the last access
+        self._clear_indexes()
+
         super().__init__(*args, **kwargs)
 
     def _check_input(self):
@@ -58,7 +87,7 @@ class EnergySystem(one.EnergySystem):
         # checks, if minimum inerita is above zero
         if self.minimum_system_synchronous_inertia is None:
             None
-        elif self.minimum_system_synchronous_inertia < 0:
+        elif np.any(np.asarray(self.minimum_system_synchronous_inertia) < 0):
             raise ValueError("The minimum system synchronous inertia can not be below zero.")
         else:
             None
@@ -66,24 +95,227 @@ class EnergySystem(one.EnergySystem):
         # checks, if minimum inerita is above zero
         if self.minimum_system_inertia is None:
             None
-        elif self.minimum_system_inertia < 0:
+        elif np.any(np.asarray(self.minimum_system_inertia) < 0):
             raise ValueError("The minimum system inertia can not be below zero.")
         else:
             None
 
-    def flows(self):
-        return {
-            (source, target): source.outputs[target]
-            for source in self.nodes
-            for target in source.outputs
-            if isinstance(source.outputs[target], osn.Flow)
-        }
-
-
-    def sources_inertia(self):
-        return {
-            (source, target): source.outputs[target]
-            for source in self.nodes
-            for target in source.outputs
-            if isinstance(source.outputs[target], inertia_inertia.Inertia)
-        }
+        # checks, if the area limits are given per area and above zero
+        for limits in (self.minimum_area_synchronous_inertia, self.minimum_area_inertia):
+            if limits is None:
+                None
+            elif not isinstance(limits, dict):
+                raise ValueError("The minimum area inertia has to be given as dict indexed by the area.")
+            elif any(np.any(np.asarray(limit) < 0) for limit in limits.values()):
+                raise ValueError("The minimum area inertia can not be below zero.")
+            else:
+                None
+
+    def _clear_indexes(self):
+        self._indexed_nodes = set()
+        self._first_unindexed_node_index = 0
+        self._flows = {}
+        self._flows_by_type = {}
+        self._sources_inertia = {}
+        self._inertia_by_provision_type = {}
+        self._inertia_by_area = {}
+        self._outflows = {}
+
+    def _update_indexes(self):
+        """Adds the edges of all nodes added since the last update to the
+        indexes
+
+        Like the groups of an energy system, the indexes are updated lazily,
+        so edges connected to a node after it was added are indexed as long
+        as the indexes have not been accessed in between.
+        """
+        new = self.nodes[self._first_unindexed_node_index:]
+        if not new:
+            return
+        self._first_unindexed_node_index = len(self.nodes)
+        edges = [(source, target) for source in new for target in source.outputs]
+        # inputs from nodes which have been indexed before
+        edges += [(source, target) for target in new for source in target.inputs
+                  if source in self._indexed_nodes]
+        self._indexed_nodes.update(new)
+
+        for (source, target) in edges:
+            edge = source.outputs[target]
+            if isinstance(edge, osn.Flow):
+                self._flows[source, target] = edge
+                self._flows_by_type.setdefault(type(edge), {})[source, target] = edge
+                self._outflows.setdefault(source, []).append((source, target))
+            elif isinstance(edge, inertia_inertia.Inertia):
+                self._sources_inertia[source, target] = edge
+                self._inertia_by_provision_type.setdefault(
+                    edge.provision_type, {})[source, target] = edge
+                self._inertia_by_area.setdefault(edge.area, {})[source, target] = edge
+
+    def reindex(self):
+        """Rebuilds the edge indexes
+
+        Needed if edges are connected, replaced or removed between nodes
+        which have already been indexed, or if the provision type or the
+        area of an inertia source is changed.
+        """
+        self._clear_indexes()
+        self._update_indexes()
+
+    def flows(self, flow_type=None):
+        """Returns the flows of the energy system
+
+        Parameters
+        ----------
+        flow_type : type, optional
+            Only flows which are instances of `flow_type`
+
+        Returns
+        -------
+        dict
+            Flows indexed by `(source, target)`. Without `flow_type`, the
+            maintained index is returned, which must not be modified.
+
+        """
+        self._update_indexes()
+        if flow_type is None:
+            return self._flows
+        return {key: edge for cls, edges in self._flows_by_type.items()
+                if issubclass(cls, flow_type) for key, edge in edges.items()}
+
+    def sources_inertia(self, provision_type=None, area=None):
+        """Returns the inertia sources of the energy system
+
+        Parameters
+        ----------
+        provision_type : str, optional
+            Only inertia sources of this provision type
+        area : hashable, optional
+            Only inertia sources of this synchronous area
+
+        Returns
+        -------
+        dict
+            Inertia sources indexed by `(source, target)`. If at most one
+            filter is given, the maintained index is returned, which must
+            not be modified.
+
+        """
+        self._update_indexes()
+        if area is None:
+            if provision_type is None:
+                return self._sources_inertia
+            return self._inertia_by_provision_type.get(provision_type, {})
+        sources = self._inertia_by_area.get(area, {})
+        if provision_type is None:
+            return sources
+        return {key: edge for key, edge in sources.items()
+                if edge.provision_type == provision_type}
+
+    def areas(self):
+        """Returns the synchronous areas of all inertia sources and area
+        limits, sources without area are not part of any area"""
+        self._update_indexes()
+        areas = set(self._inertia_by_area)
+        for limits in (self.minimum_area_synchronous_inertia, self.minimum_area_inertia):
+            areas.update(limits or {})
+        areas.discard(None)
+        return sorted(areas, key=str)
+
+    def outflows(self):
+        """Returns the keys `(source, target)` of the outgoing flows of every
+        node, indexed by the source node
+
+        The maintained index is returned, which must not be modified.
+        """
+        self._update_indexes()
+        return self._outflows
+
+    def select_timesteps(self, timesteps):
+        """Returns a copy of the energy system restricted to `timesteps`
+
+        All nodes and edges are copied. Every time dependent attribute
+        with one value per timestep (lists, arrays and series) is reduced
+        to the selected timesteps,
+        so the copy can be used to build a model of a part of the time
+        horizon, e.g. a window of a rolling horizon.
+
+        Parameters
+        ----------
+        timesteps : iterable of int
+            Positions of the selected timesteps in the time index
+
+        Returns
+        -------
+        EnergySystem
+
+        """
+        timesteps = np.asarray(timesteps, dtype=int)
+        length = len(self.timeindex)
+
+        # copy the graph, edges are reconnected to the copied nodes
+        nodes = {}
+        for n in self.nodes:
+            nodes[n] = copy.copy(n)
+            nodes[n]._in_edges = set()
+            nodes[n]._inputs = onn.Inputs(nodes[n])
+            nodes[n]._outputs = onn.Outputs(nodes[n])
+        objects = list(nodes.values())
+        for n in self.nodes:
+            for target, edge in n.outputs.items():
+                edge = copy.copy(edge)
+                edge._label = onn.Edge.Label(nodes[n], nodes[target])
+                nodes[n].outputs[nodes[target]] = edge
+                objects.append(edge)
+
+        def _select(value):
+            if isinstance(value, pd.Series) and len(value) == length:
+                return value.iloc[timesteps].reset_index(drop=True)
+            elif isinstance(value, np.ndarray) and value.ndim == 1 and len(value) == length:
+                return value[timesteps]
+            elif isinstance(value, list) and len(value) == length:
+                return [value[t] for t in timesteps]
+            elif isinstance(value, ArraySequence):
+                selected = _select(value.default)
+                return value if selected is value.default else ArraySequence(selected)
+            elif isinstance(value, dict):
+                return {nodes.get(k, k) if isinstance(k, onn.Node) else k: _select(v)
+                        for k, v in value.items()}
+            elif type(value).__module__ == 'oemof.solph.options':
+                value = copy.copy(value)
+                objects.append(value)
+            return value
+
+        for obj in objects:
+            for attr, value in _attributes(obj).items():
+                if attr.startswith('_'):
+                    continue
+                selected = _select(value)
+                if selected is not value:
+                    setattr(obj, attr, selected)
+
+        timeincrement = self.timeincrement
+        if timeincrement is None:
+            timeincrement = self.timeindex.freq.nanos / 3.6e12
+
+        es = type(self)(timeindex=self.timeindex[timesteps],
+                        timeincrement=sequence_to_array(timeincrement, length)[timesteps].tolist(),
+                        nominal_grid_frequency=self.nominal_grid_frequency,
+                        minimum_system_synchronous_inertia=_select(self.minimum_system_synchronous_inertia),
+                        minimum_system_inertia=_select(self.minimum_system_inertia),
+                        minimum_area_synchronous_inertia=_select(self.minimum_area_synchronous_inertia),
+                        minimum_area_inertia=_select(self.minimum_area_inertia),
+                        emulated_inertia_constant=self.emulated_inertia_constant,
+                        period_weighting=_select(self.period_weighting),
+                        groupings=self._user_groupings)
+        es.add(*nodes.values())
+        return es
+
+
+def _attributes(obj):
+    """Returns the instance attributes of `obj` as dict"""
+    attributes = dict(getattr(obj, '__dict__', {}))
+    for cls in type(obj).__mro__:
+        for attr in getattr(cls, '__slots__', ()):
+            if hasattr(obj, attr):
+                attributes[attr] = getattr(obj, attr)
+    return attributes
@@ -8,8 +8,10 @@
 """
 
 import oemof.network.network as onn
-from oemof.solph.plumbing import sequence
 
+from opinmod.plumbing_inertia import ArraySequence
+
+import numpy as np
 import math
 
 
@@ -21,30 +23,40 @@ class Inertia(onn.Edge):
 
     Parameters
     ----------
-    inertia_constant: numeric, :math: `H_g`
+    inertia_constant: numeric or iterable, :math: `H_g`
     apparent_power: numeric, :math: `S_g`
     provision_type: string
-    inertia_costs: numeric, :math: `c_{inertia}`
-    moment_of_inertia: numeric, :math: `J_g`
+    inertia_costs: numeric or iterable, :math: `c_{inertia}`
+    moment_of_inertia: numeric or iterable, :math: `J_g`
     minimum_stable_operation: numeric
     inertia_power_share: numeric
+    area: hashable, optional
+        Synchronous area of the inertia source, e.g. 'continental'. Sources
+        of an area are subject to the area limits of the energy system,
+        see :class:`~opinmod.network.energy_system_inertia.EnergySystem`.
 
     Notes
     -----
+    The time dependent attributes `inertia_costs` and `moment_of_inertia`
+    (and `inertia_constant` of wind sources or if given per timestep) are
+    stored as :class:`~opinmod.plumbing_inertia.ArraySequence`, i.e. as
+    contiguous float arrays or as scalars broadcast to all timesteps.
+
     The following sets, variables, constraints and objective parts are created
      * :py:class:`~opinmod.blocks.inertia_inertia.Inertia`
 
     """
 
-    def __init__(self, inertia_constant=0, apparent_power=0, provision_type=None, inertia_costs=0, moment_of_inertia=0, minimum_stable_operation=0, inertia_power_share=0):
+    def __init__(self, inertia_constant=0, apparent_power=0, provision_type=None, inertia_costs=0, moment_of_inertia=0, minimum_stable_operation=0, inertia_power_share=0, area=None):
         super().__init__()
-        self.inertia_constant = inertia_constant
+        self.inertia_constant = _unwrap(inertia_constant)
         self.apparent_power = apparent_power
         self.provision_type = provision_type
-        self.inertia_costs = inertia_costs
-        self.moment_of_inertia = moment_of_inertia
+        self.inertia_costs = _unwrap(inertia_costs)
+        self.moment_of_inertia = _unwrap(moment_of_inertia)
         self.minimum_stable_operation = minimum_stable_operation
         self.inertia_power_share = inertia_power_share
+        self.area = area
 
         self._check_input()
         self._calculations()
@@ -53,15 +65,17 @@ class Inertia(onn.Edge):
     def _check_input(self):
         """Function to check validity of input
 
+        Time dependent values are checked for all timesteps at once.
+
         """
         # check validity of input value - inertia constant
-        if self.inertia_constant is not None and self.inertia_constant < 0:
+        if _below(self.inertia_constant, 0):
             raise ValueError("The inertia constant can not be below 0.")
         else:
             None
 
         # check validity of input value - apparent power
-        if self.apparent_power is not None and self.apparent_power < 0:
+        if _below(self.apparent_power, 0):
             raise ValueError("The machines apparent power can not be below 0.")
         else:
             None
@@ -75,7 +89,7 @@ class Inertia(onn.Edge):
             raise ValueError("Unknown provision type")
 
         # check validity of input value - moment of inertia
-        if self.moment_of_inertia is not None and self.moment_of_inertia < 0:
+        if _below(self.moment_of_inertia, 0):
             raise ValueError("The machines moment of inertia can not be below 0.")
         else:
             None
@@ -90,6 +104,9 @@ class Inertia(onn.Edge):
     def _calculations(self):
         """Function to calculate moment of inertia
 
+        An inertia constant per timestep results in a moment of inertia per
+        timestep.
+
         """
 
         if self.provision_type == 'synchronous_generator' or self.provision_type == 'synchronous_storage':
@@ -108,22 +125,23 @@ class Inertia(onn.Edge):
         """Function to create sequences
 
         """
-        if len([self.inertia_costs]) == 1:
-            self.inertia_costs = sequence(self.inertia_costs)
-        else:
-            raise ValueError("Check length of attribute 'inertia_costs' ")
+        self.inertia_costs = ArraySequence(self.inertia_costs)
+        self.moment_of_inertia = ArraySequence(self.moment_of_inertia)
 
-        if len([self.moment_of_inertia]) == 1:
-            self.moment_of_inertia = sequence(self.moment_of_inertia)
+        if self.provision_type == 'synthetic_wind' or isinstance(self.inertia_constant, np.ndarray):
+            self.inertia_constant = ArraySequence(self.inertia_constant)
         else:
-            raise ValueError("Check length of attribute 'moment_of_inertia' ")
-
-        if self.provision_type == 'synthetic_wind':
-            self.inertia_constant = sequence(self.inertia_constant)
-        elif self.provision_type == 'synchronous_generator' or self.provision_type == 'synchronous_storage' or self.provision_type == 'synthetic_storage' or self.provision_type == 'none':
             None
-        else:
-            raise ValueError("Check length of attribute 'inertia_constant' and type of provision")
 
     def constraint_group(self):
         pass
+
+
+def _unwrap(value):
+    """Returns scalars as they are and time dependent values as float array"""
+    return ArraySequence(value).default
+
+
+def _below(value, bound):
+    """Whether any value is below `bound`, `None` is never below"""
+    return value is not None and bool(np.any(np.asarray(value) < bound))
@@ -0,0 +1,139 @@
+## Copyright 2021 Henning Thiesen
+
+## OpInMod is released under the open source MIT License, see
+## https://github.com/hnnngt/OpInMod/blob/main/LICENSE
+
+"""Plumbing of time dependent attributes as NumPy arrays.
+
+"""
+
+from oemof.solph import plumbing as osp
+
+import numpy as np
+
+
+class ArraySequence(object):
+    """Time dependent attribute backed by a contiguous float array
+
+    Scalars are stored as they are and broadcast lazily, i.e. every
+    timestep returns the scalar. Iterables are stored as one-dimensional
+    float array. Values are accessed like oemof sequences by timestep,
+    :func:`sequence_to_array` returns them in bulk.
+
+    Parameters
+    ----------
+    values : numeric, iterable, oemof sequence or ArraySequence
+        Value of all timesteps or one value per timestep
+
+    Attributes
+    ----------
+    default : numeric or array
+        The scalar or the array of values
+
+    """
+
+    __slots__ = ('default',)
+
+    def __init__(self, values):
+        if isinstance(values, (ArraySequence, osp._Sequence)):
+            values = values.default
+        if values is None or np.ndim(values) == 0:
+            self.default = values
+        else:
+            values = np.ascontiguousarray(values, dtype=float)
+            if values.ndim != 1:
+                raise ValueError("Time dependent values have to be one-dimensional.")
+            self.default = values
+
+    @property
+    def is_scalar(self):
+        """Whether a single value is broadcast to all timesteps"""
+        return not isinstance(self.default, np.ndarray)
+
+    def __getitem__(self, t):
+        if self.is_scalar:
+            return self.default
+        return float(self.default[t])
+
+    def __repr__(self):
+        return 'ArraySequence({0!r})'.format(self.default)
+
+
+def sequence_to_array(values, length):
+    """Returns the values of a sequence for `length` timesteps as float
+    array
+
+    Parameters
+    ----------
+    values : ArraySequence, oemof sequence, iterable or numeric
+        Time dependent attribute of a flow or an inertia source. Scalars
+        and `None` are broadcast to all timesteps, `None` becomes `nan`.
+        Iterables need one value per timestep.
+    length : int
+        Number of timesteps
+
+    Raises
+    ------
+    ValueError
+        If an iterable does not have `length` values
+
+    """
+    if isinstance(values, ArraySequence):
+        values = values.default
+    elif isinstance(values, osp._Sequence):
+        # keep the length of the emulated sequence in sync with the model
+        values[length - 1]
+        values = values.default
+
+    if values is None:
+        return np.full(length, np.nan)
+    elif np.ndim(values) == 0:
+        return np.full(length, values, dtype=float)
+    else:
+        values = np.asarray(values, dtype=float)
+        if len(values) != length:
+            raise ValueError("Expected {0} time dependent values, got {1}.".format(
+                length, len(values)))
+        return values
+
+
+def flow_bounds(flow, length, unidirectional=True, inertia_power_share=None):
+    """Calculates the bounds of a flow variable for all timesteps at once
+
+    Parameters
+    ----------
+    flow : Flow object
+        Flow from which `nominal_value`, `fix`, `min` and `max` are read
+    length : int
+        Number of timesteps
+    unidirectional : bool
+        Whether the flow is part of the unidirectional flows of the model
+    inertia_power_share : numeric or None
+        Share of the nominal value reserved for synthetic inertia of a
+        storage. If set, the upper bound is reduced accordingly.
+
+    Returns
+    -------
+    tuple of arrays
+        Lower bound, upper bound and fixed value of the flow variable.
+        Missing bounds and timesteps without fixed value are `nan`.
+
+    """
+    lb = np.full(length, np.nan)
+    ub = np.full(length, np.nan)
+    fix = np.full(length, np.nan)
+
+    if flow.nominal_value is not None:
+        fix = sequence_to_array(flow.fix, length) * flow.nominal_value
+        ub = sequence_to_array(flow.max, length) * flow.nominal_value
+        if not flow.nonconvex:
+            lb = sequence_to_array(flow.min, length) * flow.nominal_value
+        elif unidirectional:
+            lb[:] = 0
+    elif unidirectional:
+        lb[:] = 0
+
+    if inertia_power_share is not None:
+        ub[:] = flow.nominal_value * (1 - inertia_power_share)
+
+    return lb, ub, fix
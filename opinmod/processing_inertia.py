@@ -10,38 +10,69 @@ https://github.com/oemof/oemof-solph
 
 """
 
+from opinmod.plumbing_inertia import sequence_to_array
+
 import oemof.solph.processing as osp
+
 import pandas as pd
 
 def results(om):
-    result_dict =  osp.results(om)
-    for (ores,ires) in result_dict:
-        for (oin, iin) in om.sources_inertia:
-            if om.sources_inertia[oin,iin].provision_type == 'synchronous_generator' and oin == ores and ires == iin:
-                result_dict[ores, ires]['sequences']['inertia_constant'] = om.sources_inertia[oin,iin].inertia_constant
-                result_dict[ores, ires]['sequences']['apparent_power'] = om.sources_inertia[oin,iin].apparent_power
-            elif om.sources_inertia[oin,iin].provision_type == 'synchronous_storage' and oin == ores and ires == iin:
-                result_dict[ores, ires]['sequences']['inertia_constant'] = om.sources_inertia[oin,iin].inertia_constant
-                result_dict[ores, ires]['sequences']['apparent_power'] = om.sources_inertia[oin,iin].apparent_power
-            elif om.sources_inertia[oin,iin].provision_type == 'none' and oin == ores and ires == iin:
-                result_dict[ores, ires]['sequences']['inertia_constant'] = om.sources_inertia[oin,iin].inertia_constant
-                result_dict[ores, ires]['sequences']['apparent_power'] = om.sources_inertia[oin,iin].apparent_power
-            elif om.sources_inertia[oin,iin].provision_type == 'synthetic_wind' and oin == ores and ires == iin:
-                for t in om.TIMESTEPS:
-                    if t == 0:
-                        result_dict[ores, ires]['sequences']['inertia_constant'] = None
-                        result_dict[ores, ires]['sequences']['apparent_power'] = None
-                        result_dict[ores, ires]['sequences'].iloc[t, 1] = om.sources_inertia[oin,iin].inertia_constant[t]
-                        result_dict[ores, ires]['sequences'].iloc[t, 2] = om.sources_inertia[oin,iin].apparent_power
-                    else:
-                        result_dict[ores, ires]['sequences'].iloc[t, 1] = om.sources_inertia[oin,iin].inertia_constant[t]
-                        result_dict[ores, ires]['sequences'].iloc[t, 2] = om.sources_inertia[oin,iin].apparent_power
-                result_dict[ores, ires]['sequences']['inertia_constant'] = pd.to_numeric(result_dict[ores, ires]['sequences']['inertia_constant'])
-                result_dict[ores, ires]['sequences']['apparent_power'] = pd.to_numeric(result_dict[ores, ires]['sequences']['apparent_power'])
-            elif om.sources_inertia[oin,iin].provision_type == 'synthetic_storage' and oin == ores and ires == iin:
-                result_dict[ores, ires]['sequences']['inertia_constant'] = om.sources_inertia[oin,iin].inertia_constant
-                result_dict[ores, ires]['sequences']['apparent_power'] = om.sources_inertia[oin,iin].apparent_power
-            else:
-                None
+    """Returns the results of an OpInMod model
+
+    The results of :func:`oemof.solph.processing.results` are extended by
+    the columns `inertia_constant` and `apparent_power` for every inertia
+    source. Both columns are assigned as whole float columns. The
+    commitment `source_inertia` of presolved sources is reconstructed
+    from their fixed commitment.
+
+    Parameters
+    ----------
+    om : opinmod.Model
+        Solved model
+
+    Returns
+    -------
+    dict
+        Results as returned by oemof.solph with `(source, target)` keys
+
+    """
+    result_dict = osp.results(om)
+    for (o, i), commitment in om.presolved_commitment.items():
+        result_dict[o, i] = {
+            'scalars': pd.Series(dtype=float),
+            'sequences': pd.DataFrame({'source_inertia': commitment.astype(float)},
+                                      index=om.es.timeindex)}
+    return add_inertia_sequences(result_dict, {
+        key: (edge.inertia_constant, edge.apparent_power)
+        for key, edge in om.sources_inertia.items()})
+
+
+def add_inertia_sequences(result_dict, inertia):
+    """Adds the inertia constant and apparent power of inertia sources to
+    their sequences
+
+    Parameters
+    ----------
+    result_dict : dict
+        Results as returned by oemof.solph
+    inertia : dict
+        Inertia constant (numeric or sequence) and apparent power of all
+        inertia sources. Index: `(source, target)`
+
+    Returns
+    -------
+    dict
+        `result_dict` with the columns `inertia_constant` and
+        `apparent_power` for every inertia source
+
+    """
+    for key, values in result_dict.items():
+        if key not in inertia:
+            continue
+        inertia_constant, apparent_power = inertia[key]
+        sequences = values['sequences']
+        n = len(sequences)
+        sequences['inertia_constant'] = sequence_to_array(inertia_constant, n)
+        sequences['apparent_power'] = sequence_to_array(apparent_power, n)
 
     return result_dict
@@ -0,0 +1,130 @@
+## Copyright 2021 Henning Thiesen
+
+## OpInMod is released under the open source MIT License, see
+## https://github.com/hnnngt/OpInMod/blob/main/LICENSE
+
+"""Build profile of OpInMod models.
+
+A :class:`BuildProfile` records wall time, Python allocations and the
+number of created Pyomo components for every phase of the construction
+of a model. It is created by ``Model(es, build_profile=True)``.
+
+"""
+
+from pyomo.core.expr.current import identify_variables
+import pyomo.environ as po
+
+import contextlib
+import json
+import time
+import tracemalloc
+
+
+class BuildProfile(object):
+    """Wall time, allocations and component counts of the build phases
+
+    Parameters
+    ----------
+    model : opinmod.Model
+        Profiled model
+    hook : callable, optional
+        Called with the profile after the model is built, e.g. to send it
+        to a monitoring system
+
+    Attributes
+    ----------
+    phases : list of dict
+        One record per phase with the keys `phase`, `time` (s), `memory`
+        (bytes allocated and still held at the end of the phase),
+        `peak_memory` (bytes, peak of the allocations during the phase),
+        `variables`, `constraints` and `nonzeros` (created in the phase)
+
+    Notes
+    -----
+    Allocations are traced with `tracemalloc`. If tracing is already
+    active and the peak can not be reset (Python < 3.9), `peak_memory`
+    is not recorded.
+
+    """
+
+    def __init__(self, model, hook=None):
+        self.model = model
+        self.hook = hook
+        self.phases = []
+        self._variables = set()
+        self._constraints = set()
+
+    @contextlib.contextmanager
+    def measure(self, phase):
+        """Measures a phase of the build"""
+        tracing = tracemalloc.is_tracing()
+        if not tracing:
+            tracemalloc.start()
+        elif hasattr(tracemalloc, 'reset_peak'):
+            tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            current, peak = tracemalloc.get_traced_memory()
+            if not tracing:
+                tracemalloc.stop()
+            elif not hasattr(tracemalloc, 'reset_peak'):
+                peak = None
+            record = {'phase': phase, 'time': duration,
+                      'memory': current - before,
+                      'peak_memory': None if peak is None else peak - before}
+            record.update(self._count())
+            self.phases.append(record)
+
+    def _count(self):
+        """Counts the variables, constraints and nonzeros of all components
+        created since the last call"""
+        variables = constraints = nonzeros = 0
+        for var in self.model.component_objects(po.Var, descend_into=True):
+            if id(var) not in self._variables:
+                self._variables.add(id(var))
+                variables += len(var)
+        for constraint in self.model.component_objects(po.Constraint, descend_into=True):
+            if id(constraint) not in self._constraints:
+                self._constraints.add(id(constraint))
+                for c in constraint.values():
+                    constraints += 1
+                    nonzeros += sum(1 for _ in identify_variables(c.body, include_fixed=False))
+        return {'variables': variables, 'constraints': constraints, 'nonzeros': nonzeros}
+
+    def finish(self):
+        """Calls the hook with the completed profile"""
+        if self.hook is not None:
+            self.hook(self)
+
+    def totals(self):
+        """Returns the sums over all phases"""
+        totals = {}
+        for key in ('time', 'memory', 'variables', 'constraints', 'nonzeros'):
+            totals[key] = sum(p[key] for p in self.phases)
+        peaks = [p['peak_memory'] for p in self.phases if p['peak_memory'] is not None]
+        totals['peak_memory'] = max(peaks) if peaks else None
+        return totals
+
+    def to_dict(self):
+        """Returns the profile as dict"""
+        return {'phases': self.phases, 'totals': self.totals()}
+
+    def to_json(self, path=None, **kwargs):
+        """Returns the profile as JSON string and writes it to `path` if given"""
+        text = json.dumps(self.to_dict(), **kwargs)
+        if path is not None:
+            with open(path, 'w') as f:
+                f.write(text)
+        return text
+
+    def __str__(self):
+        lines = ['{0:<40} {1:>9} {2:>12} {3:>10} {4:>11} {5:>10}'.format(
+            'phase', 'time [s]', 'memory [kB]', 'variables', 'constraints', 'nonzeros')]
+        for p in self.phases + [dict(self.totals(), phase='total')]:
+            lines.append('{phase:<40} {time:>9.3f} {kb:>12.0f} {variables:>10} '
+                         '{constraints:>11} {nonzeros:>10}'.format(kb=p['memory'] / 1024, **p))
+        return '\n'.join(lines)
@@ -0,0 +1,173 @@
+## Copyright 2021 Henning Thiesen
+
+## OpInMod is released under the open source MIT License, see
+## https://github.com/hnnngt/OpInMod/blob/main/LICENSE
+
+"""Rolling horizon optimisation of OpInMod energy systems.
+
+The time horizon is split into overlapping windows which are optimised
+one after another. The storage levels at the end of the committed part
+of a window are carried over into the next window, and the overlapping
+part of the next window is warm started from the solution of the
+previous window.
+
+The commitment of the inertia sources is not carried over: the model
+has no minimum up or down times or start-up costs, so the commitment of
+one timestep does not constrain the next one, and fixing it across the
+window boundary would only restrict the dispatch.
+
+"""
+
+from opinmod.models_inertia import Model
+
+from oemof.solph.components.generic_storage import GenericStorage
+
+import pandas as pd
+
+
+class RollingHorizon(object):
+    """Rolling horizon driver around :class:`opinmod.Model`
+
+    Parameters
+    ----------
+    energysystem : EnergySystem object
+        Object that holds the nodes of an OpInMod energy system graph
+    window : int
+        Number of timesteps optimised in each window
+    commit : int, optional
+        Number of timesteps of each window whose results are kept. The
+        next window starts after the committed timesteps. Defaults to
+        `window - overlap`.
+    overlap : int, optional
+        Number of timesteps at the start of each window which are warm
+        started from the solution of the previous window. Defaults to
+        `window - commit`, i.e. all timesteps shared with the previous
+        window.
+    **kwargs
+        Keyword arguments passed to :class:`opinmod.Model`
+
+    Notes
+    -----
+    Storages are not balanced within the windows. Their storage level is
+    initialised with the level at the end of the committed timesteps of
+    the previous window.
+
+    """
+
+    def __init__(self, energysystem, window, commit=None, overlap=None, **kwargs):
+        if commit is None and overlap is None:
+            commit = window
+        if commit is None:
+            commit = window - overlap
+        if overlap is None:
+            overlap = window - commit
+
+        if not 0 < commit <= window:
+            raise ValueError("The commit length has to be between 1 and the window length.")
+        if not 0 <= overlap <= window - commit:
+            raise ValueError("The overlap can not be longer than the uncommitted part of the window.")
+
+        self.es = energysystem
+        self.window = window
+        self.commit = commit
+        self.overlap = overlap
+        self.model_kwargs = kwargs
+        self.models = []
+        self._results = None
+
+    def windows(self):
+        """Returns the first and last timestep (exclusive) of all windows"""
+        length = len(self.es.timeindex)
+        windows = []
+        start = 0
+        while True:
+            stop = min(start + self.window, length)
+            windows.append((start, stop))
+            if stop == length:
+                return windows
+            start += self.commit
+
+    def solve(self, solver='cbc', solver_io='lp', keep_models=False, **kwargs):
+        """Solves all windows one after another
+
+        Parameters
+        ----------
+        solver : str
+            Solver passed to :meth:`opinmod.Model.solve`
+        solver_io : str
+            Solver interface passed to :meth:`opinmod.Model.solve`
+        keep_models : bool
+            Keep the model of each window in :attr:`models`
+        **kwargs
+            Keyword arguments passed to :meth:`opinmod.Model.solve`
+
+        Returns
+        -------
+        dict
+            Stitched results, see :meth:`results`
+
+        """
+        state = {}
+        start_values = {}
+        window_results = []
+        windows = self.windows()
+
+        for k, (start, stop) in enumerate(windows):
+            es = self.es.select_timesteps(range(start, stop))
+            for n in es.nodes:
+                if isinstance(n, GenericStorage):
+                    n.balanced = False
+                    if str(n) in state:
+                        n.initial_storage_level = state[str(n)] / n.nominal_storage_capacity
+
+            model = Model(es, **self.model_kwargs)
+            model.set_start_values(start_values, offset=start)
+            model.solve(solver=solver, solver_io=solver_io, **kwargs)
+
+            committed = stop - start if k == len(windows) - 1 else self.commit
+            results = model.results()
+            window_results.append((results, committed))
+
+            # carry over the storage levels
+            for (n, _), values in results.items():
+                if isinstance(n, GenericStorage) and 'storage_content' in values['sequences']:
+                    state[str(n)] = values['sequences']['storage_content'].iloc[committed - 1]
+
+            start_values = model.start_values(offset=start, first=start + committed,
+                                              last=start + committed + self.overlap)
+            if keep_models:
+                self.models.append(model)
+
+        self._results = _stitch(self.es, window_results)
+        return self._results
+
+    def results(self):
+        """Returns the results of all windows
+
+        The committed timesteps of all windows are stitched together in
+        the structure of :meth:`opinmod.Model.results` with the nodes of
+        the original energy system as keys.
+
+        """
+        if self._results is None:
+            raise ValueError("The rolling horizon has not been solved yet.")
+        return self._results
+
+
+def _stitch(es, window_results):
+    """Concatenates the committed timesteps of all window results"""
+    nodes = {str(n): n for n in es.nodes}
+
+    def _original(n):
+        return None if n is None else nodes[str(n)]
+
+    results = {}
+    for window, committed in window_results:
+        for (o, i), values in window.items():
+            key = (_original(o), _original(i))
+            entry = results.setdefault(key, {'scalars': values['scalars'], 'sequences': []})
+            entry['sequences'].append(values['sequences'].iloc[:committed])
+
+    for entry in results.values():
+        entry['sequences'] = pd.concat(entry['sequences'])
+    return results
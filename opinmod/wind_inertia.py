@@ -7,7 +7,11 @@
 
 """
 
-from scipy.interpolate import interp1d
+from collections import OrderedDict
+import hashlib
+import math
+
+import numpy as np
 
 """`NREL 5MW wind turbine data <https://doi.org/10.2172/947422>`
 
@@ -21,19 +25,76 @@ speedVsVarHSpeed = [0.0, 0.67, 0.672, 0.674, 0.676, 0.678, 0.68, 0.682, 0.684, 0
 
 speedVsVarHVarH = [0.0, 0.0, 0.002890149477906, 0.005788913410292, 0.008696291797158, 0.011612284638503, 0.014536891934328, 0.017470113684633, 0.020411949889417, 0.02336240054868, 0.026321465662424, 0.029289145230646, 0.032265439253349, 0.035250347730531, 0.038243870662193, 0.041246008048334, 0.044256759888955, 0.047276126184055, 0.050304106933635, 0.053340702137695, 0.056385911796234, 0.059439735909253, 0.062502174476752, 0.06557322749873, 0.068652894975188, 0.071741176906125, 0.074838073291542, 0.077943584131438, 0.081057709425814, 0.08418044917467, 0.087311803378005, 0.09045177203582, 0.093600355148115, 0.096757552714889, 0.099923364736143, 0.103097791211876, 0.106280832142089, 0.109472487526781, 0.112672757365953, 0.115881641659605, 0.119099140407737, 0.122325253610347, 0.125559981267438, 0.128803323379008, 0.132055279945058, 0.135315850965587, 0.138585036440596, 0.141862836370085, 0.145149250754053, 0.148444279592501, 0.151747922885428, 0.155060180632835, 0.158381052834721, 0.161710539491088, 0.165048640601933, 0.168395356167259, 0.171750686187064, 0.175114630661348, 0.178487189590112, 0.181868362973356, 0.185258150811079, 0.188656553103282, 0.192063569849965, 0.195479201051127, 0.198903446706769, 0.20233630681689, 0.205777781381491, 0.209227870400572, 0.212686573874132, 0.216153891802172, 0.219629824184691, 0.22311437102169, 0.226607532313169, 0.230109308059127, 0.233619698259565, 0.237138702914482, 0.240666322023879, 0.244202555587756, 0.247747403606112, 0.251300866078948, 0.254862943006263, 0.258433634388058, 0.262012940224333, 0.265600860515087, 0.269197395260321, 0.272802544460034, 0.276416308114227, 0.2800386862229, 0.283669678786052, 0.287309285803684, 0.290957507275795, 0.294614343202386, 0.298279793583457, 0.301953858419007, 0.305636537709037, 0.309327831453546, 0.313027739652535, 0.316736262306004, 0.320453399413952, 0.32417915097638, 0.327913516993287, 0.331656497464675, 0.335408092390541, 0.339168301770887, 0.342937125605713, 0.346714563895019, 0.350500616638804, 0.354295283837068, 0.358098565489813, 0.361910461597037, 0.36573097215874, 0.369560097174923, 0.373397836645586, 0.377244190570728, 0.38109915895035, 0.384962741784451, 0.388834939073032, 0.392715750816093, 0.396605177013633, 0.400503217665653, 0.404409872772153, 0.408325142333132, 0.41224902634859, 0.416181524818529, 0.420122637742947, 0.424072365121844, 0.428030706955221, 0.431997663243078, 0.435973233985414, 0.43995741918223, 0.443950218833526, 0.447951632939301, 0.451961661499555, 0.45598030451429, 0.460007561983504, 0.464043433907197, 0.46808792028537, 0.472141021118023, 0.476202736405155, 0.480273066146767, 0.484352010342859, 0.48843956899343, 0.49253574209848, 0.496640529658011, 0.500753931672021, 0.50487594814051, 0.509006579063479, 0.513145824440928, 0.517293684272856, 0.521450158559264, 0.525615247300152, 0.529788950495519, 0.533971268145366, 0.538162200249692, 0.542361746808498, 0.546569907821784, 0.550786683289549, 0.555012073211793, 0.559246077588518, 0.563488696419722, 0.567739929705405, 0.571999777445569, 0.576268239640211, 0.580545316289334, 0.584831007392936, 0.589125312951017, 0.593428232963578, 0.597739767430619, 0.60205991635214, 0.606388679728139, 0.610726057558619, 0.615072049843578, 0.619426656583017, 0.623789877776936, 0.628161713425333, 0.632542163528211, 0.636931228085568, 0.641328907097405, 0.645735200563721, 0.650150108484517, 0.654573630859793, 0.659005767689548, 0.663446518973783, 0.667895884712497, 0.672353864905691, 0.676820459553365, 0.681295668655518, 0.685779492212151, 0.690271930223263, 0.694772982688855, 0.699282649608927, 0.703800930983478, 0.708327826812509, 0.712863337096019, 0.71740746183401, 0.721960201026479, 0.726521554673428, 0.731091522774857, 0.735670105330766, 0.740257302341154, 0.744853113806021, 0.749457539725368, 0.754070580099195, 0.758692234927502, 0.763322504210288, 0.767961387947554, 0.772608886139299, 0.777264998785524, 0.781929725886228, 0.786603067441412, 0.791285023451076, 0.795975593915219, 0.800674778833842, 0.805382578206944, 0.810098992034527, 0.814824020316588, 0.819557663053129, 0.82429992024415, 0.829050791889651, 0.833810277989631, 0.838578378544091, 0.84335509355303, 0.848140423016449, 0.852934366934347, 0.857736925306725, 0.862548098133583, 0.86736788541492, 0.872196287150737, 0.877033303341034, 0.881878933985809, 0.886733179085065, 0.8915960386388, 0.896467512647015, 0.90134760110971, 0.906236304026884, 0.911133621398537, 0.916039553224671, 0.920954099505284, 0.925877260240376, 0.930809035429948, 0.935749425074, 0.940698429172531, 0.945656047725542, 0.950622280733033, 0.955597128195003, 0.960580590111453, 0.965572666482382, 0.970573357307791, 0.975582662587679, 0.980600582322047, 0.985627116510895, 0.990662265154223, 0.99570602825203, 1.00075840580432, 1.00581939781108, 1.01088900427233, 1.01596722518805, 1.02105406055826, 1.02614951038294, 1.03125357466211, 1.03636625339575, 1.04148754658387, 1.04661745422648, 1.05175597632356, 1.05690311287512, 1.06205886388116, 1.06722322934168, 1.07239620925669, 1.07757780362617, 1.08276801245013, 1.08796683572857, 1.09317427346149, 1.09839032564888, 1.10361499229076, 1.10884827338712, 1.11409016893796, 1.11934067894328, 1.12459980340307, 1.12986754231735, 1.13514389568611, 1.14042886350934, 1.14572244578706, 1.15102464251925, 1.15633545370593, 1.16165487934708, 1.16698291944272, 1.17231957399283, 1.17766484299742, 1.18301872645649, 1.18838122437005, 1.19375233673808, 1.19913206356059, 1.20452040483758, 1.20991736056905, 1.215322930755, 1.22073711539543, 1.22615991449034, 1.23159132803973, 1.2370313560436, 1.24247999850195, 1.24793725541477, 1.25340312678208, 1.25887761260387, 1.26436071288014, 1.26985242761088, 1.27535275679611, 1.28086170043581, 1.28637925853, 1.29190543107866, 1.29744021808181, 1.30298361953943, 1.30853563545153, 1.31409626581812, 1.31966551063918, 1.32524336991472, 1.33082984364474, 1.33642493182925]
 
-# interpolation of wind turbine characteristics
-speed_power_inter = interp1d(speedVsPowerPower,
-                             speedVsPowerSpeed,
-                             fill_value=0,
-                             bounds_error=False)
+# wind turbine characteristics as arrays for the interpolation, created on
+# first use
+_characteristics = None
+
+# number of capacity factor profiles kept in the profile cache
+PROFILE_CACHE_SIZE = 128
+
+_profile_cache = OrderedDict()
 
-speed_varH_inter = interp1d(speedVsVarHSpeed,
-                            speedVsVarHVarH,
-                            fill_value=0,
-                            bounds_error=False)
 
 # set up function to calculate var H inertia constant
 def calc_inertia_wind(cap):
-    speed = speed_power_inter(cap)
-    varH = speed_varH_inter(speed)
+    """Calculates the variable inertia constant of the NREL 5MW wind turbine
+
+    Parameters
+    ----------
+    cap : numeric or array
+        Capacity factor(s) of the wind turbine. Values outside of the
+        power curve result in an inertia constant of 0.
+
+    """
+    global _characteristics
+    if _characteristics is None:
+        _characteristics = tuple(np.array(c) for c in (
+            speedVsPowerPower, speedVsPowerSpeed, speedVsVarHSpeed, speedVsVarHVarH))
+    power, speed_power, speed_varH, varH = _characteristics
+
+    speed = np.interp(cap, power, speed_power, left=0, right=0)
+    varH = np.interp(speed, speed_varH, varH, left=0, right=0)
     return varH
+
+
+def calc_inertia_wind_profile(cap, emulated_inertia_constant, apparent_power):
+    """Calculates the synthetic inertia of a wind park for a whole profile
+
+    The inertia constant and the commitment are cached for each capacity
+    factor profile and emulated inertia constant, so wind parks sharing
+    the same normalised profile are calculated only once.
+
+    Parameters
+    ----------
+    cap : iterable
+        Capacity factor profile of the wind park
+    emulated_inertia_constant : numeric
+        Emulated inertia constant of the energy system
+    apparent_power : numeric
+        Apparent power of the wind park
+
+    Returns
+    -------
+    tuple of arrays
+        Inertia constant, moment of inertia and commitment (1 if the
+        wind park feeds in, 0 otherwise) for each timestep.
+
+    """
+    cap = np.ascontiguousarray(cap, dtype=float)
+    key = (hashlib.sha1(cap.tobytes()).hexdigest(), len(cap), emulated_inertia_constant)
+
+    if key in _profile_cache:
+        _profile_cache.move_to_end(key)
+    else:
+        inertia_constant = calc_inertia_wind(cap) * emulated_inertia_constant
+        commitment = (cap > 0).astype(int)
+        inertia_constant.flags.writeable = False
+        commitment.flags.writeable = False
+        _profile_cache[key] = (inertia_constant, commitment)
+        if len(_profile_cache) > PROFILE_CACHE_SIZE:
+            _profile_cache.popitem(last=False)
+
+    inertia_constant, commitment = _profile_cache[key]
+    moment_of_inertia = (inertia_constant*apparent_power)/(0.5*4*math.pi**2*50**2)
+
+    return inertia_constant, moment_of_inertia, commitment
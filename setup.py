@@ -18,9 +18,12 @@ setup(name='opinmod',
       description='A model generator for unit commitment and economic inertia dispatch modelling',
       long_description=read('README.rst'),
       long_description_content_type='text/x-rst',
-      packages=find_packages(),
+      packages=find_packages(exclude=['benchmarks', 'benchmarks.*']),
+      entry_points={'console_scripts': [
+          'opinmod-batch = opinmod.batch_inertia:main']},
       install_requires=['oemof.solph == 0.4.4',
                         'pandas == 1.3.2',
                         'scipy == 1.7.1',
-                        'pyomo == 5.7.2']
+                        'pyomo == 5.7.2'],
+      extras_require={'export': ['pyarrow', 'tables']}
       )
@@ -0,0 +1,47 @@
+## Copyright 2021 Henning Thiesen
+
+## OpInMod is released under the open source MIT License, see
+## https://github.com/hnnngt/OpInMod/blob/main/LICENSE
+
+"""Tests of the time series aggregation
+
+"""
+
+import opinmod as om
+from opinmod.aggregation_inertia import TimeSeriesAggregation, _squared_distances
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def _energysystem(demand):
+    es = om.EnergySystem(
+        timeindex=pd.date_range('2020-01-01', periods=len(demand), freq='H'),
+        nominal_grid_frequency=50, emulated_inertia_constant=6)
+    bel = om.Bus(label='electricity')
+    es.add(bel)
+    es.add(om.Sink(label='demand', inputs={bel: om.Flow(fix=demand, nominal_value=1)}))
+    es.add(om.Source(label='supply', outputs={bel: om.Flow(variable_costs=10)}))
+    return es
+
+
+def test_squared_distances():
+    rng = np.random.RandomState(0)
+    a, b = rng.rand(5, 3), rng.rand(4, 3)
+    expected = ((a[:, None, :] - b[None, :, :]) ** 2).sum(axis=2)
+    assert np.allclose(_squared_distances(a, b), expected)
+
+
+@pytest.mark.parametrize('method', ['kmedoids', 'kmeans'])
+def test_identical_periods(method):
+    # the first three periods are identical
+    es = _energysystem([1, 2, 1, 2, 1, 2, 5, 3])
+    aggregation = TimeSeriesAggregation(es, n_periods=3, period_length=2,
+                                        method=method, seed=0).cluster()
+
+    assert len(np.unique(aggregation.representatives)) == 3
+    assert (aggregation.weights > 0).all()
+    assert aggregation.weights.sum() == 4
+    assert aggregation.assignment[3] != aggregation.assignment[0]
+    assert aggregation.aggregate().timeindex.is_unique
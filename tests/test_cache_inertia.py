@@ -0,0 +1,95 @@
+## Copyright 2021 Henning Thiesen
+
+## OpInMod is released under the open source MIT License, see
+## https://github.com/hnnngt/OpInMod/blob/main/LICENSE
+
+"""Tests of the on-disk model cache
+
+"""
+
+import opinmod as om
+from opinmod.cache_inertia import CachedModel, ModelCache
+
+import pandas as pd
+import pytest
+
+from pyomo.opt import SolverFactory
+
+cbc = pytest.mark.skipif(not SolverFactory('cbc').available(exception_flag=False),
+                         reason="cbc is not installed")
+
+
+def _energysystem(demand=(60, 120, 100, 40)):
+    """A generator, a wind park and a storage with synthetic inertia"""
+    es = om.EnergySystem(
+        timeindex=pd.date_range('2020-01-01', periods=4, freq='H'),
+        nominal_grid_frequency=50, emulated_inertia_constant=6,
+        minimum_system_inertia=0.01, minimum_system_synchronous_inertia=0.005)
+    bel = om.Bus(label='electricity')
+    bfuel = om.Bus(label='fuel')
+    inertia = om.Bus(label='inertia', balanced=False)
+    es.add(bel, bfuel, inertia)
+    es.add(om.Source(label='fuel_supply', outputs={bfuel: om.Flow(variable_costs=20)}))
+    es.add(om.Source(label='shortage', outputs={bel: om.Flow(variable_costs=1000)}))
+    es.add(om.Sink(label='excess', inputs={bel: om.Flow(variable_costs=100)}))
+    es.add(om.Sink(label='demand', inputs={bel: om.Flow(fix=list(demand), nominal_value=1)}))
+    es.add(om.Transformer(
+        label='generator', inputs={bfuel: om.Flow()},
+        outputs={bel: om.Flow(nominal_value=150, variable_costs=5),
+                 inertia: om.Inertia(inertia_constant=6, apparent_power=180,
+                                     provision_type='synchronous_generator',
+                                     inertia_costs=0.5, minimum_stable_operation=0.3)},
+        conversion_factors={bel: 0.4}))
+    es.add(om.Source(label='wind', outputs={
+        bel: om.Flow(fix=[0.1, 0.6, 0.3, 0.9], nominal_value=80),
+        inertia: om.Inertia(apparent_power=80, provision_type='synthetic_wind', inertia_costs=0.2)}))
+    es.add(om.GenericStorage(
+        label='storage', nominal_storage_capacity=120,
+        inputs={bel: om.Flow(nominal_value=40)},
+        outputs={bel: om.Flow(nominal_value=40),
+                 inertia: om.Inertia(apparent_power=40, provision_type='synthetic_storage',
+                                     inertia_power_share=0.2, inertia_costs=0.1)},
+        loss_rate=0.01, initial_storage_level=0.5,
+        inflow_conversion_factor=0.95, outflow_conversion_factor=0.9))
+    return es
+
+
+def _by_label(results):
+    return {(str(o), str(i)): values['sequences'] for (o, i), values in results.items()}
+
+
+@cbc
+@pytest.mark.parametrize('presolve', [False, True])
+def test_miss_then_hit(presolve, tmpdir):
+    cache = ModelCache(str(tmpdir))
+
+    model = cache.model(_energysystem(), presolve=presolve)
+    assert isinstance(model, om.Model)
+    model.solve(solver='cbc')
+    expected = _by_label(model.results())
+
+    cached = cache.model(_energysystem(), presolve=presolve)
+    assert isinstance(cached, CachedModel)
+    assert cached.solve(solver='cbc') == 'Optimal'
+    results = _by_label(cached.results())
+
+    assert set(results) == set(expected)
+    for key, sequences in expected.items():
+        pd.testing.assert_frame_equal(
+            results[key][sorted(sequences.columns)], sequences[sorted(sequences.columns)],
+            check_dtype=False, check_names=False, check_freq=False, atol=1e-6)
+
+
+def test_eviction(tmpdir):
+    cache = ModelCache(str(tmpdir))
+    cache.model(_energysystem())
+    size = cache.entries()[0]['size']
+
+    cache.max_bytes = 2.5 * size
+    keys = []
+    for k in range(3):
+        cache.model(_energysystem(demand=(60 + k, 120, 100, 40)))
+        keys.append(cache.entries()[-1]['key'])
+
+    # the least recently used entries are evicted
+    assert [e['key'] for e in cache.entries()] == keys[1:]
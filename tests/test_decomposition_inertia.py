@@ -0,0 +1,106 @@
+## Copyright 2021 Henning Thiesen
+
+## OpInMod is released under the open source MIT License, see
+## https://github.com/hnnngt/OpInMod/blob/main/LICENSE
+
+"""Bounds of the Lagrangian decomposition against the Pyomo model
+
+"""
+
+import opinmod as om
+from opinmod.decomposition_inertia import LagrangianDecomposition
+from opinmod.matrix_inertia import MatrixModel
+
+import numpy as np
+import pandas as pd
+import pyomo.environ as po
+import pytest
+
+from pyomo.opt import SolverFactory
+
+cbc = pytest.mark.skipif(not SolverFactory('cbc').available(exception_flag=False),
+                         reason="cbc is not installed")
+
+
+def _energysystem():
+    """Two generators, a wind park and a storage with synthetic inertia"""
+    timesteps = 6
+    es = om.EnergySystem(
+        timeindex=pd.date_range('2020-01-01', periods=timesteps, freq='H'),
+        nominal_grid_frequency=50, emulated_inertia_constant=6,
+        minimum_system_inertia=0.01, minimum_system_synchronous_inertia=0.005)
+    bel = om.Bus(label='electricity')
+    bfuel = om.Bus(label='fuel')
+    inertia = om.Bus(label='inertia', balanced=False)
+    es.add(bel, bfuel, inertia)
+    es.add(om.Source(label='fuel_supply', outputs={bfuel: om.Flow(variable_costs=20)}))
+    es.add(om.Source(label='shortage', outputs={bel: om.Flow(variable_costs=1000)}))
+    es.add(om.Sink(label='excess', inputs={bel: om.Flow(variable_costs=100)}))
+    es.add(om.Sink(label='demand', inputs={bel: om.Flow(
+        fix=[60, 80, 120, 100, 40, 70], nominal_value=1)}))
+    for label, capacity, costs, efficiency in [('generator', 150, 5, 0.4),
+                                               ('peaker', 60, 2, 0.3)]:
+        es.add(om.Transformer(
+            label=label,
+            inputs={bfuel: om.Flow()},
+            outputs={bel: om.Flow(nominal_value=capacity, variable_costs=costs),
+                     inertia: om.Inertia(inertia_constant=6, apparent_power=1.2 * capacity,
+                                         provision_type='synchronous_generator',
+                                         inertia_costs=0.5, minimum_stable_operation=0.3)},
+            conversion_factors={bel: efficiency}))
+    es.add(om.Source(
+        label='wind',
+        outputs={bel: om.Flow(fix=[0.1, 0.6, 0.3, 0.9, 0.5, 0.0], nominal_value=80),
+                 inertia: om.Inertia(apparent_power=80, provision_type='synthetic_wind',
+                                     inertia_costs=0.2)}))
+    es.add(om.GenericStorage(
+        label='storage',
+        nominal_storage_capacity=120,
+        inputs={bel: om.Flow(nominal_value=40)},
+        outputs={bel: om.Flow(nominal_value=40),
+                 inertia: om.Inertia(apparent_power=40, provision_type='synthetic_storage',
+                                     inertia_power_share=0.2, inertia_costs=0.1)},
+        loss_rate=0.01, initial_storage_level=0.5,
+        inflow_conversion_factor=0.95, outflow_conversion_factor=0.9))
+    return es
+
+
+def _feasible(mm, x, tol=1e-6):
+    """Whether the column values satisfy all rows and bounds of a matrix
+    model"""
+    activity = mm.A.dot(x)
+    return bool((x >= mm.lb - tol).all() and (x <= mm.ub + tol).all()
+                and (np.round(x[mm.integer]) == x[mm.integer]).all()
+                and (activity[mm.sense == 'E'] == pytest.approx(mm.rhs[mm.sense == 'E'], abs=tol))
+                and (activity[mm.sense == 'G'] >= mm.rhs[mm.sense == 'G'] - tol).all()
+                and (activity[mm.sense == 'L'] <= mm.rhs[mm.sense == 'L'] + tol).all())
+
+
+@cbc
+@pytest.mark.parametrize('multipliers, max_workers', [('zero', 1), ('lp', 1), ('zero', 2)])
+def test_bounds_enclose_optimum(multipliers, max_workers):
+    model = om.Model(_energysystem())
+    model.solve(solver='cbc')
+    optimum = po.value(model.objective)
+
+    mm = MatrixModel(_energysystem())
+    result = LagrangianDecomposition(mm, max_workers=max_workers).solve(
+        iterations=30, multipliers=multipliers)
+
+    assert result['lower_bound'] <= optimum + 1e-6 * abs(optimum)
+    assert result['upper_bound'] >= optimum - 1e-6 * abs(optimum)
+    assert _feasible(mm, result['x'])
+    assert mm.c.dot(result['x']) == pytest.approx(result['upper_bound'])
+
+
+@cbc
+def test_lower_bound_reaches_lp_bound():
+    mm = MatrixModel(_energysystem())
+    decomposition = LagrangianDecomposition(mm, max_workers=1)
+    _, lp_bound, _, _ = decomposition._solve_lp(mm.lb, mm.ub)
+
+    result = decomposition.solve(iterations=100, multipliers='zero')
+    # the subproblems are almost integral in the LP relaxation, the
+    # maximum of the dual function is reached before the last iteration
+    assert result['lower_bound'] == pytest.approx(lp_bound, rel=1e-3)
+    assert result['iterations'] < 100
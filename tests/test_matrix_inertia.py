@@ -0,0 +1,97 @@
+## Copyright 2021 Henning Thiesen
+
+## OpInMod is released under the open source MIT License, see
+## https://github.com/hnnngt/OpInMod/blob/main/LICENSE
+
+"""Round trip of the matrix backend against the Pyomo model
+
+"""
+
+import opinmod as om
+from opinmod.aggregation_inertia import TimeSeriesAggregation
+from opinmod.matrix_inertia import MatrixModel, run_cbc
+
+import pandas as pd
+import pyomo.environ as po
+import pytest
+
+from pyomo.opt import SolverFactory
+
+import os
+
+cbc = pytest.mark.skipif(not SolverFactory('cbc').available(exception_flag=False),
+                         reason="cbc is not installed")
+
+
+def _energysystem(initial_storage_level=0.5, balanced=True):
+    """A generator, a wind park and a storage with synthetic inertia"""
+    timesteps = 6
+    es = om.EnergySystem(
+        timeindex=pd.date_range('2020-01-01', periods=timesteps, freq='H'),
+        nominal_grid_frequency=50, emulated_inertia_constant=6,
+        minimum_system_inertia=0.01, minimum_system_synchronous_inertia=0.005)
+    bel = om.Bus(label='electricity')
+    bfuel = om.Bus(label='fuel')
+    inertia = om.Bus(label='inertia', balanced=False)
+    es.add(bel, bfuel, inertia)
+    es.add(om.Source(label='fuel_supply', outputs={bfuel: om.Flow(variable_costs=20)}))
+    es.add(om.Source(label='shortage', outputs={bel: om.Flow(variable_costs=1000)}))
+    es.add(om.Sink(label='excess', inputs={bel: om.Flow(variable_costs=100)}))
+    es.add(om.Sink(label='demand', inputs={bel: om.Flow(
+        fix=[60, 80, 120, 100, 40, 70], nominal_value=1)}))
+    es.add(om.Transformer(
+        label='generator',
+        inputs={bfuel: om.Flow()},
+        outputs={bel: om.Flow(nominal_value=150, variable_costs=5),
+                 inertia: om.Inertia(inertia_constant=6, apparent_power=180,
+                                     provision_type='synchronous_generator',
+                                     inertia_costs=0.5, minimum_stable_operation=0.3)},
+        conversion_factors={bel: 0.4}))
+    es.add(om.Source(
+        label='wind',
+        outputs={bel: om.Flow(fix=[0.1, 0.6, 0.3, 0.9, 0.5, 0.0], nominal_value=80),
+                 inertia: om.Inertia(apparent_power=80, provision_type='synthetic_wind',
+                                     inertia_costs=0.2)}))
+    es.add(om.GenericStorage(
+        label='storage',
+        nominal_storage_capacity=120,
+        inputs={bel: om.Flow(nominal_value=40)},
+        outputs={bel: om.Flow(nominal_value=40),
+                 inertia: om.Inertia(apparent_power=40, provision_type='synthetic_storage',
+                                     inertia_power_share=0.2, inertia_costs=0.1)},
+        loss_rate=0.01, initial_storage_level=initial_storage_level, balanced=balanced,
+        inflow_conversion_factor=0.95, outflow_conversion_factor=0.9))
+    return es
+
+
+def _objective(mm, tmpdir):
+    """Solves the MPS file of a matrix model with cbc"""
+    filename = os.path.join(str(tmpdir), 'model.mps')
+    mm.write(filename)
+    status, objective, _ = run_cbc(filename)
+    assert status == 'Optimal'
+    return objective
+
+
+def test_storage_rows():
+    mm = MatrixModel(_energysystem())
+    start, stop = mm.row_blocks['storage_balance']
+    assert stop - start == mm.n
+    assert mm.lb[mm.storage_content[mm.storages[0]] + mm.n - 1] == 60
+
+
+@cbc
+@pytest.mark.parametrize('initial_storage_level, balanced, aggregated', [
+    (0.5, True, False), (None, True, False), (None, False, False), (0.5, True, True)])
+def test_objective_equals_pyomo_model(initial_storage_level, balanced, aggregated, tmpdir):
+    def _build():
+        es = _energysystem(initial_storage_level, balanced)
+        if aggregated:
+            es = TimeSeriesAggregation(es, n_periods=2, period_length=2, seed=0).aggregate()
+        return es
+
+    model = om.Model(_build())
+    model.solve(solver='cbc')
+    mm = MatrixModel(_build())
+
+    assert _objective(mm, tmpdir) == pytest.approx(po.value(model.objective), rel=1e-6)
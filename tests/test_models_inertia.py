@@ -0,0 +1,197 @@
+## Copyright 2021 Henning Thiesen
+
+## OpInMod is released under the open source MIT License, see
+## https://github.com/hnnngt/OpInMod/blob/main/LICENSE
+
+"""Tests of the OpInMod model
+
+"""
+
+import opinmod as om
+from opinmod.export_inertia import result_tables
+
+import oemof.solph.models as osm
+import pandas as pd
+import pyomo.environ as po
+import pytest
+
+from pyomo.core.expr.current import identify_variables
+from pyomo.opt import SolverFactory
+
+cbc = pytest.mark.skipif(not SolverFactory('cbc').available(exception_flag=False),
+                         reason="cbc is not installed")
+
+
+def _energysystem():
+    """A generator, a wind park and a storage with synthetic inertia"""
+    es = om.EnergySystem(
+        timeindex=pd.date_range('2020-01-01', periods=4, freq='H'),
+        nominal_grid_frequency=50, emulated_inertia_constant=6,
+        minimum_system_inertia=0.01, minimum_system_synchronous_inertia=0.005)
+    bel = om.Bus(label='electricity')
+    bfuel = om.Bus(label='fuel')
+    inertia = om.Bus(label='inertia', balanced=False)
+    es.add(bel, bfuel, inertia)
+    es.add(om.Source(label='fuel_supply', outputs={bfuel: om.Flow(variable_costs=20)}))
+    es.add(om.Source(label='shortage', outputs={bel: om.Flow(variable_costs=1000)}))
+    es.add(om.Sink(label='excess', inputs={bel: om.Flow(variable_costs=100)}))
+    es.add(om.Sink(label='demand', inputs={bel: om.Flow(fix=[60, 120, 100, 40], nominal_value=1)}))
+    es.add(om.Transformer(
+        label='generator', inputs={bfuel: om.Flow()},
+        outputs={bel: om.Flow(nominal_value=150, min=0.1, max=[1, 0.8, 0.9, 1], variable_costs=5),
+                 inertia: om.Inertia(inertia_constant=6, apparent_power=180,
+                                     provision_type='synchronous_generator',
+                                     inertia_costs=0.5, minimum_stable_operation=0.3)},
+        conversion_factors={bel: 0.4}))
+    es.add(om.Source(label='wind', outputs={
+        bel: om.Flow(fix=[0.1, 0.6, 0.3, 0.9], nominal_value=80),
+        inertia: om.Inertia(apparent_power=80, provision_type='synthetic_wind', inertia_costs=0.2)}))
+    es.add(om.GenericStorage(
+        label='storage', nominal_storage_capacity=120,
+        inputs={bel: om.Flow(nominal_value=40)},
+        outputs={bel: om.Flow(nominal_value=40),
+                 inertia: om.Inertia(apparent_power=40, provision_type='synthetic_storage',
+                                     inertia_power_share=0.2, inertia_costs=0.1)},
+        loss_rate=0.01, initial_storage_level=0.5,
+        inflow_conversion_factor=0.95, outflow_conversion_factor=0.9))
+    return es
+
+
+def _flow(model, source, target):
+    """Returns the flow variable between the nodes labelled `source` and
+    `target`"""
+    (o, i) = next((o, i) for (o, i) in model.FLOWS if str(o) == source and str(i) == target)
+    return [model.flow[o, i, t] for t in model.TIMESTEPS]
+
+
+def test_flow_bounds():
+    model = om.Model(_energysystem())
+    bounds = {
+        ('generator', 'electricity'): [(15, 150), (15, 120), (15, 135), (15, 150)],
+        ('storage', 'electricity'): [(0, 32)] * 4,
+        ('electricity', 'storage'): [(0, 40)] * 4,
+        ('electricity', 'excess'): [(0, None)] * 4,
+        ('fuel', 'generator'): [(0, None)] * 4}
+    for (source, target), expected in bounds.items():
+        assert [(v.lb, v.ub) for v in _flow(model, source, target)] == expected
+        assert not any(v.fixed for v in _flow(model, source, target))
+
+    fixed = {('electricity', 'demand'): [60, 120, 100, 40],
+             ('wind', 'electricity'): [8, 48, 24, 72]}
+    for (source, target), expected in fixed.items():
+        assert all(v.fixed for v in _flow(model, source, target))
+        assert [v.value for v in _flow(model, source, target)] == expected
+
+
+@cbc
+def test_objective():
+    model = om.Model(_energysystem())
+    model.solve(solver='cbc')
+    assert po.value(model.objective) == pytest.approx(16796.18070251656, rel=1e-9)
+
+
+@cbc
+def test_sweep_with_infeasible_limit():
+    model = om.Model(_energysystem())
+    sweep = model.sweep_inertia_limits([0.01, 1, 0.02], keep_results=True)
+
+    assert [p['termination_condition'] for p in sweep] == ['optimal', 'infeasible', 'optimal']
+    assert sweep[1]['objective'] is None
+    assert 'results' not in sweep[1]
+    assert sweep[0]['objective'] == pytest.approx(16796.18070251656, rel=1e-9)
+    assert sweep[2]['objective'] >= sweep[0]['objective']
+    assert all('results' in sweep[k] for k in (0, 2))
+
+
+def _two_areas(**limits):
+    """A cheap source without inertia and one generator in each of the
+    areas 'north' and 'south'"""
+    es = om.EnergySystem(
+        timeindex=pd.date_range('2020-01-01', periods=3, freq='H'),
+        nominal_grid_frequency=50, emulated_inertia_constant=6, **limits)
+    bel = om.Bus(label='electricity')
+    inertia = om.Bus(label='inertia', balanced=False)
+    es.add(bel, inertia)
+    es.add(om.Sink(label='demand', inputs={bel: om.Flow(fix=[100] * 3, nominal_value=1)}))
+    es.add(om.Source(label='import', outputs={bel: om.Flow(variable_costs=1)}))
+    for area in ('north', 'south'):
+        es.add(om.Source(label='generator_' + area, outputs={
+            bel: om.Flow(nominal_value=150, variable_costs=10),
+            inertia: om.Inertia(inertia_constant=6, apparent_power=180,
+                                provision_type='synchronous_generator',
+                                minimum_stable_operation=0.2, area=area)}))
+    return es
+
+
+def _commitment(model, label):
+    (o, i) = next(e for e in model.SOURCES_INERTIA if str(e[0]) == label)
+    return [model.source_inertia[o, i, t].value for t in model.TIMESTEPS]
+
+
+def test_area_constraints_only_hold_sources_of_their_area():
+    model = om.Model(_two_areas(minimum_area_synchronous_inertia={'north': 0.01, 'south': 0.01}))
+    constraint = model.min_area_synchronous_inertia_constraint
+    assert sorted(constraint) == [(a, t) for a in ('north', 'south') for t in range(3)]
+    for (a, t) in constraint:
+        variables = list(identify_variables(constraint[a, t].body))
+        assert [str(v.index()[0]) for v in variables] == ['generator_' + a]
+
+
+@cbc
+def test_time_varying_area_limit():
+    model = om.Model(_two_areas(minimum_area_inertia={'north': [0, 0.01, 0], 'south': 0.01}))
+    model.solve(solver='cbc')
+    assert _commitment(model, 'generator_north') == [0, 1, 0]
+    assert _commitment(model, 'generator_south') == [1, 1, 1]
+
+
+def test_area_without_inertia_sources():
+    with pytest.raises(ValueError, match="area 'east'"):
+        om.Model(_two_areas(minimum_area_inertia={'north': 0.01, 'east': 0.01}))
+
+
+@cbc
+@pytest.mark.parametrize('kind, expected', [
+    ('model', {'flow': 28, 'source_inertia': 8, 'GenericStorageBlock.storage_content': 4,
+               'values': 52}),
+    ('results', {'flow': 28, 'source_inertia': 8, 'values': 48}),
+    ('tables', {'flow': 28, 'source_inertia': 8, 'values': 48})])
+def test_warm_start(kind, expected, monkeypatch):
+    previous = om.Model(_energysystem())
+    previous.solve(solver='cbc')
+    source = {'model': lambda: previous, 'results': previous.results,
+              'tables': lambda: result_tables(previous)}[kind]()
+
+    model = om.Model(_energysystem())
+    # 7 unfixed flows and 2 commitments in 4 timesteps, fixed flows are skipped
+    assert model.warm_start(source) == expected
+    assert model.warm_started
+    assert [v.value for v in _flow(model, 'generator', 'electricity')] == pytest.approx(
+        [v.value for v in _flow(previous, 'generator', 'electricity')])
+
+    solve_kwargs = []
+    solve = osm.BaseModel.solve
+
+    def _solve(self, *args, **kwargs):
+        solve_kwargs.append(kwargs.get('solve_kwargs', {}))
+        return solve(self, *args, **kwargs)
+
+    monkeypatch.setattr(osm.BaseModel, 'solve', _solve)
+    model.solve(solver='cbc')
+    assert solve_kwargs == [{'warmstart': True}]
+    assert po.value(model.objective) == pytest.approx(po.value(previous.objective), rel=1e-9)
+
+
+def test_start_values_of_window():
+    model = om.Model(_energysystem())
+    for t in model.TIMESTEPS:
+        for o, i in model.FLOWS:
+            model.flow[o, i, t].value = t
+    values = model.start_values(offset=10, first=11, last=13)
+
+    assert {t for (_, _, t) in values} == {11, 12}
+    assert values['flow', ('generator', 'electricity'), 12] == 2
+
+    window = om.Model(_energysystem())
+    assert window.set_start_values(values, offset=11)['flow'] == 14
+    assert _flow(window, 'generator', 'electricity')[0].value == 1
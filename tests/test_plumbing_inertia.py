@@ -0,0 +1,29 @@
+## Copyright 2021 Henning Thiesen
+
+## OpInMod is released under the open source MIT License, see
+## https://github.com/hnnngt/OpInMod/blob/main/LICENSE
+
+"""Tests of the plumbing of time dependent attributes
+
+"""
+
+from opinmod.plumbing_inertia import ArraySequence, sequence_to_array
+
+from oemof.solph.plumbing import sequence
+
+import numpy as np
+import pytest
+
+
+def test_sequence_to_array():
+    assert sequence_to_array(2, 3).tolist() == [2, 2, 2]
+    assert np.isnan(sequence_to_array(None, 2)).all()
+    assert sequence_to_array([1, 2, 3], 3).tolist() == [1, 2, 3]
+    assert sequence_to_array(ArraySequence([1, 2]), 2).tolist() == [1, 2]
+    assert sequence_to_array(sequence(4), 2).tolist() == [4, 4]
+
+
+@pytest.mark.parametrize('values', [[1, 2, 3], [1]])
+def test_sequence_to_array_length_mismatch(values):
+    with pytest.raises(ValueError):
+        sequence_to_array(values, 2)
@@ -0,0 +1,63 @@
+## Copyright 2021 Henning Thiesen
+
+## OpInMod is released under the open source MIT License, see
+## https://github.com/hnnngt/OpInMod/blob/main/LICENSE
+
+"""Tests of the rolling horizon driver
+
+"""
+
+import opinmod as om
+from opinmod.rolling_horizon_inertia import RollingHorizon
+
+import pandas as pd
+import pyomo.environ as po
+import pytest
+
+from pyomo.opt import SolverFactory
+
+cbc = pytest.mark.skipif(not SolverFactory('cbc').available(exception_flag=False),
+                         reason="cbc is not installed")
+
+
+def _energysystem(timesteps=8):
+    """Two generators, the expensive one is only needed at peak demand"""
+    es = om.EnergySystem(
+        timeindex=pd.date_range('2020-01-01', periods=timesteps, freq='H'),
+        nominal_grid_frequency=50, emulated_inertia_constant=6)
+    bel = om.Bus(label='electricity')
+    inertia = om.Bus(label='inertia', balanced=False)
+    es.add(bel, inertia)
+    es.add(om.Sink(label='demand', inputs={bel: om.Flow(
+        fix=[50, 50, 150, 150, 50, 50, 150, 150][:timesteps], nominal_value=1)}))
+    es.add(om.Source(label='shortage', outputs={bel: om.Flow(variable_costs=1000)}))
+    es.add(om.Sink(label='excess', inputs={bel: om.Flow(variable_costs=1000)}))
+    for label, capacity, costs in (('base', 100, 10), ('peak', 100, 50)):
+        es.add(om.Source(label=label, outputs={
+            bel: om.Flow(nominal_value=capacity, variable_costs=costs),
+            inertia: om.Inertia(inertia_constant=5, apparent_power=capacity,
+                                provision_type='synchronous_generator',
+                                minimum_stable_operation=0.2)}))
+    return es
+
+
+def _costs(es, results):
+    """Returns the variable costs of the flows in `results`"""
+    costs = 0
+    for (o, i), flow in es.flows().items():
+        variable_costs = flow.variable_costs[0] or 0
+        costs += variable_costs * results[o, i]['sequences']['flow'].sum()
+    return costs
+
+
+@cbc
+def test_rolling_costs_equal_full_horizon():
+    es = _energysystem()
+    model = om.Model(es)
+    model.solve(solver='cbc')
+
+    horizon = RollingHorizon(es, window=4, commit=2)
+    results = horizon.solve(solver='cbc')
+
+    assert len(results[next(iter(results))]['sequences']) == len(es.timeindex)
+    assert _costs(es, results) == pytest.approx(po.value(model.objective))